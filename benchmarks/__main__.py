@@ -0,0 +1,59 @@
+# benchmarks/__main__.py
+
+"""
+Запуск бенчмарков.
+
+    python -m benchmarks run --sizes tiny,small --output bench.json
+    python -m benchmarks compare baseline.json bench.json --threshold 0.15
+"""
+
+import argparse
+import os
+import sys
+
+# Отрисовка меряется без окна.
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+from .harness import GRID_SIZES, DEFAULT_SIZES, run_benchmarks, save_results, load_results, compare_results
+from . import bench_world, bench_map_generation, bench_render, bench_turns, bench_chunks, bench_pathfinding, bench_territory, bench_match_server  # noqa: F401 — регистрация
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Бенчмарки pgg_game.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Запустить бенчмарки")
+    run_parser.add_argument("--sizes", default=",".join(DEFAULT_SIZES),
+                            help=f"Размеры через запятую: {', '.join(GRID_SIZES)} или all")
+    run_parser.add_argument("--filter", default="", help="Запускать только бенчмарки, чье имя содержит строку")
+    run_parser.add_argument("--output", default="bench_results.json", help="Файл для JSON-результатов")
+
+    compare_parser = commands.add_parser("compare", help="Сравнить результаты с базовой линией")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.15,
+                                help="Допустимое замедление медианы (0.15 = 15%%)")
+
+    args = parser.parse_args()
+
+    if args.command == "run":
+        sizes = list(GRID_SIZES) if args.sizes == "all" else args.sizes.split(",")
+        unknown = [size for size in sizes if size not in GRID_SIZES]
+        if unknown:
+            parser.error(f"неизвестные размеры: {', '.join(unknown)}")
+        results = run_benchmarks(sizes, args.filter)
+        save_results(args.output, results)
+        print(f"Результаты сохранены в {args.output}")
+        return 0
+
+    regressions = compare_results(load_results(args.baseline), load_results(args.current), args.threshold)
+    if regressions:
+        print(f"Найдено регрессий: {len(regressions)}")
+        return 1
+    print("Регрессий нет")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
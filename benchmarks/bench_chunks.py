@@ -0,0 +1,30 @@
+# benchmarks/bench_chunks.py
+
+"""Бенчмарки потоковой (чанковой) карты."""
+
+from pgg_game.world.game_world import GameWorld
+from pgg_game.core.camera import Camera
+from pgg_game.systems.chunk_system import ChunkStreamingSystem
+from pgg_game.config import SCREEN_WIDTH, SCREEN_HEIGHT, TILE_SIZE
+
+from .harness import benchmark
+from .worlds import BENCH_SEED
+
+PAN_FRAMES = 200
+# Сдвиг камеры за кадр в пикселях (быстрее, чем при обычной прокрутке).
+PAN_STEP = (48, 16)
+
+
+@benchmark("chunks.pan")
+def bench_pan(width: int, height: int):
+    """PAN_FRAMES кадров движения камеры по карте width x height: подгрузка и выгрузка чанков."""
+    world = GameWorld()
+    camera = Camera(SCREEN_WIDTH, SCREEN_HEIGHT, (width * TILE_SIZE, height * TILE_SIZE))
+    system = ChunkStreamingSystem(width, height, TILE_SIZE, camera, seed=BENCH_SEED)
+    system.update(world)
+
+    def run():
+        for _ in range(PAN_FRAMES):
+            camera.move(*PAN_STEP)
+            system.update(world)
+    return run
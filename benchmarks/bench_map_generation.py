@@ -0,0 +1,29 @@
+# benchmarks/bench_map_generation.py
+
+"""Бенчмарки генерации карты."""
+
+from pgg_game.world.game_world import GameWorld
+from pgg_game.systems.map_generator_system import MapGenerationSystem, generate_map_fields
+from pgg_game.config import TILE_SIZE
+
+from .harness import benchmark
+from .worlds import BENCH_SEED
+
+
+@benchmark("map.generate_fields")
+def bench_generate_fields(width: int, height: int):
+    """Только NumPy-поля: маска суши, рельеф, ресурсы."""
+    def run():
+        generate_map_fields(width, height, BENCH_SEED)
+    return run
+
+
+@benchmark("map.generate_full", repeats=3)
+def bench_generate_full(width: int, height: int):
+    """Полная генерация: поля, сущности провинций и граф соседства."""
+    world = GameWorld()
+    system = MapGenerationSystem(width, height, TILE_SIZE, seed=BENCH_SEED)
+
+    def run():
+        system.update(world)
+    return run
@@ -0,0 +1,32 @@
+# benchmarks/bench_match_server.py
+
+"""Бенчмарки сетевого матча (по локальной петле)."""
+
+import asyncio
+
+from pgg_game.core.match_server import run_loopback_match
+
+from .harness import benchmark
+
+SPECTATORS = 200
+TURNS = 20
+
+
+@benchmark("net.loopback_spectators", repeats=3, sizes=("tiny", "small"))
+def bench_loopback_spectators(width: int, height: int):
+    """2 игрока делают по TURNS ходов, SPECTATORS зрителей получают DIFF каждого хода."""
+    def run():
+        report = asyncio.run(run_loopback_match(2, SPECTATORS, TURNS, width=width, height=height,
+                                                slow_fraction=0.0))
+        assert report.mismatched == 0, f"Разошлось состояние у {report.mismatched} клиентов"
+    return run
+
+
+@benchmark("net.loopback_slow_spectators", repeats=3, sizes=("tiny", "small"))
+def bench_loopback_slow_spectators(width: int, height: int):
+    """То же, но 10% зрителей читают медленно: им DIFF должны сливаться (проверяет run_loopback_match)."""
+    def run():
+        report = asyncio.run(run_loopback_match(2, SPECTATORS, TURNS, width=width, height=height,
+                                                slow_fraction=0.1))
+        assert report.mismatched == 0, f"Разошлось состояние у {report.mismatched} клиентов"
+    return run
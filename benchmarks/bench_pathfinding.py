@@ -0,0 +1,75 @@
+# benchmarks/bench_pathfinding.py
+
+"""Бенчмарки поиска пути по графу провинций."""
+
+import random
+
+from pgg_game.components.player_info import PlayerInfoComponent
+from pgg_game.world.pathfinding import Pathfinder
+
+from .worlds import build_map_world
+from .harness import benchmark
+
+# Пакет запросов одного хода ИИ: BATCH_GOALS целей по BATCH_STARTS путей к каждой.
+BATCH_GOALS = 4
+BATCH_STARTS = 100
+ASTAR_QUERIES = 20
+# A* меряется на запросах "по соседству": цель не дальше стольких клеток от старта.
+ASTAR_RANGE = 30
+
+
+def _owned_world(width: int, height: int):
+    """Мир, где треть провинций случайно разобрана игроками."""
+    world = build_map_world(width, height)
+    players = sorted(world.get_entities_with_components(PlayerInfoComponent))
+    rng = random.Random(width * height)
+    provinces = world.province_graph.row_entities.tolist()
+    for entity in rng.sample(provinces, len(provinces) // 3):
+        world.province_ownership.set_owner(entity, rng.choice(players))
+    return world, players, provinces, rng
+
+
+@benchmark("path.distance_field")
+def bench_distance_field(width: int, height: int):
+    """Поле расстояний от 8 провинций с учетом владельцев (без кэша)."""
+    world, players, provinces, rng = _owned_world(width, height)
+    pathfinder = Pathfinder(world.province_graph, world.province_ownership)
+    sources = rng.sample(provinces, 8)
+
+    def run():
+        pathfinder.distance_field(sources, players[0])
+    return run
+
+
+@benchmark("path.batched_paths")
+def bench_batched_paths(width: int, height: int):
+    """BATCH_GOALS x BATCH_STARTS путей за ход ИИ через find_paths (холодный кэш)."""
+    world, players, provinces, rng = _owned_world(width, height)
+    pathfinder = Pathfinder(world.province_graph, world.province_ownership)
+    batches = [(rng.sample(provinces, BATCH_STARTS), rng.choice(provinces)) for _ in range(BATCH_GOALS)]
+
+    def run():
+        for starts, goal in batches:
+            pathfinder.find_paths(starts, goal, players[0])
+    return run
+
+
+@benchmark("path.astar")
+def bench_astar(width: int, height: int):
+    """ASTAR_QUERIES одиночных запросов A* на расстояние до ASTAR_RANGE клеток."""
+    world, players, provinces, rng = _owned_world(width, height)
+    graph = world.province_graph
+    pathfinder = Pathfinder(graph, world.province_ownership)
+    land_rows, land_cols = (graph.cell_rows >= 0).nonzero()
+    pairs = []
+    while len(pairs) < ASTAR_QUERIES:
+        start = rng.randrange(len(land_rows))
+        y = land_rows[start] + rng.randint(-ASTAR_RANGE, ASTAR_RANGE)
+        x = land_cols[start] + rng.randint(-ASTAR_RANGE, ASTAR_RANGE)
+        if 0 <= y < graph.cell_rows.shape[0] and 0 <= x < graph.cell_rows.shape[1] and graph.cell_rows[y, x] >= 0:
+            pairs.append((provinces[start], provinces[graph.cell_rows[y, x]]))
+
+    def run():
+        for start, goal in pairs:
+            pathfinder.find_path(start, goal, players[0])
+    return run
@@ -0,0 +1,138 @@
+# benchmarks/bench_render.py
+
+"""
+Бенчмарки отрисовки. Запускаются с фиктивным видеодрайвером SDL
+(SDL_VIDEODRIVER=dummy выставляется в benchmarks/__main__.py).
+"""
+
+import random
+
+import pygame
+
+from pgg_game.systems.render_system import RenderSystem
+from pgg_game.components.province_info import ProvinceInfoComponent
+from pgg_game.components.player_info import PlayerInfoComponent
+from pgg_game.components.transform import TransformComponent
+from pgg_game.components.renderable import RenderableComponent, ShapeType
+from pgg_game.config import SCREEN_WIDTH, SCREEN_HEIGHT, TILE_SIZE
+
+from .harness import benchmark
+from .worlds import build_map_world
+
+FRAMES = 100
+DIRTY_TILES = 100
+# Динамичные сущности (юниты) поверх карты: слои 2 и 3, круги и прямоугольники.
+UNITS = 2000
+# Масштаб стратегического обзора и смен владельцев за кадр в render.frame_overview.
+OVERVIEW_ZOOM = 0.25
+OVERVIEW_CAPTURES = 10
+
+
+def _prepare(width: int, height: int):
+    if not pygame.display.get_init():
+        pygame.display.init()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    world = build_map_world(width, height)
+    render_system = RenderSystem(screen)
+    # Первый кадр строит кэш карты.
+    render_system.update(world)
+    return world, render_system
+
+
+@benchmark("render.frame_unchanged")
+def bench_frame_unchanged(width: int, height: int):
+    """FRAMES кадров без изменений на карте."""
+    world, render_system = _prepare(width, height)
+
+    def run():
+        for _ in range(FRAMES):
+            render_system.update(world)
+    return run
+
+
+@benchmark("render.frame_dirty_tiles")
+def bench_frame_dirty_tiles(width: int, height: int):
+    """Кадр, в котором DIRTY_TILES провинций помечены измененными."""
+    world, render_system = _prepare(width, height)
+    provinces = sorted(world.get_entities_with_components(ProvinceInfoComponent))[:DIRTY_TILES]
+
+    def run():
+        for entity in provinces:
+            render_system.mark_dirty(entity)
+        render_system.update(world)
+    return run
+
+
+@benchmark("render.frame_camera_pan")
+def bench_frame_camera_pan(width: int, height: int):
+    """FRAMES кадров с прокруткой камеры: сдвиг кэша и дорисовка полос."""
+    world, render_system = _prepare(width, height)
+    camera = render_system.camera
+    # Камера без границ: прокрутка работает и на картах меньше экрана.
+    camera.world_size = None
+
+    def run():
+        for frame in range(FRAMES):
+            # Вперед-назад, чтобы камера не уходила с карты.
+            step = 8 if frame % 40 < 20 else -8
+            camera.move(step, step // 2)
+            render_system.update(world)
+    return run
+
+
+@benchmark("render.frame_full_rebuild", repeats=3)
+def bench_frame_full_rebuild(width: int, height: int):
+    """Кадр с полной перерисовкой карты (худший случай)."""
+    world, render_system = _prepare(width, height)
+
+    def run():
+        render_system.invalidate()
+        render_system.update(world)
+    return run
+
+
+@benchmark("render.frame_units")
+def bench_frame_units(width: int, height: int):
+    """FRAMES кадров с UNITS юнитами разных слоев и форм (карта не меняется)."""
+    world, render_system = _prepare(width, height)
+    rng = random.Random(UNITS)
+    units = world.create_entities(UNITS)
+    map_width, map_height = width * TILE_SIZE, height * TILE_SIZE
+    world.add_components(TransformComponent, units, [
+        TransformComponent(rng.randrange(max(map_width, SCREEN_WIDTH)), rng.randrange(max(map_height, SCREEN_HEIGHT)), 16, 16)
+        for _ in units
+    ])
+    world.add_components(RenderableComponent, units, [
+        RenderableComponent(pygame.Color(200, 60, 60), rng.choice((ShapeType.RECTANGLE, ShapeType.CIRCLE)), rng.choice((2, 3)))
+        for _ in units
+    ])
+
+    def run():
+        for _ in range(FRAMES):
+            render_system.update(world)
+    return run
+
+
+@benchmark("render.frame_overview")
+def bench_frame_overview(width: int, height: int):
+    """
+    FRAMES кадров в масштабе OVERVIEW_ZOOM с миникартой, на каждом —
+    OVERVIEW_CAPTURES смен владельца. Время не должно зависеть от размера карты.
+    """
+    world, render_system = _prepare(width, height)
+    camera = render_system.camera
+    camera.min_zoom = OVERVIEW_ZOOM
+    camera.set_zoom(OVERVIEW_ZOOM)
+    render_system.show_minimap = True
+    render_system.update(world)
+    ownership = world.province_ownership
+    players = sorted(world.get_entities_with_components(PlayerInfoComponent))
+    provinces = world.province_graph.row_entities.tolist()
+    rng = random.Random(OVERVIEW_CAPTURES)
+
+    def run():
+        for _ in range(FRAMES):
+            for _ in range(OVERVIEW_CAPTURES):
+                ownership.set_owner(rng.choice(provinces), rng.choice(players))
+            render_system.update(world)
+    return run
@@ -0,0 +1,57 @@
+# benchmarks/bench_territory.py
+
+"""Бенчмарки территорий (TerritoryMap): захваты, разрывы, контуры."""
+
+from pgg_game.components.player_info import PlayerInfoComponent
+
+from .harness import benchmark
+from .worlds import build_map_world
+
+# Сколько провинций захватывается в territory.captures (первые по порядку строк графа).
+CAPTURES = 20000
+
+
+def _players(world):
+    return sorted(world.get_entities_with_components(PlayerInfoComponent))
+
+
+@benchmark("territory.captures")
+def bench_captures(width: int, height: int):
+    """CAPTURES провинций по очереди захватываются игроками (строка за строкой), затем освобождаются."""
+    world = build_map_world(width, height)
+    players = _players(world)
+    ownership = world.province_ownership
+    provinces = world.province_graph.row_entities[:CAPTURES].tolist()
+    # Игрок меняется каждые 7 провинций: территории то сливаются, то нет.
+    owners = [players[(index // 7) % len(players)] for index in range(len(provinces))]
+
+    def run():
+        for entity, owner in zip(provinces, owners):
+            ownership.set_owner(entity, owner)
+        for entity in provinces:
+            ownership.set_owner(entity, None)
+    return run
+
+
+# Разрыв карты пополам — обход половины карты, на больших размерах это секунды.
+@benchmark("territory.split_and_trace", sizes=('tiny', 'small'))
+def bench_split_and_trace(width: int, height: int):
+    """Один игрок владеет всей картой; средний ряд отдается другому (разрыв), контуры пересчитываются."""
+    world = build_map_world(width, height)
+    players = _players(world)
+    ownership = world.province_ownership
+    territories = world.province_territories
+    graph = world.province_graph
+    for entity in graph.row_entities.tolist():
+        ownership.set_owner(entity, players[0])
+    middle = graph.cell_rows[graph.cell_rows.shape[0] // 2]
+    cut = graph.row_entities[middle[middle >= 0]].tolist()
+
+    def run():
+        for entity in cut:
+            ownership.set_owner(entity, players[1])
+        for region in territories.regions():
+            territories.border_polylines(region)
+        for entity in cut:
+            ownership.set_owner(entity, players[0])
+    return run
@@ -0,0 +1,46 @@
+# benchmarks/bench_turns.py
+
+"""Бенчмарки смены ходов."""
+
+from pgg_game.systems.turn_system import TurnSystem
+
+from .harness import benchmark
+from .worlds import build_map_world
+
+TURNS = 10000
+CAPTURES = 1000
+
+
+@benchmark("turns.end_turn")
+def bench_end_turn(width: int, height: int):
+    """TURNS вызовов TurnSystem.end_turn на сгенерированной карте с 4 игроками."""
+    world = build_map_world(width, height)
+    turn_system = TurnSystem()
+    turn_system.verbose = False
+    turn_system.update(world)
+
+    def run():
+        for _ in range(TURNS):
+            turn_system.end_turn(world)
+    return run
+
+
+@benchmark("turns.captures_with_income")
+def bench_captures_with_income(width: int, height: int):
+    """CAPTURES смен владельца (суммы экономики поправляются на ходу) и TURNS смен хода с доходом."""
+    world = build_map_world(width, height)
+    turn_system = TurnSystem()
+    turn_system.verbose = False
+    turn_system.update(world)
+    players = turn_system.players
+    provinces = world.province_graph.row_entities.tolist()[:CAPTURES]
+    ownership = world.province_ownership
+
+    def run():
+        for index, entity in enumerate(provinces):
+            ownership.set_owner(entity, players[index % len(players)])
+        for _ in range(TURNS):
+            turn_system.end_turn(world)
+        for entity in provinces:
+            ownership.set_owner(entity, None)
+    return run
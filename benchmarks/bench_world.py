@@ -0,0 +1,122 @@
+# benchmarks/bench_world.py
+
+"""Бенчмарки базовых операций GameWorld."""
+
+import random
+
+from pgg_game.world.game_world import GameWorld
+from pgg_game.components.transform import TransformComponent
+from pgg_game.components.renderable import RenderableComponent, ShapeType
+from pgg_game.components.province_info import ProvinceInfoComponent
+from pgg_game.config import COLORS, TILE_SIZE
+
+from .harness import benchmark
+from .worlds import build_map_world
+
+QUERY_CALLS = 1000
+
+
+@benchmark("world.create_entities")
+def bench_create_entities(width: int, height: int):
+    """Создание провинций по одной: create_entity + три add_component на клетку."""
+    world = GameWorld()
+    color = COLORS['province_neutral']
+
+    def run():
+        for y in range(height):
+            for x in range(width):
+                entity = world.create_entity()
+                world.add_component(entity, TransformComponent(x * TILE_SIZE, y * TILE_SIZE, TILE_SIZE, TILE_SIZE))
+                world.add_component(entity, RenderableComponent(color, ShapeType.RECTANGLE, 1))
+                world.add_component(entity, ProvinceInfoComponent(name=f"P-{x}-{y}"))
+    return run
+
+
+@benchmark("world.query_cold")
+def bench_query_cold(width: int, height: int):
+    """Первый запрос (Transform, Renderable) — построение представления с нуля."""
+    world = build_map_world(width, height)
+
+    def run():
+        world.get_entities_with_components(TransformComponent, RenderableComponent, ProvinceInfoComponent)
+    return run
+
+
+@benchmark("world.query_warm")
+def bench_query_warm(width: int, height: int):
+    """Повторные запросы без изменений мира (QUERY_CALLS вызовов)."""
+    world = build_map_world(width, height)
+    world.get_entities_with_components(TransformComponent, RenderableComponent)
+
+    def run():
+        for _ in range(QUERY_CALLS):
+            world.get_entities_with_components(TransformComponent, RenderableComponent)
+    return run
+
+
+@benchmark("world.delete_entity")
+def bench_delete_entity(width: int, height: int):
+    """Удаление 10% провинций по одной."""
+    world = build_map_world(width, height)
+    # Зарегистрированные запросы тоже нужно обновлять при удалении.
+    world.get_entities_with_components(TransformComponent, RenderableComponent)
+    provinces = sorted(world.get_entities_with_components(ProvinceInfoComponent))
+    victims = random.Random(0).sample(provinces, len(provinces) // 10)
+
+    def run():
+        for entity in victims:
+            world.delete_entity(entity)
+    return run
+
+
+@benchmark("world.delete_entities")
+def bench_delete_entities(width: int, height: int):
+    """Удаление тех же 10% провинций одним вызовом delete_entities."""
+    world = build_map_world(width, height)
+    world.get_entities_with_components(TransformComponent, RenderableComponent)
+    provinces = sorted(world.get_entities_with_components(ProvinceInfoComponent))
+    victims = random.Random(0).sample(provinces, len(provinces) // 10)
+
+    def run():
+        world.delete_entities(victims)
+    return run
+
+
+@benchmark("world.recycle_entities")
+def bench_recycle_entities(width: int, height: int):
+    """Удаление 10% провинций и создание стольких же сущностей в освободившихся слотах."""
+    world = build_map_world(width, height)
+    provinces = sorted(world.get_entities_with_components(ProvinceInfoComponent))
+    victims = random.Random(0).sample(provinces, len(provinces) // 10)
+    color = COLORS['province_neutral']
+
+    def run():
+        world.delete_entities(victims)
+        for _ in victims:
+            entity = world.create_entity()
+            world.add_component(entity, RenderableComponent(color, ShapeType.RECTANGLE, 1))
+    return run
+
+
+@benchmark("world.create_entities_batch")
+def bench_create_entities_batch(width: int, height: int):
+    """Те же провинции, но через create_entities и add_component_columns."""
+    world = GameWorld()
+    color = COLORS['province_neutral']
+    cells = [(x, y) for y in range(height) for x in range(width)]
+
+    def run():
+        entities = world.create_entities(len(cells))
+        world.add_component_columns(TransformComponent, entities, {
+            'x': [x * TILE_SIZE for x, _ in cells],
+            'y': [y * TILE_SIZE for _, y in cells],
+            'width': TILE_SIZE,
+            'height': TILE_SIZE,
+        })
+        world.add_component_columns(RenderableComponent, entities, {
+            'color': color, 'shape': ShapeType.RECTANGLE, 'layer': 1,
+        })
+        world.add_component_columns(ProvinceInfoComponent, entities, {
+            'name': [f"P-{x}-{y}" for x, y in cells],
+        })
+    return run
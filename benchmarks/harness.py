@@ -0,0 +1,140 @@
+# benchmarks/harness.py
+
+"""
+Минимальный каркас бенчмарков: реестр, замер времени, JSON-отчет и сравнение
+с сохраненной базовой линией.
+"""
+
+import contextlib
+import io
+import json
+import platform
+import statistics
+import sys
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Tuple
+
+# Размеры сетки, на которых гоняются бенчмарки: имя -> (ширина, высота) в клетках.
+GRID_SIZES: Dict[str, Tuple[int, int]] = {
+    'tiny': (40, 22),       # текущая карта игры
+    'small': (200, 200),
+    'medium': (1000, 1000),
+    'large': (2000, 2000),
+}
+DEFAULT_SIZES = ('tiny', 'small')
+
+
+@dataclass
+class Benchmark:
+    """
+    Один бенчмарк.
+
+    factory(width, height) выполняет подготовку (ее время не учитывается)
+    и возвращает функцию без аргументов, время работы которой и замеряется.
+    Фабрика вызывается заново перед каждым повтором, поэтому бенчмарки,
+    "расходующие" состояние (например, удаление сущностей), честно повторяются.
+    """
+    name: str
+    factory: Callable[[int, int], Callable[[], None]]
+    repeats: int
+    sizes: Tuple[str, ...]
+
+
+# Реестр всех бенчмарков (заполняется декоратором benchmark при импорте модулей).
+BENCHMARKS: List[Benchmark] = []
+
+
+def benchmark(name: str, repeats: int = 5, sizes: Tuple[str, ...] = tuple(GRID_SIZES)):
+    """Декоратор, регистрирующий фабрику бенчмарка."""
+    def register(factory):
+        BENCHMARKS.append(Benchmark(name, factory, repeats, sizes))
+        return factory
+    return register
+
+
+def run_benchmarks(size_names: List[str], name_filter: str = "", log=print) -> Dict[str, dict]:
+    """
+    Запускает все подходящие бенчмарки на заданных размерах.
+
+    :return: { "имя[размер]": {"min": c, "median": c, "repeats": n, ...} }
+    """
+    results = {}
+    for bench in BENCHMARKS:
+        if name_filter and name_filter not in bench.name:
+            continue
+        for size_name in size_names:
+            if size_name not in bench.sizes:
+                continue
+            width, height = GRID_SIZES[size_name]
+            # На больших размерах один прогон может занимать секунды.
+            repeats = bench.repeats if width * height <= 200 * 200 else max(1, bench.repeats // 5)
+
+            timings = []
+            for _ in range(repeats):
+                # Системы игры пишут в консоль (генерация карты и т.д.) — в отчете это лишнее.
+                with contextlib.redirect_stdout(io.StringIO()):
+                    timed = bench.factory(width, height)
+                    start = time.perf_counter()
+                    timed()
+                    timings.append(time.perf_counter() - start)
+
+            key = f"{bench.name}[{size_name}]"
+            results[key] = {
+                'min': min(timings),
+                'median': statistics.median(timings),
+                'repeats': repeats,
+                'grid': [width, height],
+            }
+            log(f"{key:<45} median {results[key]['median'] * 1000:10.3f} мс  (min {results[key]['min'] * 1000:.3f} мс, n={repeats})")
+    return results
+
+
+def collect_metadata() -> dict:
+    """Информация об окружении, чтобы результаты разных машин не путались."""
+    import numpy
+    import pygame
+    return {
+        'python': sys.version.split()[0],
+        'numpy': numpy.__version__,
+        'pygame': pygame.version.ver,
+        'platform': platform.platform(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+
+def save_results(path: str, results: Dict[str, dict]):
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump({'meta': collect_metadata(), 'results': results}, file, indent=2, ensure_ascii=False)
+
+
+def load_results(path: str) -> Dict[str, dict]:
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)['results']
+
+
+def compare_results(baseline: Dict[str, dict], current: Dict[str, dict], threshold: float, log=print) -> List[str]:
+    """
+    Сравнивает медианы с базовой линией.
+
+    :param threshold: Допустимое относительное замедление (0.1 = 10%).
+    :return: Список имен бенчмарков, которые замедлились сильнее порога.
+    """
+    regressions = []
+    for key in sorted(current):
+        if key not in baseline:
+            log(f"{key:<45} новый бенчмарк")
+            continue
+        before = baseline[key]['median']
+        after = current[key]['median']
+        ratio = after / before if before > 0 else float('inf')
+        status = "ok"
+        if ratio > 1 + threshold:
+            status = "РЕГРЕССИЯ"
+            regressions.append(key)
+        elif ratio < 1 - threshold:
+            status = "ускорение"
+        log(f"{key:<45} {before * 1000:10.3f} -> {after * 1000:10.3f} мс  x{ratio:5.2f}  {status}")
+    for key in sorted(set(baseline) - set(current)):
+        log(f"{key:<45} отсутствует в текущих результатах")
+    return regressions
@@ -0,0 +1,19 @@
+# benchmarks/worlds.py
+
+"""Общие заготовки миров для бенчмарков."""
+
+from pgg_game.world.game_world import GameWorld
+from pgg_game.systems.map_generator_system import MapGenerationSystem
+from pgg_game.core.headless import create_players
+from pgg_game.config import TILE_SIZE
+
+# Фиксированный seed: все бенчмарки работают с одной и той же картой.
+BENCH_SEED = 12345
+
+
+def build_map_world(width: int, height: int, players: int = 4) -> GameWorld:
+    """Создает мир с игроками и полностью сгенерированной картой заданного размера."""
+    world = GameWorld()
+    create_players(world, players)
+    MapGenerationSystem(width, height, TILE_SIZE, seed=BENCH_SEED).update(world)
+    return world
@@ -1,7 +1,7 @@
 # src/pgg_game/components/province_info.py
 
 from dataclasses import dataclass, field
-from typing import Dict, Set, Optional
+from typing import Dict, Collection, Optional
 
 @dataclass
 class ProvinceInfoComponent:
@@ -21,7 +21,8 @@ class ProvinceInfoComponent:
     # Словарь с ресурсами. Легко расширять, добавляя новые типы ресурсов.
     resources: Dict[str, int] = field(default_factory=dict)
 
-    # Множество ID сущностей-провинций, которые являются соседями.
-    # Использование set гарантирует отсутствие дубликатов и быстрые проверки.
-    neighbors: Set[int] = field(default_factory=set)
+    # ID сущностей-провинций, которые являются соседями.
+    # Заполняется генератором карты: это read-only представление (NeighborsView)
+    # строки общего графа соседства world.province_graph, а не отдельный set.
+    neighbors: Collection[int] = ()
 
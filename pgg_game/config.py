@@ -1,5 +1,7 @@
 # src/pgg_game/config.py
 
+import os
+
 import pygame
 
 # --- Основные настройки экрана и производительности ---
@@ -8,6 +10,10 @@ SCREEN_HEIGHT = 720
 FPS = 60
 WINDOW_TITLE = "Procedural Generation Strategy Game"
 
+# --- Планировщик систем ---
+SCHEDULER_WORKERS = 2               # Потоков для параллельных систем (0 — все по очереди)
+LOADING_REDRAW_INTERVAL = 1 / 30    # Как часто перерисовывать экран загрузки, секунд
+
 # --- Настройки игровой сетки и мира ---
 TILE_SIZE = 32  # Размер одной клетки в пикселях
 
@@ -15,6 +21,56 @@ TILE_SIZE = 32  # Размер одной клетки в пикселях
 GRID_WIDTH = SCREEN_WIDTH // TILE_SIZE
 GRID_HEIGHT = SCREEN_HEIGHT // TILE_SIZE
 
+# Связность провинций: 4 — соседи только по сторонам, 8 — еще и по диагонали.
+PROVINCE_CONNECTIVITY = 4
+# Сколько секунд за кадр фоновая генерация тратит на создание сущностей карты.
+MAP_COMMIT_BUDGET = 0.008
+
+# --- Потоковая (чанковая) карта ---
+# Если True, Engine создает карту WORLD_GRID_WIDTH x WORLD_GRID_HEIGHT, которая
+# генерируется чанками по мере движения камеры (стрелки или WASD).
+CHUNKED_WORLD = False
+WORLD_GRID_WIDTH = 16384
+WORLD_GRID_HEIGHT = 16384
+CHUNK_SIZE = 16                 # Сторона чанка в клетках
+CHUNK_CACHE_SIZE = 128          # Сколько чанков держать в памяти (LRU)
+CHUNK_PRELOAD_MARGIN = 1        # Сколько чанков вокруг экрана подгружать заранее
+CHUNK_PRELOADS_PER_FRAME = 2    # Не больше стольких фоновых подгрузок за кадр
+CAMERA_SPEED = 900              # Скорость прокрутки камеры, пикселей в секунду
+TERRITORY_BORDER_WIDTH = 2      # Толщина контура территорий игроков, пикселей
+ZOOM_STEP = 2.0                 # Во сколько раз меняется масштаб за щелчок колеса мыши
+MINIMAP_SIZE = 240              # Длинная сторона миникарты, пикселей
+MINIMAP_MARGIN = 10             # Отступ миникарты от угла экрана
+
+# --- Настройки ИИ ---
+AI_TIME_BUDGET = 0.5        # Сколько секунд ИИ может думать над ходом
+AI_MAX_WORKERS = 2          # Процессов в пуле расчета ходов ИИ (0 — считать синхронно)
+AI_CAPTURES_PER_TURN = 1    # Сколько провинций ИИ захватывает за ход
+
+# --- Экономика ---
+# Золота за единицу ресурса провинций игрока в начале каждого глобального хода
+# (ресурсы, которых нет в словаре, дохода не приносят).
+RESOURCE_INCOME = {'gold': 1}
+
+# --- Поиск пути ---
+PATH_CACHE_SIZE = 256       # Сколько полей расстояний и путей держать в кэше Pathfinder
+
+# --- Журнал команд и реплей ---
+REPLAY_CHECKPOINT_EVERY = 50    # Раз во сколько глобальных ходов реплей сохраняет снимок для seek
+
+# --- Сетевой матч ---
+MATCH_PORT = 8765               # Порт сервера матча по умолчанию
+MATCH_SLOW_READ_DELAY = 0.05    # Пауза после каждого DIFF у "медленных" зрителей нагрузочного теста, с
+MATCH_SLOW_RECEIVE_BUFFER = 1024  # Буфер приема "медленных" зрителей нагрузочного теста, байт
+
+# --- Шрифты ---
+FONT_NAME = "Arial"
+# Где хранить найденные пути к системным шрифтам между запусками (см. FontPathCache).
+FONT_CACHE_PATH = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"),
+                               "pgg_game", "fonts.json")
+# Печатать ли отчет о времени запуска после первого кадра.
+STARTUP_REPORT = True
+
 # --- Цвета ---
 # Использование словаря для цветов делает код более читаемым и организованным.
 COLORS = {
@@ -31,5 +87,6 @@ COLORS = {
     
     # Цвета для провинций
     'province_neutral': pygame.Color("#778da9"), # Серый для нейтральных
+    'territory_border': pygame.Color("#0b132b"), # Контур связных территорий игроков
 }
 
@@ -0,0 +1,94 @@
+# src/pgg_game/core/camera.py
+
+from typing import Tuple
+
+# Прямоугольник в пикселях мира: (x, y, width, height)
+Rect = Tuple[int, int, int, int]
+
+
+class Camera:
+    """
+    Камера (видовое окно) над миром.
+
+    Хранит положение левого верхнего угла экрана в пикселях мира. Системы
+    отрисовки рисуют только то, что попадает в rect, а ввод переводит координаты
+    мыши из экранных в мировые через screen_to_world.
+
+    Координаты камеры целые: так кэш карты можно сдвигать на целое число пикселей
+    без пересчета всего изображения (см. RenderSystem).
+
+    zoom — масштаб: сколько пикселей экрана на пиксель мира. При zoom < 1
+    (стратегический обзор) камера видит больше мира, и RenderSystem рисует
+    карту упрощенно (см. MapOverview).
+    """
+    def __init__(self, width: int, height: int, world_size: Tuple[int, int] | None = None):
+        """
+        :param width: Ширина видового окна (обычно ширина экрана) в пикселях.
+        :param height: Высота видового окна в пикселях.
+        :param world_size: Размер мира в пикселях (ширина, высота). Камера не выходит
+            за его границы. None — мир без границ.
+        """
+        self.width = width
+        self.height = height
+        self.world_size = world_size
+        self.x = 0
+        self.y = 0
+        self.zoom = 1.0
+        # Наименьший допустимый масштаб; 1.0 — отдаление выключено.
+        self.min_zoom = 1.0
+
+    @property
+    def view_width(self) -> int:
+        """Ширина видимой области в пикселях мира."""
+        return int(self.width / self.zoom)
+
+    @property
+    def view_height(self) -> int:
+        return int(self.height / self.zoom)
+
+    @property
+    def rect(self) -> Rect:
+        """Видимая область мира."""
+        return self.x, self.y, self.view_width, self.view_height
+
+    def set_zoom(self, zoom: float, anchor: Tuple[float, float] | None = None):
+        """
+        Меняет масштаб (в пределах min_zoom..1), не сдвигая точку экрана anchor
+        (по умолчанию — центр экрана).
+        """
+        zoom = max(self.min_zoom, min(1.0, zoom))
+        if anchor is None:
+            anchor = (self.width / 2, self.height / 2)
+        world_x, world_y = self.screen_to_world(*anchor)
+        self.zoom = zoom
+        self.set_position(world_x - anchor[0] / zoom, world_y - anchor[1] / zoom)
+
+    def fit_zoom(self) -> float:
+        """Масштаб, при котором весь мир помещается на экран (1.0, если мир без границ или меньше экрана)."""
+        if self.world_size is None:
+            return 1.0
+        world_width, world_height = self.world_size
+        return min(1.0, self.width / max(world_width, 1), self.height / max(world_height, 1))
+
+    def move(self, dx: float, dy: float):
+        """Сдвигает камеру на (dx, dy) пикселей мира."""
+        self.set_position(self.x + dx, self.y + dy)
+
+    def center_on(self, x: float, y: float):
+        """Ставит камеру так, чтобы точка мира (x, y) оказалась в центре экрана."""
+        self.set_position(x - self.view_width / 2, y - self.view_height / 2)
+
+    def set_position(self, x: float, y: float):
+        x, y = int(round(x)), int(round(y))
+        if self.world_size is not None:
+            world_width, world_height = self.world_size
+            # Если мир меньше экрана, камера остается в нуле.
+            x = max(0, min(x, world_width - self.view_width))
+            y = max(0, min(y, world_height - self.view_height))
+        self.x, self.y = x, y
+
+    def world_to_screen(self, x: float, y: float) -> Tuple[float, float]:
+        return (x - self.x) * self.zoom, (y - self.y) * self.zoom
+
+    def screen_to_world(self, x: float, y: float) -> Tuple[float, float]:
+        return x / self.zoom + self.x, y / self.zoom + self.y
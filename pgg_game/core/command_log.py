@@ -0,0 +1,168 @@
+# src/pgg_game/core/command_log.py
+
+"""
+Журнал команд партии: все принятые команды по порядку плюс все, что нужно,
+чтобы заново построить стартовый мир (seed и размер карты, игроки).
+
+Формат файла:
+
+    [MAGIC 8 байт] [длина заголовка, uint32] [заголовок JSON] [запись] [запись] ...
+
+Запись — код команды (uint8) и ее целые поля (player_id и остальные) как int64
+little-endian. Файл только дописывается, поэтому журнал, оборванный на
+середине (например, при падении игры), читается до последней целой записи.
+"""
+
+import dataclasses
+import json
+import struct
+from typing import Any, Dict, List, Tuple, Type
+
+from ..world.game_world import GameWorld
+from ..components.player_info import PlayerInfoComponent
+from ..components.player_input import PlayerInputComponent
+from .commands import Command, EndTurnCommand, CaptureProvinceCommand, ChangeGoldCommand
+
+MAGIC = b"PGGCLOG1"
+FORMAT_VERSION = 1
+_HEADER_LENGTH = struct.Struct('<I')
+_CODE = struct.Struct('<B')
+
+# Коды команд в журнале. Коды не меняются: старые журналы должны читаться.
+COMMAND_CODES: Dict[Type[Command], int] = {
+    EndTurnCommand: 1,
+    CaptureProvinceCommand: 2,
+    ChangeGoldCommand: 3,
+}
+_COMMAND_TYPES = {code: command_type for command_type, code in COMMAND_CODES.items()}
+# Для каждого типа — упаковка всех его полей как int64.
+_RECORD_FORMATS = {
+    command_type: struct.Struct('<' + 'q' * len(dataclasses.fields(command_type)))
+    for command_type in COMMAND_CODES
+}
+
+
+class CommandLogError(Exception):
+    """Файл не является журналом команд или несовместим с этой версией."""
+
+
+def encode_command(command: Command) -> bytes:
+    """Запись команды: код и поля (тот же формат передает сетевой протокол матча)."""
+    command_type = type(command)
+    code = COMMAND_CODES.get(command_type)
+    if code is None:
+        raise CommandLogError(f"Команда {command_type.__name__} не поддерживается журналом")
+    return _CODE.pack(code) + _RECORD_FORMATS[command_type].pack(*dataclasses.astuple(command))
+
+
+def decode_command(data: bytes, offset: int = 0) -> Tuple[Command | None, int]:
+    """
+    Читает запись команды, начиная с offset.
+
+    :return: (команда, смещение после записи) или (None, offset), если запись оборвана.
+    """
+    (code,) = _CODE.unpack_from(data, offset)
+    command_type = _COMMAND_TYPES.get(code)
+    if command_type is None:
+        raise CommandLogError(f"Неизвестный код команды {code} (смещение {offset})")
+    record = _RECORD_FORMATS[command_type]
+    end = offset + _CODE.size + record.size
+    if end > len(data):
+        return None, offset
+    return command_type(*record.unpack_from(data, offset + _CODE.size)), end
+
+
+def describe_players(world: GameWorld) -> List[Dict[str, Any]]:
+    """Описание игроков мира для заголовка журнала (в порядке их ID)."""
+    players = []
+    for entity in sorted(world.get_entities_with_components(PlayerInfoComponent)):
+        info = world.get_component(entity, PlayerInfoComponent)
+        players.append({
+            'id': entity,
+            'name': info.name,
+            'color': list(info.color),
+            'turn_order': info.turn_order,
+            'gold': info.gold,
+            'human': world.get_component(entity, PlayerInputComponent) is not None,
+        })
+    return players
+
+
+def describe_match(world: GameWorld, generator, entity_state: Tuple[list, list]) -> Dict[str, Any]:
+    """
+    Заголовок партии: все, чтобы повторить стартовый мир (см. replay.build_initial_world).
+
+    :param generator: MapGenerationSystem, построившая карту.
+    :param entity_state: world.get_entity_state() до генерации карты.
+    """
+    generations, free = entity_state
+    return {
+        'map': {
+            'seed': generator.seed,
+            'width': generator.width,
+            'height': generator.height,
+            'tile_size': generator.tile_size,
+            'connectivity': generator.connectivity,
+        },
+        'players': describe_players(world),
+        'entities': {'generations': generations, 'free': free},
+    }
+
+
+class CommandLog:
+    """
+    Запись журнала. Команды копятся в буфере файла и сбрасываются на диск
+    в конце каждого хода (EndTurnCommand) и при close.
+    """
+    def __init__(self, path: str, header: Dict[str, Any]):
+        """
+        :param header: JSON-заголовок: как минимум 'map' (seed, width, height,
+            connectivity) и 'players' (см. describe_players).
+        """
+        self.path = path
+        self.header = dict(header, format_version=FORMAT_VERSION)
+        self.commands_written = 0
+        self._file = open(path, 'wb')
+        encoded = json.dumps(self.header, ensure_ascii=False).encode('utf-8')
+        self._file.write(MAGIC + _HEADER_LENGTH.pack(len(encoded)) + encoded)
+        self._file.flush()
+
+    def append(self, command: Command):
+        self._file.write(encode_command(command))
+        self.commands_written += 1
+        if type(command) is EndTurnCommand:
+            self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+
+def read_command_log(path: str) -> Tuple[Dict[str, Any], List[Command]]:
+    """
+    Читает журнал целиком.
+
+    :return: (заголовок, команды по порядку).
+    """
+    with open(path, 'rb') as file:
+        data = file.read()
+    if data[:len(MAGIC)] != MAGIC:
+        raise CommandLogError(f"{path}: не журнал команд")
+    offset = len(MAGIC)
+    (header_length,) = _HEADER_LENGTH.unpack_from(data, offset)
+    offset += _HEADER_LENGTH.size
+    header = json.loads(data[offset:offset + header_length].decode('utf-8'))
+    offset += header_length
+    if header.get('format_version') != FORMAT_VERSION:
+        raise CommandLogError(f"{path}: неподдерживаемая версия журнала {header.get('format_version')}")
+
+    commands: List[Command] = []
+    while offset < len(data):
+        try:
+            command, offset = decode_command(data, offset)
+        except CommandLogError as error:
+            raise CommandLogError(f"{path}: {error}") from None
+        if command is None:
+            break   # Оборванная последняя запись
+        commands.append(command)
+    return header, commands
@@ -0,0 +1,95 @@
+# src/pgg_game/core/commands.py
+
+"""
+Команды — единственный способ менять состояние игры извне систем.
+
+Команда — маленький неизменяемый dataclass, который можно передать между
+процессами (ИИ считает ходы в пуле процессов) и применить на главном потоке.
+apply() возвращает ID сущностей, чей внешний вид изменился. Кроме того,
+изменения Renderable команда сообщает миру (world.notify_changed) — по этому
+событию RenderSystem точечно обновляет кэш отрисовки.
+
+Применять команды нужно через TurnSystem.execute: так каждая примененная
+команда попадает в журнал (CommandLog), по которому партию можно воспроизвести.
+Все поля команды после player_id — целые числа (см. формат журнала).
+"""
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, List
+
+from ..world.game_world import GameWorld, Entity
+from ..components.player_info import PlayerInfoComponent
+from ..components.province_info import ProvinceInfoComponent
+from ..components.renderable import RenderableComponent
+
+if TYPE_CHECKING:
+    from ..systems.turn_system import TurnSystem
+
+
+class CommandError(Exception):
+    """Команда не может быть применена к текущему состоянию мира."""
+
+
+@dataclass(frozen=True)
+class Command(ABC):
+    """Базовый класс команд. player_id — игрок, от имени которого выполняется команда."""
+    player_id: Entity
+
+    @abstractmethod
+    def apply(self, world: GameWorld, turn_system: 'TurnSystem') -> List[Entity]:
+        """Применяет команду. :raises CommandError: Команда недопустима."""
+
+
+@dataclass(frozen=True)
+class EndTurnCommand(Command):
+    """Завершить ход текущего игрока."""
+
+    def apply(self, world: GameWorld, turn_system: 'TurnSystem') -> List[Entity]:
+        if turn_system.get_current_player_id() != self.player_id:
+            raise CommandError(f"Игрок {self.player_id} пытается завершить чужой ход")
+        turn_system.end_turn(world)
+        return []
+
+
+@dataclass(frozen=True)
+class CaptureProvinceCommand(Command):
+    """Захватить нейтральную провинцию."""
+    province_id: Entity
+
+    def apply(self, world: GameWorld, turn_system: 'TurnSystem') -> List[Entity]:
+        if turn_system.get_current_player_id() != self.player_id:
+            raise CommandError(f"Игрок {self.player_id} ходит не в свою очередь")
+        province_info = world.get_component(self.province_id, ProvinceInfoComponent)
+        if province_info is None:
+            raise CommandError(f"Сущность {self.province_id} не является провинцией")
+        if province_info.owner_id is not None:
+            raise CommandError(f"Провинция {province_info.name} уже принадлежит игроку {province_info.owner_id}")
+
+        province_info.owner_id = self.player_id
+        if world.province_ownership is not None:
+            world.province_ownership.set_owner(self.province_id, self.player_id)
+        renderable = world.get_component(self.province_id, RenderableComponent)
+        player_info = world.get_component(self.player_id, PlayerInfoComponent)
+        if renderable is not None and player_info is not None:
+            renderable.color = player_info.color
+            world.notify_changed(self.province_id, RenderableComponent)
+        return [self.province_id]
+
+
+@dataclass(frozen=True)
+class ChangeGoldCommand(Command):
+    """
+    Изменить золото игрока на amount (расходы, награды). Не зависит от очереди хода.
+    Доход с провинций сюда не относится: его начисляет TurnSystem при смене хода.
+    """
+    amount: int
+
+    def apply(self, world: GameWorld, turn_system: 'TurnSystem') -> List[Entity]:
+        player_info = world.get_component(self.player_id, PlayerInfoComponent)
+        if player_info is None:
+            raise CommandError(f"Сущность {self.player_id} не является игроком")
+        if player_info.gold + self.amount < 0:
+            raise CommandError(f"У игрока {player_info.name} недостаточно золота ({player_info.gold})")
+        player_info.gold += self.amount
+        return []
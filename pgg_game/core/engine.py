@@ -1,85 +1,367 @@
 # src/pgg_game/core/engine.py
 
+# Первым: момент импорта startup — начало отсчета времени запуска.
+from .startup import StartupReport
+import gc
+import time
 import pygame
+from dataclasses import dataclass
 from enum import Enum, auto
 
 from ..world.game_world import GameWorld
+from .profiler import FrameProfiler
+from .scheduler import SystemScheduler
+from .camera import Camera
+from .commands import EndTurnCommand
+from .command_log import CommandLog, describe_match
 from ..config import SCREEN_WIDTH, SCREEN_HEIGHT, FPS, WINDOW_TITLE, GRID_WIDTH, GRID_HEIGHT, TILE_SIZE, COLORS
+from ..config import CHUNKED_WORLD, WORLD_GRID_WIDTH, WORLD_GRID_HEIGHT, LOADING_REDRAW_INTERVAL, STARTUP_REPORT
+from ..components.transform import TransformComponent
+from ..components.renderable import RenderableComponent
+from ..components.province_info import ProvinceInfoComponent
+from ..components.player_info import PlayerInfoComponent
+from ..components.player_input import PlayerInputComponent
+from ..components.selected import SelectedComponent
 from ..systems.input_system import InputSystem
-from ..systems.render_system import RenderSystem
 from ..systems.turn_system import TurnSystem
 from ..systems.ui_system import UISystem
-from ..systems.map_generator_system import MapGenerationSystem
+# Системы отрисовки карты, генерации и ИИ (и их зависимости — multiprocessing,
+# генератор карты) импортируются и создаются при первом обращении: для меню
+# они не нужны (см. свойства Engine).
 
 class GameState(Enum):
     MENU = auto()
+    LOADING = auto()    # Карта генерируется в фоне, на экране — прогресс
     GAME = auto()
 
+@dataclass
+class HeadlessReport:
+    """Итоги прогона Engine.run_headless."""
+    steps: int              # Сколько раз был вызван end_turn
+    turn_number: int        # Номер глобального хода после прогона
+    elapsed: float          # Время прогона в секундах (без генерации карты)
+    map_seconds: float      # Время генерации карты в секундах
+
+    @property
+    def turns_per_second(self) -> float:
+        return self.steps / self.elapsed if self.elapsed > 0 else float('inf')
+
+
 class Engine:
-    def __init__(self, world: GameWorld):
-        pygame.init()
-        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-        pygame.display.set_caption(WINDOW_TITLE)
-        self.clock = pygame.time.Clock()
+    def __init__(self, world: GameWorld, headless: bool = False, seed: int | None = None,
+                 chunked: bool = CHUNKED_WORLD, record_path: str | None = None):
+        """
+        :param headless: Режим без окна: не создаются дисплей, шрифты, ввод
+            и отрисовка. Используется для пакетных симуляций (см. run_headless).
+        :param seed: Seed генератора карты (None — случайный).
+        :param chunked: Большая потоковая карта WORLD_GRID_WIDTH x WORLD_GRID_HEIGHT,
+            которая генерируется чанками вокруг камеры (см. ChunkStreamingSystem).
+        :param record_path: Куда писать журнал команд партии (см. command_log
+            и replay). Только для обычной карты: чанки генерируются вокруг
+            камеры, и реплей не смог бы их повторить.
+        """
+        if record_path is not None and chunked:
+            raise ValueError("Журнал команд не поддерживается для потоковой карты (chunked)")
+        self.startup = StartupReport()
+        self.startup.mark("import")
+        self.headless = headless
+        self.chunked = chunked
+        self.seed = seed
         self.is_running = False
         self.world = world
         self.state = GameState.MENU
+        # Области экрана, обновленные на прошлом кадре (см. run).
+        self._previous_dirty_rects = []
+        # Что обновить на дисплее в конце кадра: области, которые нарисовали
+        # системы, или весь экран (меню и загрузка рисуются целиком).
+        self._dirty_rects = []
+        self._full_redraw = False
+        # Меню статично: рисуется один раз при входе в состояние.
+        self._menu_drawn = False
+        self.scheduler: SystemScheduler | None = None
+        # Профилировщик систем. Выключен по умолчанию; F3 — вкл/выкл с оверлеем,
+        # F4 — сохранить Chrome-трассировку.
+        self.profiler = FrameProfiler()
+        # Журнал команд открывается при входе в GAME. Состояние слотов ID
+        # запоминается до генерации карты: реплей должен выдать провинциям те же ID.
+        self.record_path = record_path
+        self.command_log = None
+        self._entity_state_before_map = None
+        # Карта (cell_entities генератора), объекты которой перенесены в постоянное поколение GC.
+        self._frozen_map = None
 
-        # Инициализация систем
+        # Инициализация систем. ИИ, генератор карты и отрисовка карты создаются
+        # лениво (свойства ниже); ИИ передается TurnSystem при создании.
+        self._ai_system = None
+        self._map_generator_system = None
+        self._render_system = None
         self.turn_system = TurnSystem()
+        if chunked:
+            world_size = (WORLD_GRID_WIDTH * TILE_SIZE, WORLD_GRID_HEIGHT * TILE_SIZE)
+            self.camera = Camera(SCREEN_WIDTH, SCREEN_HEIGHT, world_size)
+        else:
+            self.camera = Camera(SCREEN_WIDTH, SCREEN_HEIGHT, (GRID_WIDTH * TILE_SIZE, GRID_HEIGHT * TILE_SIZE))
+            # Отдалять камеру можно, пока карта не поместится на экран целиком.
+            # Потоковая карта не отдаляется: чанки подгружаются под экран в масштабе 1.
+            self.camera.min_zoom = self.camera.fit_zoom()
+
+        if headless:
+            self.screen = None
+            self.clock = None
+            self.input_system = None
+            self.ui_system = None
+            return
+
+        # Только нужные модули pygame: pygame.init() запускал бы еще звук и джойстики.
+        pygame.display.init()
+        pygame.font.init()
+        self.startup.mark("pygame init")
+        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+        pygame.display.set_caption(WINDOW_TITLE)
+        self.clock = pygame.time.Clock()
+        self.startup.mark("display")
+
         self.input_system = InputSystem()
+        # Шрифты UISystem загружает при первой отрисовке меню.
         self.ui_system = UISystem(self.screen, self.turn_system)
-        self.render_system = RenderSystem(self.screen)
-        self.map_generator_system = MapGenerationSystem(GRID_WIDTH, GRID_HEIGHT, TILE_SIZE)
+
+        self.scheduler = SystemScheduler(self.world, lambda: self.state, self.profiler)
+        self._register_systems()
+        self.startup.mark("systems")
+        self._startup_reported = not STARTUP_REPORT
+
+    @property
+    def ai_system(self):
+        if self._ai_system is None:
+            from ..systems.ai_system import AISystem
+            # В headless-режиме ИИ считает синхронно: кадров, которые нужно держать, нет.
+            self._ai_system = AISystem(max_workers=0) if self.headless else AISystem()
+            self.turn_system.ai_system = self._ai_system
+        return self._ai_system
+
+    @property
+    def map_generator_system(self):
+        if self._map_generator_system is None:
+            if self.chunked:
+                from ..systems.chunk_system import ChunkStreamingSystem
+                self._map_generator_system = ChunkStreamingSystem(
+                    WORLD_GRID_WIDTH, WORLD_GRID_HEIGHT, TILE_SIZE, self.camera, seed=self.seed)
+            else:
+                from ..systems.map_generator_system import MapGenerationSystem
+                # В окне карта генерируется в фоновом потоке, чтобы не замораживать кадры.
+                self._map_generator_system = MapGenerationSystem(GRID_WIDTH, GRID_HEIGHT, TILE_SIZE, seed=self.seed,
+                                                                 background=not self.headless)
+        return self._map_generator_system
+
+    @property
+    def render_system(self):
+        if self._render_system is None and not self.headless:
+            from ..systems.render_system import RenderSystem
+            self._render_system = RenderSystem(self.screen, self.camera, self.world)
+            # Миникарта нужна, только если карта не помещается на экран.
+            self._render_system.show_minimap = self.camera.min_zoom < 1
+        return self._render_system
+
+    def _register_systems(self):
+        """
+        Регистрирует системы в планировщике. Порядок регистрации — порядок
+        вызова внутри кадра; states, interval и is_idle решают, нужен ли вызов.
+        """
+        add = self.scheduler.add
+        # 1. Ввод работает всегда. Конец хода (EndTurnCommand) начисляет доход
+        # (PlayerInfoComponent.gold) и запускает ИИ следующего игрока.
+        add("input", lambda: self.input_system.update(self.world, self),
+            writes=(SelectedComponent, PlayerInfoComponent))
+        # 2. Логика. Обычная карта после генерации больше ничего не делает,
+        # потоковая подгружает чанки вслед за камерой каждый кадр.
+        add("map_generator", self._update_map_generator,
+            states=(GameState.LOADING, GameState.GAME),
+            writes=(TransformComponent, RenderableComponent, ProvinceInfoComponent),
+            is_idle=lambda: (self.state == GameState.GAME and not self.chunked
+                             and self.map_generator_system.map_generated))
+        add("turn", lambda: self.turn_system.update(self.world), states=(GameState.GAME,),
+            reads=(PlayerInfoComponent, PlayerInputComponent),
+            is_idle=lambda: self.turn_system.is_initialized)
+        # Ходы ИИ считаются в пуле процессов; здесь только применяются готовые,
+        # а ход завершается тем же EndTurnCommand, что и у игрока (доход в gold).
+        # Перекрашенные провинции RenderSystem узнает из событий мира.
+        add("ai", lambda: self.ai_system.update(self.world, self.turn_system), states=(GameState.GAME,),
+            writes=(PlayerInfoComponent, ProvinceInfoComponent, RenderableComponent),
+            is_idle=lambda: not self.ai_system.is_thinking)
+        # 3. Отрисовка: системы копят измененные области, дисплей обновляется в _present.
+        add("ui_menu", self._draw_menu, states=(GameState.MENU,), is_idle=lambda: self._menu_drawn)
+        add("ui_loading", self._draw_loading, states=(GameState.LOADING,), interval=LOADING_REDRAW_INTERVAL)
+        # Кэш карты закрывает весь экран, поэтому fill() перед ним не нужен.
+        add("render", lambda: self._dirty_rects.extend(self.render_system.update(self.world)),
+            states=(GameState.GAME,), reads=(TransformComponent, RenderableComponent))
+        add("ui", self._draw_game_hud, states=(GameState.GAME,),
+            reads=(PlayerInfoComponent, ProvinceInfoComponent, SelectedComponent))
 
     def run(self):
         """
-        Запускает главный игровой цикл с единой, правильной логикой рендеринга.
+        Запускает главный игровой цикл: каждый кадр планировщик вызывает
+        системы, которым есть что делать, затем обновляется дисплей.
         """
+        if self.headless:
+            raise RuntimeError("Engine создан в headless-режиме: используйте run_headless()")
+
         self.is_running = True
         print(f"Engine запущен. Текущее состояние: {self.state.name}. Нажмите ENTER для старта.")
 
         while self.is_running:
-            # 1. Регулируем FPS
+            profiler = self.profiler
+            profiler.begin_frame()
+            # 1. Ввод, логика и отрисовка — в порядке регистрации (_register_systems).
+            self.scheduler.run_frame()
+            # 2. Обновляем дисплей.
+            self._present()
+            profiler.end_frame()
+            if not self._startup_reported:
+                self._report_startup()
+
+            # 3. Регулируем FPS. Ожидание — в конце кадра, чтобы первый кадр
+            # (меню сразу после запуска) не ждал лишний интервал.
             self.clock.tick(FPS)
-            
-            # 2. Обработка ввода (работает всегда)
-            self.input_system.update(self.world, self)
-            
-            # 3. Обновление логики в зависимости от состояния
-            if self.state == GameState.GAME:
-                self.map_generator_system.update(self.world)
-                self.turn_system.update(self.world)
-
-            # 4. --- ЕДИНЫЙ КОНВЕЙЕР ОТРИСОВКИ ---
-            # Он работает всегда, но рисует разные вещи в зависимости от состояния.
-            
-            # 4.1. Очищаем экран фоновым цветом
-            self.screen.fill(COLORS['background'])
-            
-            # 4.2. Рисуем игровые объекты или UI
-            if self.state == GameState.MENU:
-                self.ui_system.update_menu()
-            elif self.state == GameState.GAME:
-                # Сначала рисуем игровые сущности (карту, юнитов)
-                self.render_system.update(self.world)
-                # Затем поверх них рисуем игровой интерфейс (HUD)
-                self.ui_system.update_game_hud(self.world)
-
-            # 4.3. Обновляем дисплей, чтобы показать все нарисованное
-            pygame.display.flip()
-
-            # 5. Проверяем флаг выхода
+
+            # 4. Проверяем флаг выхода
             if self.input_system.quit_requested:
                 self.is_running = False
-        
+
         self._cleanup()
-        
+
+    def _report_startup(self):
+        self._startup_reported = True
+        self.startup.mark("first frame")
+        self.startup.detail("шрифты", self.ui_system.font_seconds)
+        print(self.startup.format())
+
+    def _update_map_generator(self):
+        self.map_generator_system.update(self.world)
+        if self.map_generator_system.map_generated:
+            self._freeze_map()
+            if self.state == GameState.LOADING:
+                self.change_state(GameState.GAME)
+
+    def _freeze_map(self):
+        """
+        Переносит объекты готовой карты в постоянное поколение сборщика мусора
+        (gc.freeze): провинции живут, пока жива карта, и циклов не образуют, а
+        без этого первая же полная сборка обходит все созданные за загрузку
+        объекты. Если карту заменили, прежняя заморозка снимается (gc.unfreeze),
+        чтобы удаленные провинции старой карты могли быть собраны.
+        """
+        cell_entities = self.map_generator_system.cell_entities
+        if cell_entities is None or cell_entities is self._frozen_map:
+            return
+        if self._frozen_map is not None:
+            gc.unfreeze()
+        gc.freeze()
+        self._frozen_map = cell_entities
+
+    def _draw_menu(self):
+        # Меню рисуется целиком: очищаем экран и обновляем весь дисплей
+        self.screen.fill(COLORS['background'])
+        self.ui_system.update_menu()
+        self._menu_drawn = True
+        self._full_redraw = True
+
+    def _draw_loading(self):
+        # Экран загрузки: прогресс фоновой генерации карты
+        self.screen.fill(COLORS['background'])
+        generator = self.map_generator_system
+        self.ui_system.update_loading(generator.stage, generator.progress)
+        self._full_redraw = True
+
+    def _draw_game_hud(self):
+        # Игровой интерфейс поверх карты, оверлей производительности (F3) — поверх всего
+        self._dirty_rects.extend(self.ui_system.update_game_hud(self.world))
+        if self.profiler.enabled:
+            self._dirty_rects.extend(self.ui_system.draw_profiler_overlay(self.profiler, self.world))
+
+    def _present(self):
+        """Обновляет дисплей по тому, что нарисовали системы за кадр."""
+        profiler = self.profiler
+        if self._full_redraw:
+            profiler.measure("display", pygame.display.flip)
+            self._previous_dirty_rects = []
+        elif self._dirty_rects or self._previous_dirty_rects:
+            # Обновляем только изменившиеся области. Области прошлого кадра
+            # тоже нужны — там мог остаться старый HUD.
+            profiler.measure("display", pygame.display.update, self._dirty_rects + self._previous_dirty_rects)
+            self._previous_dirty_rects = self._dirty_rects
+        self._dirty_rects = []
+        self._full_redraw = False
+
+    def run_headless(self, max_turns: int) -> HeadlessReport:
+        """
+        Прогоняет игру без окна и без ограничения FPS: фиксированный шаг,
+        на каждом шаге системы логики вызываются в том же порядке, что и в run(),
+        после чего текущий игрок завершает ход.
+
+        :param max_turns: Сколько раз вызвать end_turn.
+        :return: Отчет с числом ходов в секунду.
+        """
+        self.change_state(GameState.GAME)
+        # Вывод в консоль на каждом ходе заметно замедляет длинные прогоны.
+        self.turn_system.verbose = False
+
+        # Первый шаг генерирует карту; его время считаем отдельно.
+        map_start = time.perf_counter()
+        self.map_generator_system.update(self.world)
+        self._freeze_map()
+        self.turn_system.update(self.world)
+        map_seconds = time.perf_counter() - map_start
+
+        start = time.perf_counter()
+        for _ in range(max_turns):
+            self.map_generator_system.update(self.world)
+            self.turn_system.update(self.world)
+            if self.ai_system.is_thinking:
+                # Ход ИИ уже посчитан синхронно: применяем его (это и завершает ход).
+                self.ai_system.update(self.world, self.turn_system)
+            else:
+                current = self.turn_system.get_current_player_id()
+                self.turn_system.execute(self.world, EndTurnCommand(current))
+        elapsed = time.perf_counter() - start
+
+        return HeadlessReport(max_turns, self.turn_system.turn_number, elapsed, map_seconds)
+
     def change_state(self, new_state: GameState):
         if self.state == new_state: return
         print(f"Смена состояния с {self.state.name} на {new_state.name}")
         self.state = new_state
+        if new_state in (GameState.LOADING, GameState.GAME):
+            # ИИ создается до первого хода: TurnSystem сразу передает ему ход компьютера.
+            self.ai_system
+            if not self.map_generator_system.map_generated:
+                self._entity_state_before_map = self.world.get_entity_state()
+        if new_state == GameState.GAME and self.record_path is not None and self.command_log is None:
+            self._start_recording()
+        # После смены состояния первый кадр должен обновить весь дисплей.
+        if self.screen is not None:
+            self._previous_dirty_rects = [self.screen.get_rect()]
+        self._menu_drawn = False
+
+    def _start_recording(self):
+        """Открывает журнал команд: в заголовке все, чтобы повторить стартовый мир."""
+        header = describe_match(self.world, self.map_generator_system, self._entity_state_before_map)
+        self.command_log = CommandLog(self.record_path, header)
+        self.turn_system.command_log = self.command_log
+
+    def cancel_loading(self):
+        """Прерывает генерацию карты и возвращает в меню."""
+        self.map_generator_system.cancel(self.world)
+        self.change_state(GameState.MENU)
 
     def _cleanup(self):
         print("Engine: Завершение работы...")
-        pygame.quit()
+        if self._map_generator_system is not None:
+            self._map_generator_system.cancel(self.world)
+        if self._ai_system is not None:
+            self._ai_system.shutdown()
+        if self.scheduler is not None:
+            self.scheduler.shutdown()
+        if self.command_log is not None:
+            self.command_log.close()
+        if not self.headless:
+            pygame.quit()
@@ -0,0 +1,71 @@
+# src/pgg_game/core/headless.py
+
+"""
+Запуск игры без окна для пакетных симуляций и бенчмарков.
+
+Пример:
+    python -m pgg_game.core.headless --turns 100000 --players 4 --seed 42
+    python -m pgg_game.core.headless --turns 5000 --record match.pgglog
+"""
+
+import argparse
+import os
+
+# Окно не нужно, но pygame может обратиться к видеодрайверу (например, при создании
+# pygame.Color), поэтому на машинах без дисплея подставляем фиктивный драйвер.
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+from ..world.game_world import GameWorld
+from ..components.player_info import PlayerInfoComponent
+from ..config import COLORS
+from .engine import Engine, HeadlessReport
+
+PLAYER_COLOR_KEYS = ('player_one', 'player_two', 'player_three', 'player_four')
+
+
+def create_players(world: GameWorld, count: int):
+    """Создает count игроков с порядком хода 0..count-1."""
+    players = world.create_entities(count)
+    world.add_components(PlayerInfoComponent, players, [
+        PlayerInfoComponent(
+            name=f"Игрок {turn_order + 1}",
+            color=COLORS[PLAYER_COLOR_KEYS[turn_order % len(PLAYER_COLOR_KEYS)]],
+            turn_order=turn_order
+        )
+        for turn_order in range(count)
+    ])
+
+
+def run_simulation(turns: int, players: int = 2, seed: int | None = None,
+                   record_path: str | None = None) -> HeadlessReport:
+    """
+    Создает мир с игроками и прогоняет turns ходов в headless-режиме.
+
+    :param record_path: Если задан — записать журнал команд партии (см. replay).
+    """
+    world = GameWorld()
+    create_players(world, players)
+    engine = Engine(world, headless=True, seed=seed, record_path=record_path)
+    try:
+        return engine.run_headless(turns)
+    finally:
+        if engine.command_log is not None:
+            engine.command_log.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless-прогон игры без окна и ограничения FPS.")
+    parser.add_argument("--turns", type=int, default=10000, help="Сколько раз завершить ход")
+    parser.add_argument("--players", type=int, default=2, help="Количество игроков")
+    parser.add_argument("--seed", type=int, default=None, help="Seed генератора карты")
+    parser.add_argument("--record", default=None, help="Записать журнал команд в этот файл")
+    args = parser.parse_args()
+
+    report = run_simulation(args.turns, args.players, args.seed, args.record)
+    print(f"Генерация карты: {report.map_seconds * 1000:.1f} мс")
+    print(f"Ходов: {report.steps} (глобальный ход {report.turn_number}) за {report.elapsed:.3f} с")
+    print(f"Ходов в секунду: {report.turns_per_second:,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+# src/pgg_game/core/match_protocol.py
+
+"""
+Сетевой протокол матча (см. match_server).
+
+Каждое сообщение — кадр: [длина, uint32] [тип, uint8] [данные]. Числа —
+little-endian. Клиент отправляет:
+
+    JOIN     int64 ID игрока (-1 — зритель)
+    COMMAND  запись команды в формате журнала (command_log.encode_command)
+    ACK      пусто: клиент применил очередной DIFF
+
+Сервер отправляет:
+
+    WELCOME  JSON-заголовок партии (как у журнала команд: карта, игроки, ID)
+    RESULT   uint8 принята ли команда, UTF-8 текст ошибки
+    DIFF     изменения состояния с прошлого DIFF этому клиенту (StateDiff)
+
+DIFF несет только то, что поменялось: владельцев провинций, золото игроков
+и текущий ход. Остальное клиент выводит сам (например, цвет провинции — из
+владельца), а стартовый мир строит по заголовку, как реплей.
+
+Следующий DIFF сервер отправляет только после ACK на предыдущий, поэтому
+у клиента в пути не больше одного DIFF, а все, что накопилось за это время,
+приходит одним DIFF.
+"""
+
+import asyncio
+import json
+import struct
+from typing import Any, Dict, Tuple
+
+import numpy as np
+
+from ..world.game_world import Entity
+from .command_log import CommandLogError, encode_command, decode_command
+from .commands import Command
+
+# Типы сообщений.
+JOIN = 1
+COMMAND = 2
+WELCOME = 3
+RESULT = 4
+DIFF = 5
+ACK = 6
+
+SPECTATOR = -1
+# Больше этого кадр не бывает: защита от мусора вместо длины.
+MAX_FRAME_SIZE = 64 * 1024 * 1024
+
+_LENGTH = struct.Struct('<I')
+_TYPE = struct.Struct('<B')
+_INT64 = struct.Struct('<q')
+_RESULT = struct.Struct('<B')
+# Заголовок DIFF: номер хода, текущий игрок, число смен владельцев, число записей золота.
+_DIFF_HEADER = struct.Struct('<qqII')
+
+
+class ProtocolError(Exception):
+    """Собеседник прислал кадр, который нельзя разобрать."""
+
+
+class StateDiff:
+    """
+    Изменения состояния матча для рассылки клиентам.
+
+    Повторные изменения одного и того же поля схлопываются (побеждает
+    последнее), поэтому merge нескольких DIFF для медленного клиента дает
+    один DIFF размером не больше полного состояния. Закодированные байты
+    кэшируются: одинаковый DIFF всем успевающим клиентам кодируется один раз.
+    """
+    def __init__(self, turn_number: int, current_player: Entity | None,
+                 owners: Dict[Entity, Entity] | None = None, gold: Dict[Entity, int] | None = None):
+        """
+        :param owners: { провинция: новый владелец или ownership.NEUTRAL }.
+        :param gold: { игрок: золото }.
+        """
+        self.turn_number = turn_number
+        self.current_player = current_player
+        self.owners: Dict[Entity, Entity] = owners if owners is not None else {}
+        self.gold: Dict[Entity, int] = gold if gold is not None else {}
+        self._encoded: bytes | None = None
+
+    def merged(self, newer: 'StateDiff') -> 'StateDiff':
+        """Новый DIFF, равносильный применению self, а затем newer."""
+        return StateDiff(newer.turn_number, newer.current_player,
+                         {**self.owners, **newer.owners}, {**self.gold, **newer.gold})
+
+    def encode(self) -> bytes:
+        if self._encoded is None:
+            current = SPECTATOR if self.current_player is None else self.current_player
+            owners = np.array(list(self.owners.items()), dtype='<i8').reshape(-1, 2)
+            gold = np.array(list(self.gold.items()), dtype='<i8').reshape(-1, 2)
+            self._encoded = frame(DIFF, _DIFF_HEADER.pack(self.turn_number, current, len(owners), len(gold))
+                                  + owners.tobytes() + gold.tobytes())
+        return self._encoded
+
+    @classmethod
+    def decode(cls, payload: bytes) -> 'StateDiff':
+        if len(payload) < _DIFF_HEADER.size:
+            raise ProtocolError("Короткий DIFF")
+        turn_number, current, owner_count, gold_count = _DIFF_HEADER.unpack_from(payload)
+        offset = _DIFF_HEADER.size
+        if len(payload) != offset + 16 * (owner_count + gold_count):
+            raise ProtocolError("Размер DIFF не совпадает с заголовком")
+        pairs = np.frombuffer(payload, dtype='<i8', offset=offset).reshape(-1, 2).tolist()
+        return cls(turn_number, None if current == SPECTATOR else current,
+                   dict(pairs[:owner_count]), dict(pairs[owner_count:]))
+
+
+def frame(message_type: int, payload: bytes = b"") -> bytes:
+    return _LENGTH.pack(_TYPE.size + len(payload)) + _TYPE.pack(message_type) + payload
+
+
+async def read_frame(reader: asyncio.StreamReader) -> Tuple[int, bytes]:
+    """
+    Читает один кадр.
+
+    :return: (тип сообщения, данные).
+    :raises asyncio.IncompleteReadError: Соединение закрыто.
+    """
+    (length,) = _LENGTH.unpack(await reader.readexactly(_LENGTH.size))
+    if not _TYPE.size <= length <= MAX_FRAME_SIZE:
+        raise ProtocolError(f"Недопустимая длина кадра {length}")
+    data = await reader.readexactly(length)
+    return data[0], data[1:]
+
+
+def encode_join(player_id: Entity) -> bytes:
+    return frame(JOIN, _INT64.pack(player_id))
+
+
+def decode_join(payload: bytes) -> Entity:
+    if len(payload) != _INT64.size:
+        raise ProtocolError("Некорректный JOIN")
+    return _INT64.unpack(payload)[0]
+
+
+def encode_welcome(header: Dict[str, Any]) -> bytes:
+    return frame(WELCOME, json.dumps(header, ensure_ascii=False).encode('utf-8'))
+
+
+def decode_welcome(payload: bytes) -> Dict[str, Any]:
+    return json.loads(payload.decode('utf-8'))
+
+
+def encode_command_frame(command: Command) -> bytes:
+    return frame(COMMAND, encode_command(command))
+
+
+def decode_command_frame(payload: bytes) -> Command:
+    try:
+        command, end = decode_command(payload)
+    except (CommandLogError, struct.error) as error:
+        raise ProtocolError(f"Некорректная запись команды: {error}") from None
+    if command is None or end != len(payload):
+        raise ProtocolError("Некорректная запись команды")
+    return command
+
+
+def encode_ack() -> bytes:
+    return frame(ACK)
+
+
+def decode_ack(payload: bytes):
+    if payload:
+        raise ProtocolError("Некорректный ACK")
+
+
+def encode_result(error: str | None) -> bytes:
+    return frame(RESULT, _RESULT.pack(error is None) + (error or "").encode('utf-8'))
+
+
+def decode_result(payload: bytes) -> str | None:
+    """:return: None, если команда принята, иначе текст ошибки."""
+    (accepted,) = _RESULT.unpack_from(payload)
+    return None if accepted else payload[_RESULT.size:].decode('utf-8')
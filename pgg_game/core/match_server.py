@@ -0,0 +1,541 @@
+# src/pgg_game/core/match_server.py
+
+"""
+Матч по сети: сервер держит GameWorld и TurnSystem, клиенты на других
+машинах присылают команды по TCP (формат — match_protocol).
+
+- Команду принимает только игрок, за которого клиент вошел (JOIN), и только
+  в свой ход; дальше — обычная проверка (TurnSystem.execute, CommandError).
+- Изменения копятся весь ход и рассылаются одним DIFF после EndTurnCommand.
+- Медленному клиенту DIFF не ставятся в очередь: пока он не подтвердил (ACK)
+  прошлый, новые сливаются в один (StateDiff.merged). Память на клиента
+  ограничена размером состояния, а отстающий зритель не задерживает остальных
+  и получает меньше DIFF, чем успевающие.
+
+Пример:
+    python -m pgg_game.core.match_server --port 8765 --players 2
+    python -m pgg_game.core.match_server --load-test 300 --turns 50
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import socket
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, List, Set, Tuple
+from collections import deque
+
+# Как и в headless: окно не нужно, но pygame.Color может обратиться к видеодрайверу.
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import numpy as np
+
+from ..world.game_world import GameWorld, Entity
+from ..world.ownership import NEUTRAL
+from ..components.player_info import PlayerInfoComponent
+from ..components.province_info import ProvinceInfoComponent
+from ..components.renderable import RenderableComponent
+from ..systems.map_generator_system import MapGenerationSystem
+from ..systems.turn_system import TurnSystem
+from ..config import (
+    GRID_WIDTH, GRID_HEIGHT, TILE_SIZE, COLORS, MATCH_PORT, MATCH_SLOW_READ_DELAY, MATCH_SLOW_RECEIVE_BUFFER,
+)
+from .commands import Command, CommandError, EndTurnCommand, CaptureProvinceCommand
+from .command_log import CommandLog, describe_match
+from .headless import create_players
+from .replay import build_initial_world
+from .match_protocol import (
+    SPECTATOR, JOIN, COMMAND, ACK, WELCOME, RESULT, DIFF, ProtocolError, StateDiff, read_frame,
+    encode_join, decode_join, encode_welcome, decode_welcome, encode_command_frame, decode_command_frame,
+    encode_ack, decode_ack, encode_result, decode_result,
+)
+
+
+class MatchError(Exception):
+    """Сервер отказал во входе в матч (место занято, нет такого игрока)."""
+
+
+class _Connection:
+    """Клиент на стороне сервера: за кого играет и что ему еще не отправлено."""
+    def __init__(self, writer: asyncio.StreamWriter, player_id: Entity):
+        self.writer = writer
+        self.player_id = player_id
+        # DIFF, который еще не отправлен; новые сливаются в него.
+        self.pending: StateDiff | None = None
+        # Отправленный DIFF еще не подтвержден (ACK): следующий ждет в pending.
+        self.awaiting_ack = False
+        self.wakeup = asyncio.Event()
+        self.sender: asyncio.Task | None = None
+
+
+class MatchServer:
+    """
+    Сервер одного матча. Все обращения к миру идут из одного цикла asyncio,
+    поэтому команды применяются строго по очереди поступления.
+    """
+    def __init__(self, world: GameWorld, header: Dict[str, Any], record_path: str | None = None):
+        """
+        :param header: Заголовок партии (command_log.describe_match): по нему
+            клиенты строят тот же стартовый мир.
+        :param record_path: Если задан — писать журнал команд (см. replay).
+        """
+        self.world = world
+        self.header = header
+        self.turn_system = TurnSystem()
+        self.turn_system.verbose = False
+        self.turn_system.update(world)
+        if record_path is not None:
+            self.turn_system.command_log = CommandLog(record_path, header)
+        self.connections: Set[_Connection] = set()
+        # { ID игрока: подключение, которое за него играет }
+        self.seats: Dict[Entity, _Connection] = {}
+        # Смены владельцев за текущий ход: { строка графа: владелец }.
+        self._owner_changes: Dict[int, Entity] = {}
+        # Золото игроков на момент прошлой рассылки.
+        self._gold = self._current_gold()
+        world.province_ownership.add_listener(self._on_owner_changed)
+        self.stats = {'commands': 0, 'rejected': 0, 'diffs': 0, 'coalesced': 0}
+        self._server: asyncio.AbstractServer | None = None
+        self._handlers: Set[asyncio.Task] = set()
+
+    @classmethod
+    def create(cls, players: int = 2, seed: int | None = None, width: int = GRID_WIDTH, height: int = GRID_HEIGHT,
+               record_path: str | None = None) -> 'MatchServer':
+        """Новый матч: игроки и карта, как в headless-прогоне."""
+        world = GameWorld()
+        create_players(world, players)
+        entity_state = world.get_entity_state()
+        generator = MapGenerationSystem(width, height, TILE_SIZE, seed=seed)
+        generator.update(world)
+        return cls(world, describe_match(world, generator, entity_state), record_path)
+
+    async def start(self, host: str = "127.0.0.1", port: int = MATCH_PORT) -> Tuple[str, int]:
+        """Начинает принимать подключения. port=0 — любой свободный. :return: (адрес, порт)."""
+        self._server = await asyncio.start_server(self._handle_client, host, port)
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+        for connection in list(self.connections):
+            connection.writer.close()
+        # Обработчики клиентов завершатся сами, получив конец потока.
+        await asyncio.gather(*self._handlers, return_exceptions=True)
+        if self._server is not None:
+            await self._server.wait_closed()
+        if self.turn_system.command_log is not None:
+            self.turn_system.command_log.close()
+
+    # --- Подключения ---
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        connection = None
+        handler = asyncio.current_task()
+        self._handlers.add(handler)
+        try:
+            message_type, payload = await read_frame(reader)
+            if message_type != JOIN:
+                raise ProtocolError("Первым сообщением должен быть JOIN")
+            player_id = decode_join(payload)
+            error = self._check_seat(player_id)
+            if error is not None:
+                writer.write(encode_result(error))
+                await writer.drain()
+                return
+
+            connection = _Connection(writer, player_id)
+            writer.write(encode_welcome(self.header))
+            connection.pending = self._full_state()
+            connection.wakeup.set()
+            connection.sender = asyncio.create_task(self._send_loop(connection))
+            self.connections.add(connection)
+            if player_id != SPECTATOR:
+                self.seats[player_id] = connection
+
+            while True:
+                message_type, payload = await read_frame(reader)
+                if message_type == ACK:
+                    decode_ack(payload)
+                    if not connection.awaiting_ack:
+                        raise ProtocolError("ACK без отправленного DIFF")
+                    connection.awaiting_ack = False
+                    connection.wakeup.set()
+                elif message_type == COMMAND:
+                    writer.write(encode_result(self._apply(connection, decode_command_frame(payload))))
+                    await writer.drain()
+                else:
+                    raise ProtocolError(f"Неожиданное сообщение {message_type}")
+        except (asyncio.IncompleteReadError, ConnectionError, ProtocolError):
+            # Клиент отключился или прислал мусор — просто закрываем соединение.
+            pass
+        finally:
+            if connection is not None:
+                self.connections.discard(connection)
+                if self.seats.get(connection.player_id) is connection:
+                    del self.seats[connection.player_id]
+                connection.sender.cancel()
+            writer.close()
+            self._handlers.discard(handler)
+
+    def _check_seat(self, player_id: Entity) -> str | None:
+        if player_id == SPECTATOR:
+            return None
+        if player_id not in self.turn_system.players:
+            return f"Игрока {player_id} нет в матче"
+        if player_id in self.seats:
+            return f"За игрока {player_id} уже играет другой клиент"
+        return None
+
+    async def _send_loop(self, connection: _Connection):
+        """
+        Отправляет клиенту накопленный DIFF, как только тот подтвердил прошлый.
+        Пока ACK нет, новые DIFF сливаются в pending (см. _broadcast).
+        """
+        writer = connection.writer
+        try:
+            while True:
+                await connection.wakeup.wait()
+                connection.wakeup.clear()
+                if connection.awaiting_ack or connection.pending is None:
+                    continue
+                diff, connection.pending = connection.pending, None
+                connection.awaiting_ack = True
+                writer.write(diff.encode())
+                self.stats['diffs'] += 1
+                await writer.drain()
+        except ConnectionError:
+            writer.close()
+
+    # --- Команды и рассылка ---
+
+    def _apply(self, connection: _Connection, command: Command) -> str | None:
+        """Проверяет и применяет команду клиента. :return: None или текст ошибки."""
+        if connection.player_id == SPECTATOR:
+            error = "Зритель не может отправлять команды"
+        elif command.player_id != connection.player_id:
+            error = f"Команда от имени игрока {command.player_id}, а клиент играет за {connection.player_id}"
+        elif self.turn_system.get_current_player_id() != connection.player_id:
+            error = "Сейчас ход другого игрока"
+        else:
+            try:
+                self.turn_system.execute(self.world, command)
+                error = None
+            except CommandError as command_error:
+                error = str(command_error)
+        if error is not None:
+            self.stats['rejected'] += 1
+            return error
+        self.stats['commands'] += 1
+        if isinstance(command, EndTurnCommand):
+            self._broadcast(self._collect_diff())
+        return None
+
+    def _broadcast(self, diff: StateDiff):
+        for connection in self.connections:
+            if connection.pending is None:
+                connection.pending = diff
+            else:
+                # Клиент еще не подтвердил прошлый DIFF: отправим оба одним.
+                connection.pending = connection.pending.merged(diff)
+                self.stats['coalesced'] += 1
+            connection.wakeup.set()
+
+    def _collect_diff(self) -> StateDiff:
+        """DIFF за прошедший ход: смены владельцев и золото, которое изменилось."""
+        row_entities = self.world.province_ownership.graph.row_entities
+        owners = {int(row_entities[row]): owner for row, owner in self._owner_changes.items()}
+        self._owner_changes = {}
+        gold = self._current_gold()
+        changed_gold = {player: value for player, value in gold.items() if self._gold.get(player) != value}
+        self._gold = gold
+        return StateDiff(self.turn_system.turn_number, self.turn_system.get_current_player_id(), owners, changed_gold)
+
+    def _full_state(self) -> StateDiff:
+        """Все состояние как один DIFF — для только что подключившегося клиента."""
+        ownership = self.world.province_ownership
+        rows = np.nonzero(ownership.owners != NEUTRAL)[0]
+        owners = dict(zip(ownership.graph.row_entities[rows].tolist(), ownership.owners[rows].tolist()))
+        return StateDiff(self.turn_system.turn_number, self.turn_system.get_current_player_id(),
+                         owners, self._current_gold())
+
+    def _current_gold(self) -> Dict[Entity, int]:
+        return {player: self.world.get_component(player, PlayerInfoComponent).gold
+                for player in self.turn_system.players}
+
+    def _on_owner_changed(self, row: int, old_owner: Entity, new_owner: Entity):
+        self._owner_changes[row] = new_owner
+
+
+def apply_state_diff(world: GameWorld, diff: StateDiff):
+    """Применяет DIFF к копии мира клиента (как это сделали бы команды на сервере)."""
+    ownership = world.province_ownership
+    for province, owner in diff.owners.items():
+        province_info = world.get_component(province, ProvinceInfoComponent)
+        if province_info is None:
+            continue
+        province_info.owner_id = None if owner == NEUTRAL else owner
+        ownership.set_owner(province, province_info.owner_id)
+        renderable = world.get_component(province, RenderableComponent)
+        if renderable is not None:
+            player_info = world.get_component(owner, PlayerInfoComponent) if owner != NEUTRAL else None
+            renderable.color = player_info.color if player_info is not None else COLORS['province_neutral']
+            world.notify_changed(province, RenderableComponent)
+    for player, gold in diff.gold.items():
+        player_info = world.get_component(player, PlayerInfoComponent)
+        if player_info is not None:
+            player_info.gold = gold
+
+
+class MatchClient:
+    """
+    Клиент матча: входит игроком или зрителем, отправляет команды и
+    применяет приходящие DIFF, подтверждая каждый (ACK).
+
+    Состояние всегда ведется в словарях owners/gold. С build_world=True
+    клиент еще и строит по заголовку стартовый мир (replay.build_initial_world)
+    и поддерживает его копию в world; зрителям в нагрузочном тесте это не нужно.
+    """
+    def __init__(self, build_world: bool = False, read_delay: float = 0.0, receive_buffer: int | None = None):
+        """
+        :param read_delay: Пауза после каждого DIFF перед ACK — имитация медленного клиента.
+        :param receive_buffer: Размер буфера приема сокета, байт (None — по умолчанию
+            системы). С маленьким буфером медленный клиент быстро создает
+            обратное давление на сервер, как клиент на плохом канале.
+        """
+        self.build_world = build_world
+        self.read_delay = read_delay
+        self.receive_buffer = receive_buffer
+        self.player_id: Entity = SPECTATOR
+        self.header: Dict[str, Any] | None = None
+        self.world: GameWorld | None = None
+        self.owners: Dict[Entity, Entity] = {}
+        self.gold: Dict[Entity, int] = {}
+        self.turn_number = 0
+        self.current_player: Entity | None = None
+        self.diffs_received = 0
+        self.closed = False
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+        self._results: Deque[asyncio.Future] = deque()
+        self._updated = asyncio.Condition()
+        self._read_task: asyncio.Task | None = None
+
+    async def connect(self, host: str, port: int, player_id: Entity = SPECTATOR):
+        if self.receive_buffer is None:
+            self._reader, self._writer = await asyncio.open_connection(host, port)
+        else:
+            # Буфер приема задается до connect: от него зависит окно TCP.
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.receive_buffer)
+            sock.setblocking(False)
+            await asyncio.get_running_loop().sock_connect(sock, (host, port))
+            self._reader, self._writer = await asyncio.open_connection(sock=sock, limit=self.receive_buffer)
+        self._writer.write(encode_join(player_id))
+        message_type, payload = await read_frame(self._reader)
+        if message_type == RESULT:
+            self._writer.close()
+            raise MatchError(decode_result(payload))
+        if message_type != WELCOME:
+            raise ProtocolError(f"Ожидался WELCOME, пришло сообщение {message_type}")
+        self.player_id = player_id
+        self.header = decode_welcome(payload)
+        if self.build_world:
+            self.world = build_initial_world(self.header)
+        self._read_task = asyncio.create_task(self._read_loop())
+
+    async def submit(self, command: Command):
+        """Отправляет команду и ждет ответа. :raises CommandError: Сервер отклонил команду."""
+        future = asyncio.get_running_loop().create_future()
+        self._results.append(future)
+        self._writer.write(encode_command_frame(command))
+        await self._writer.drain()
+        error = await future
+        if error is not None:
+            raise CommandError(error)
+
+    async def wait_for(self, predicate: Callable[[], bool]):
+        """Ждет, пока после очередного DIFF predicate() не станет истинным."""
+        async with self._updated:
+            await self._updated.wait_for(lambda: predicate() or self.closed)
+        if not predicate():
+            raise ConnectionError("Соединение с сервером закрыто")
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+        if self._read_task is not None:
+            self._read_task.cancel()
+
+    async def _read_loop(self):
+        try:
+            while True:
+                message_type, payload = await read_frame(self._reader)
+                if message_type == RESULT:
+                    if not self._results:
+                        raise ProtocolError("RESULT без отправленной команды")
+                    self._results.popleft().set_result(decode_result(payload))
+                elif message_type == DIFF:
+                    self._apply_diff(StateDiff.decode(payload))
+                    async with self._updated:
+                        self._updated.notify_all()
+                    if self.read_delay:
+                        await asyncio.sleep(self.read_delay)
+                    # Следующий DIFF (со всем, что накопилось) сервер пришлет только после ACK.
+                    self._writer.write(encode_ack())
+                else:
+                    raise ProtocolError(f"Неожиданное сообщение {message_type}")
+        except (asyncio.IncompleteReadError, ConnectionError, ProtocolError):
+            pass
+        finally:
+            self.closed = True
+            for future in self._results:
+                if not future.done():
+                    future.set_exception(ConnectionError("Соединение с сервером закрыто"))
+            async with self._updated:
+                self._updated.notify_all()
+
+    def _apply_diff(self, diff: StateDiff):
+        for province, owner in diff.owners.items():
+            if owner == NEUTRAL:
+                self.owners.pop(province, None)
+            else:
+                self.owners[province] = owner
+        self.gold.update(diff.gold)
+        self.turn_number = diff.turn_number
+        self.current_player = diff.current_player
+        self.diffs_received += 1
+        if self.world is not None:
+            apply_state_diff(self.world, diff)
+
+
+# --- Проверка по локальной петле и нагрузочный тест ---
+
+@dataclass
+class LoopbackReport:
+    """Итоги run_loopback_match."""
+    players: int
+    spectators: int
+    player_turns: int       # Сколько ходов сделали игроки
+    elapsed: float          # Секунд от первого хода до синхронизации всех зрителей
+    sync_seconds: float     # Из них: от последнего хода до синхронизации зрителей
+    stats: Dict[str, int]   # MatchServer.stats
+    mismatched: int         # Клиентов, чье состояние разошлось с сервером
+    slow_diffs: float | None  # DIFF в среднем на медленного зрителя (None — таких нет)
+    fast_diffs: float | None  # DIFF в среднем на остальных зрителей (None — таких нет)
+
+    @property
+    def turns_per_second(self) -> float:
+        return self.player_turns / self.elapsed if self.elapsed > 0 else float('inf')
+
+
+async def _play_seat(seat: MatchClient, turns: int, rng: random.Random):
+    """Игрок: в свой ход захватывает случайную нейтральную провинцию и завершает ход."""
+    ownership = seat.world.province_ownership
+    for _ in range(turns):
+        await seat.wait_for(lambda: seat.current_player == seat.player_id)
+        neutral = np.nonzero(ownership.owners == NEUTRAL)[0]
+        if len(neutral):
+            province = int(ownership.graph.row_entities[rng.choice(neutral.tolist())])
+            await seat.submit(CaptureProvinceCommand(seat.player_id, province))
+        await seat.submit(EndTurnCommand(seat.player_id))
+        # Свой ход закончен, когда DIFF передаст его следующему игроку.
+        await seat.wait_for(lambda: seat.current_player != seat.player_id)
+
+
+async def run_loopback_match(players: int = 2, spectators: int = 100, turns: int = 20, seed: int = 0,
+                             width: int = GRID_WIDTH, height: int = GRID_HEIGHT,
+                             slow_fraction: float = 0.1) -> LoopbackReport:
+    """
+    Матч целиком через TCP на 127.0.0.1: players клиентов-игроков (каждый
+    сделает turns ходов) и spectators зрителей, из них доля slow_fraction
+    читает медленно. В конце состояние каждого клиента сверяется с сервером.
+
+    :raises AssertionError: Состояние какого-то клиента разошлось с сервером
+        или медленные зрители получили не меньше DIFF, чем остальные, то есть
+        сервер не слил для них ни одного DIFF.
+    """
+    server = MatchServer.create(players, seed, width, height)
+    host, port = await server.start(port=0)
+    clients: List[MatchClient] = []
+    try:
+        seats = [MatchClient(build_world=True) for _ in range(players)]
+        await asyncio.gather(*(seat.connect(host, port, player_id)
+                               for seat, player_id in zip(seats, server.turn_system.players)))
+        slow = int(spectators * slow_fraction)
+        watchers = [MatchClient(read_delay=MATCH_SLOW_READ_DELAY, receive_buffer=MATCH_SLOW_RECEIVE_BUFFER)
+                    if index < slow else MatchClient() for index in range(spectators)]
+        await asyncio.gather(*(watcher.connect(host, port) for watcher in watchers))
+        clients = seats + watchers
+
+        start = time.perf_counter()
+        await asyncio.gather(*(_play_seat(seat, turns, random.Random(seed + index))
+                               for index, seat in enumerate(seats)))
+        last_turn = time.perf_counter()
+        final_turn = server.turn_system.turn_number
+        final_player = server.turn_system.get_current_player_id()
+        await asyncio.gather(*(client.wait_for(
+            lambda client=client: client.turn_number == final_turn and client.current_player == final_player)
+            for client in clients))
+        finished = time.perf_counter()
+
+        expected = server._full_state()
+        mismatched = sum(client.owners != expected.owners or client.gold != expected.gold for client in clients)
+        if mismatched:
+            raise AssertionError(f"Состояние {mismatched} из {len(clients)} клиентов разошлось с сервером")
+        slow_diffs, fast_diffs = (sum(watcher.diffs_received for watcher in group) / len(group) if group else None
+                                  for group in (watchers[:slow], watchers[slow:]))
+        if slow_diffs is not None and fast_diffs is not None and slow_diffs >= fast_diffs:
+            raise AssertionError(f"Медленные зрители получили {slow_diffs:.1f} DIFF в среднем, "
+                                 f"а успевающие — {fast_diffs:.1f}: DIFF не сливаются")
+        return LoopbackReport(players, spectators, players * turns, finished - start, finished - last_turn,
+                              dict(server.stats), mismatched, slow_diffs, fast_diffs)
+    finally:
+        for client in clients:
+            await client.close()
+        await server.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Сервер сетевого матча (hot-seat/LAN).")
+    parser.add_argument("--host", default="0.0.0.0", help="Адрес для подключений")
+    parser.add_argument("--port", type=int, default=MATCH_PORT)
+    parser.add_argument("--players", type=int, default=2, help="Количество игроков")
+    parser.add_argument("--seed", type=int, default=None, help="Seed генератора карты")
+    parser.add_argument("--record", default=None, help="Записать журнал команд в этот файл")
+    parser.add_argument("--load-test", type=int, default=None, metavar="SPECTATORS",
+                        help="Вместо сервера прогнать матч по локальной петле с этим числом зрителей")
+    parser.add_argument("--turns", type=int, default=50, help="Ходов каждого игрока в нагрузочном тесте")
+    args = parser.parse_args()
+
+    if args.load_test is not None:
+        report = asyncio.run(run_loopback_match(args.players, args.load_test, args.turns,
+                                                seed=args.seed or 0))
+        print(f"Игроков: {report.players}, зрителей: {report.spectators}, ходов: {report.player_turns}")
+        print(f"Время: {report.elapsed:.3f} с ({report.turns_per_second:,.0f} ходов/с), "
+              f"синхронизация зрителей после последнего хода: {report.sync_seconds * 1000:.1f} мс")
+        print(f"Сервер: {report.stats}")
+        if report.slow_diffs is not None and report.fast_diffs is not None:
+            print(f"DIFF на зрителя: медленные {report.slow_diffs:.1f}, остальные {report.fast_diffs:.1f}")
+        print(f"Клиентов с расхождением состояния: {report.mismatched}")
+        return
+
+    async def serve():
+        server = MatchServer.create(args.players, args.seed, record_path=args.record)
+        host, port = await server.start(args.host, args.port)
+        print(f"Матч (seed={server.header['map']['seed']}) ждет игроков {server.turn_system.players} "
+              f"на {host}:{port}")
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await server.close()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+# src/pgg_game/core/replay.py
+
+"""
+Воспроизведение партии по журналу команд (см. command_log) без окна и без ИИ:
+команды применяются подряд с максимальной скоростью.
+
+Каждые checkpoint_every глобальных ходов сохраняется снимок мира (snapshot),
+поэтому переход к ходу N (seek) — это загрузка ближайшего снимка и
+дошагивание оставшихся команд, а не воспроизведение с начала.
+
+Пример:
+    python -m pgg_game.core.replay match.pgglog --seek 500 --profile-ai
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from typing import Any, Dict, List, Tuple
+
+# Как и в headless: окно не нужно, но pygame.Color может обратиться к видеодрайверу.
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+
+from ..world.game_world import GameWorld, Entity
+from ..world.snapshot import save_snapshot, load_world
+from ..components.player_info import PlayerInfoComponent
+from ..components.player_input import PlayerInputComponent
+from ..systems.map_generator_system import MapGenerationSystem
+from ..systems.turn_system import TurnSystem
+from ..config import REPLAY_CHECKPOINT_EVERY
+from .command_log import read_command_log
+from .commands import EndTurnCommand
+
+
+class ReplayError(Exception):
+    """Журнал нельзя воспроизвести (стартовый мир не совпадает с записанным)."""
+
+
+def build_initial_world(header: Dict[str, Any]) -> GameWorld:
+    """
+    Строит мир, с которого началась записанная партия: те же ID сущностей,
+    те же игроки и карта с тем же seed.
+    """
+    world = GameWorld()
+    entities = header['entities']
+    # Слоты выдачи ID — как перед генерацией карты, тогда провинции получат те же ID.
+    world.set_entity_state(entities['generations'], entities['free'])
+
+    players = header['players']
+    player_ids = [player['id'] for player in players]
+    if any(not world.is_alive(player_id) for player_id in player_ids):
+        raise ReplayError("ID игроков в заголовке не согласуются с состоянием слотов")
+    world.add_components(PlayerInfoComponent, player_ids, [
+        PlayerInfoComponent(player['name'], pygame.Color(*player['color']), player['turn_order'], player['gold'])
+        for player in players
+    ])
+    humans = [player['id'] for player in players if player['human']]
+    world.add_components(PlayerInputComponent, humans, [PlayerInputComponent() for _ in humans])
+
+    map_header = header['map']
+    MapGenerationSystem(map_header['width'], map_header['height'], map_header['tile_size'],
+                        seed=map_header['seed'], connectivity=map_header['connectivity']).update(world)
+    return world
+
+
+class ReplaySession:
+    """
+    Воспроизведение одного журнала с переходом к любому ходу.
+
+    world и turn_system — текущее состояние; после seek к раннему ходу world
+    заменяется миром из снимка, поэтому ссылку на него не стоит сохранять.
+    """
+    def __init__(self, path: str, checkpoint_every: int = REPLAY_CHECKPOINT_EVERY,
+                 checkpoint_dir: str | None = None):
+        """
+        :param checkpoint_every: Раз во сколько глобальных ходов сохранять снимок.
+        :param checkpoint_dir: Куда класть снимки; None — временный каталог,
+            который удаляется в close.
+        """
+        self.header, self.commands = read_command_log(path)
+        self.checkpoint_every = checkpoint_every
+        self._owns_checkpoint_dir = checkpoint_dir is None
+        self.checkpoint_dir = checkpoint_dir or tempfile.mkdtemp(prefix="pgg_replay_")
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+        # { глобальный ход: (путь снимка, номер следующей команды) }
+        self._checkpoints: Dict[int, Tuple[str, int]] = {}
+
+        self.world = build_initial_world(self.header)
+        self.turn_system = TurnSystem()
+        self.turn_system.verbose = False
+        self.turn_system.update(self.world)
+        # Номер следующей команды журнала.
+        self.position = 0
+        # Время воспроизведения каждого хода игрока: (глобальный ход, игрок, секунды).
+        self.turn_times: List[Tuple[int, Entity, float]] = []
+        self._save_checkpoint()
+
+    @property
+    def turn_number(self) -> int:
+        return self.turn_system.turn_number
+
+    @property
+    def finished(self) -> bool:
+        return self.position >= len(self.commands)
+
+    def run(self, until_turn: int | None = None) -> int:
+        """
+        Применяет команды до конца журнала или до начала глобального хода until_turn.
+
+        :return: Сколько команд применено.
+        """
+        applied = 0
+        turn_start = time.perf_counter()
+        while not self.finished and (until_turn is None or self.turn_number < until_turn):
+            command = self.commands[self.position]
+            self.turn_system.execute(self.world, command)
+            self.position += 1
+            applied += 1
+            if isinstance(command, EndTurnCommand):
+                now = time.perf_counter()
+                self.turn_times.append((self.turn_number, command.player_id, now - turn_start))
+                turn_start = now
+                if self.turn_system.current_turn_index == 0 and self.turn_number % self.checkpoint_every == 0:
+                    self._save_checkpoint()
+                    # Время снимка не относится к ходу.
+                    turn_start = time.perf_counter()
+        return applied
+
+    def seek(self, turn: int):
+        """Переходит к началу глобального хода turn (или к концу журнала, если он короче)."""
+        available = [number for number in self._checkpoints if number <= turn]
+        best = max(available) if available else None
+        # Снимок нужен, если идти назад или если он ближе к цели, чем текущее состояние.
+        if best is not None and (turn < self.turn_number or best > self.turn_number):
+            self._load_checkpoint(best)
+        self.run(until_turn=turn)
+
+    def close(self):
+        if self._owns_checkpoint_dir:
+            shutil.rmtree(self.checkpoint_dir, ignore_errors=True)
+
+    def _save_checkpoint(self):
+        turn = self.turn_number
+        if turn in self._checkpoints:
+            return
+        path = os.path.join(self.checkpoint_dir, f"turn_{turn:06d}.pggsnap")
+        save_snapshot(path, self.world, self.turn_system.get_state(), extra={'position': self.position})
+        self._checkpoints[turn] = (path, self.position)
+
+    def _load_checkpoint(self, turn: int):
+        path, position = self._checkpoints[turn]
+        self.world, turn_state, _ = load_world(path)
+        self.turn_system.set_state(turn_state)
+        self.position = position
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Воспроизведение партии по журналу команд.")
+    parser.add_argument("log", help="Файл журнала (Engine(record_path=...) или headless --record)")
+    parser.add_argument("--seek", type=int, default=None, help="Остановиться в начале этого глобального хода")
+    parser.add_argument("--checkpoint-every", type=int, default=REPLAY_CHECKPOINT_EVERY,
+                        help="Раз во сколько ходов сохранять снимок для перехода")
+    parser.add_argument("--slowest", type=int, default=5, help="Сколько самых долгих ходов показать")
+    parser.add_argument("--profile-ai", action="store_true",
+                        help="После остановки посчитать ход ИИ текущего игрока и показать время")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    session = ReplaySession(args.log, args.checkpoint_every)
+    setup_seconds = time.perf_counter() - start
+    try:
+        start = time.perf_counter()
+        applied = session.run(until_turn=args.seek)
+        elapsed = time.perf_counter() - start
+
+        turns = len(session.turn_times)
+        print(f"Стартовый мир: {setup_seconds * 1000:.1f} мс (seed={session.header['map']['seed']})")
+        print(f"Команд: {applied}, ходов игроков: {turns} за {elapsed:.3f} с "
+              f"({turns / elapsed if elapsed > 0 else float('inf'):,.0f} ходов/с)")
+        print(f"Остановка: глобальный ход {session.turn_number}, команда {session.position}/{len(session.commands)}")
+        for turn, player_id, seconds in sorted(session.turn_times, key=lambda item: -item[2])[:args.slowest]:
+            print(f"  ход {turn}, игрок {player_id}: {seconds * 1000:.3f} мс")
+
+        if args.profile_ai:
+            _profile_ai_turn(session)
+    finally:
+        session.close()
+
+
+def _profile_ai_turn(session: ReplaySession):
+    """Считает ход ИИ для текущего игрока в состоянии, до которого дошел реплей."""
+    from ..systems.ai_system import AISystem, evaluate_ai_turn
+
+    player_id = session.turn_system.get_current_player_id()
+    ai_system = AISystem(max_workers=0)
+    task = ai_system._build_task(session.world, player_id, session.world.province_graph)
+    start = time.perf_counter()
+    commands = evaluate_ai_turn(task)
+    print(f"Ход ИИ за игрока {player_id}: {(time.perf_counter() - start) * 1000:.3f} мс, команд: {len(commands)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+# src/pgg_game/core/scheduler.py
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, FrozenSet, Hashable, Iterable, List, Tuple
+
+from ..world.game_world import GameWorld, ComponentType
+from ..world.events import ComponentEvent
+from .profiler import FrameProfiler
+from ..config import SCHEDULER_WORKERS
+
+
+@dataclass
+class ScheduledSystem:
+    """
+    Запись планировщика: как и когда вызывать систему.
+
+    reads/writes — типы компонентов, которые система читает и меняет. По ним
+    планировщик решает, можно ли считать системы одновременно: две системы
+    конфликтуют, если одна пишет то, что другая читает или пишет.
+    """
+    name: str
+    run: Callable[[], Any]
+    states: FrozenSet[Hashable] | None = None           # В каких состояниях Engine работает (None — во всех)
+    reads: FrozenSet[ComponentType] = frozenset()
+    writes: FrozenSet[ComponentType] = frozenset()
+    interval: float = 0.0                               # Секунд между запусками; 0 — каждый кадр
+    triggers: Tuple[ComponentType, ...] = ()            # Запускать только после событий этих компонентов
+    is_idle: Callable[[], bool] | None = None           # True — системе сейчас нечего делать
+    parallel: bool = False                              # Можно считать в пуле потоков (не трогает pygame)
+    last_run: float = field(default=float('-inf'), repr=False)
+    triggered: bool = field(default=False, repr=False)
+    runs: int = field(default=0, repr=False)
+    skips: int = field(default=0, repr=False)
+
+    def conflicts_with(self, other: 'ScheduledSystem') -> bool:
+        return bool(self.writes & (other.reads | other.writes) or other.writes & self.reads)
+
+
+class SystemScheduler:
+    """
+    Планировщик систем Engine.
+
+    Системы вызываются в порядке регистрации (add), но каждый кадр
+    пропускаются те, что не активны в текущем состоянии, ждут своего
+    интервала или событий мира, или сообщают через is_idle, что им нечего
+    делать. Поэтому новая система не требует правки Engine.run и ничего не
+    стоит в кадрах, где у нее нет работы.
+
+    Идущие подряд системы с parallel=True, чьи наборы reads/writes не
+    конфликтуют, запускаются одновременно в пуле из SCHEDULER_WORKERS потоков
+    (выигрыш есть у систем, которые считают в NumPy и отпускают GIL).
+    """
+    def __init__(self, world: GameWorld, state: Callable[[], Hashable],
+                 profiler: FrameProfiler | None = None, max_workers: int = SCHEDULER_WORKERS):
+        """
+        :param state: Возвращает текущее состояние Engine. Спрашивается перед
+            каждой системой: состояние может смениться посреди кадра.
+        :param max_workers: Потоков для параллельных систем (0 — всегда по очереди).
+        """
+        self.world = world
+        self.state = state
+        self.profiler = profiler or FrameProfiler()
+        self.max_workers = max_workers
+        self.systems: List[ScheduledSystem] = []
+        self._pool: ThreadPoolExecutor | None = None
+        # Подписки на события мира: (тип компонента, колбэк) — для remove и shutdown.
+        self._subscriptions: Dict[str, List[Tuple[ComponentType, Callable]]] = {}
+
+    def add(self, name: str, run: Callable[[], Any], *, states: Iterable[Hashable] | None = None,
+            reads: Iterable[ComponentType] = (), writes: Iterable[ComponentType] = (),
+            interval: float = 0.0, triggers: Iterable[ComponentType] = (),
+            is_idle: Callable[[], bool] | None = None, parallel: bool = False) -> ScheduledSystem:
+        """
+        Регистрирует систему после уже добавленных.
+
+        :param run: Вызов системы без аргументов; результат возвращается из run_frame.
+        :param triggers: Типы компонентов: система запускается только в кадрах
+            после их добавления, удаления или изменения (GameWorld.subscribe).
+        """
+        if any(system.name == name for system in self.systems):
+            raise ValueError(f"Система {name} уже зарегистрирована")
+        system = ScheduledSystem(
+            name, run,
+            states=None if states is None else frozenset(states),
+            reads=frozenset(reads), writes=frozenset(writes),
+            interval=interval, triggers=tuple(triggers), is_idle=is_idle, parallel=parallel,
+        )
+        subscriptions = self._subscriptions[name] = []
+        for component_type in system.triggers:
+            callback = self._make_trigger(system)
+            self.world.subscribe(component_type, callback)
+            subscriptions.append((component_type, callback))
+        self.systems.append(system)
+        return system
+
+    def remove(self, name: str):
+        for component_type, callback in self._subscriptions.pop(name, []):
+            self.world.unsubscribe(component_type, callback)
+        self.systems = [system for system in self.systems if system.name != name]
+
+    def run_frame(self, now: float | None = None) -> Dict[str, Any]:
+        """
+        Проходит по системам один кадр.
+
+        :return: { имя системы: результат run } для систем, которые запускались.
+        """
+        if now is None:
+            now = time.perf_counter()
+        results: Dict[str, Any] = {}
+        batch: List[ScheduledSystem] = []
+        for system in self.systems:
+            if not self._is_due(system, now):
+                system.skips += 1
+                continue
+            if system.parallel:
+                if any(system.conflicts_with(other) for other in batch):
+                    self._run_batch(batch, now, results)
+                    batch = []
+                batch.append(system)
+                continue
+            # Последовательная система ждет параллельные, идущие перед ней.
+            self._run_batch(batch, now, results)
+            batch = []
+            results[system.name] = self._run(system, now)
+        self._run_batch(batch, now, results)
+        return results
+
+    def shutdown(self):
+        for name in list(self._subscriptions):
+            for component_type, callback in self._subscriptions.pop(name):
+                self.world.unsubscribe(component_type, callback)
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+    def _is_due(self, system: ScheduledSystem, now: float) -> bool:
+        if system.states is not None and self.state() not in system.states:
+            return False
+        if system.triggers and not system.triggered:
+            return False
+        if system.interval > 0 and now - system.last_run < system.interval:
+            return False
+        return system.is_idle is None or not system.is_idle()
+
+    def _run(self, system: ScheduledSystem, now: float) -> Any:
+        system.last_run = now
+        system.triggered = False
+        system.runs += 1
+        return self.profiler.measure(system.name, system.run)
+
+    def _run_batch(self, batch: List[ScheduledSystem], now: float, results: Dict[str, Any]):
+        if len(batch) <= 1 or self.max_workers <= 0:
+            for system in batch:
+                results[system.name] = self._run(system, now)
+            return
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(self.max_workers, thread_name_prefix="pgg-system")
+        futures = [(system, self._pool.submit(self._run, system, now)) for system in batch]
+        for system, future in futures:
+            results[system.name] = future.result()
+
+    @staticmethod
+    def _make_trigger(system: ScheduledSystem):
+        def on_event(event: ComponentEvent, entity_ids):
+            system.triggered = True
+        return on_event
@@ -0,0 +1,47 @@
+# src/pgg_game/core/startup.py
+
+"""
+Замер запуска игры: от импорта движка до первого кадра меню.
+
+core.engine импортирует этот модуль раньше pygame и систем, поэтому момент
+его импорта — начало этапа "import". Если pygame был импортирован еще раньше
+(например, в скрипте запуска), это время в отчет не попадет.
+"""
+
+import time
+from typing import Dict, List, Tuple
+
+IMPORT_STARTED = time.perf_counter()
+
+
+class StartupReport:
+    """
+    Этапы запуска по порядку. mark(name) закрывает этап, начавшийся после
+    предыдущей отметки; detail добавляет замер внутри этапа (например, шрифты
+    внутри первого кадра).
+    """
+    def __init__(self, started: float = IMPORT_STARTED):
+        self.started = started
+        self.phases: List[Tuple[str, float]] = []
+        self.details: Dict[str, float] = {}
+        self._last = started
+
+    def mark(self, name: str):
+        now = time.perf_counter()
+        self.phases.append((name, now - self._last))
+        self._last = now
+
+    def detail(self, name: str, seconds: float):
+        self.details[name] = self.details.get(name, 0.0) + seconds
+
+    @property
+    def total(self) -> float:
+        return self._last - self.started
+
+    def format(self) -> str:
+        parts = ", ".join(f"{name} {seconds * 1000:.1f}" for name, seconds in self.phases)
+        text = f"Запуск: {self.total * 1000:.1f} мс до первого кадра ({parts} мс)"
+        if self.details:
+            text += "; в том числе " + ", ".join(f"{name} {seconds * 1000:.1f} мс"
+                                                  for name, seconds in self.details.items())
+        return text
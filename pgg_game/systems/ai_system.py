@@ -0,0 +1,282 @@
+# src/pgg_game/systems/ai_system.py
+
+import multiprocessing
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from ..world.game_world import GameWorld, Entity
+from ..world.province_graph import ProvinceGraph
+from ..components.player_input import PlayerInputComponent
+from ..core.commands import Command, CaptureProvinceCommand, EndTurnCommand, CommandError
+from ..config import AI_TIME_BUDGET, AI_MAX_WORKERS, AI_CAPTURES_PER_TURN
+
+# Описание массива в разделяемой памяти: (имя блока, dtype, форма).
+SharedArrayRef = Tuple[str, str, Tuple[int, ...]]
+# Сколько секунд сверх бюджета ждать расчет, прежде чем отменить его с главного потока.
+# Запас нужен на запуск процессов пула и передачу задачи.
+CANCEL_GRACE = 2.0
+
+
+@dataclass(frozen=True)
+class AITask:
+    """
+    Компактный read-only снимок мира для расчета хода ИИ в другом процессе.
+
+    Граф соседства большой и меняется редко, поэтому он передается ссылками
+    на разделяемую память. Владельцы и ценность провинций — небольшие массивы
+    по строкам графа, они копируются в задачу.
+    """
+    player_id: Entity
+    graph: Dict[str, Any]   # indptr/indices/row_entities: массивы или SharedArrayRef
+    owners: np.ndarray      # int64 по строкам графа: ID владельца или -1
+    values: np.ndarray      # int64 по строкам графа: ценность провинции
+    time_budget: float      # Секунды на расчет (отсчитываются с начала работы процесса)
+    max_captures: int
+
+
+# --- Код, выполняющийся в процессах пула ---
+
+# Событие отмены, общее для всех процессов пула (передается через initializer).
+_cancel_event = None
+# Открытые в этом процессе блоки разделяемой памяти: { имя: SharedMemory }.
+# Блоки прежних графов закрываются при первой задаче с другим графом.
+_attached_blocks: Dict[str, shared_memory.SharedMemory] = {}
+
+
+def _init_worker(cancel_event):
+    global _cancel_event
+    _cancel_event = cancel_event
+
+
+def _resolve_array(ref) -> np.ndarray:
+    """Возвращает массив: либо сам ref, либо представление блока разделяемой памяти."""
+    if isinstance(ref, np.ndarray):
+        return ref
+    name, dtype, shape = ref
+    block = _attached_blocks.get(name)
+    if block is None:
+        block = _attached_blocks[name] = shared_memory.SharedMemory(name=name)
+    return np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+
+
+def _detach_stale_blocks(graph: Dict[str, Any]):
+    """
+    Закрывает блоки, которых нет среди ссылок графа задачи. Главный процесс
+    освобождает блоки старого графа (unlink), но память остается занятой,
+    пока блок открыт хотя бы в одном процессе пула.
+    """
+    names = {ref[0] for ref in graph.values() if not isinstance(ref, np.ndarray)}
+    for name in [name for name in _attached_blocks if name not in names]:
+        _attached_blocks.pop(name).close()
+
+
+def _is_cancelled(deadline: float) -> bool:
+    if time.monotonic() >= deadline:
+        return True
+    return _cancel_event is not None and _cancel_event.is_set()
+
+
+def evaluate_ai_turn(task: AITask) -> List[Command]:
+    """
+    Выбирает ходы ИИ: захват самых ценных нейтральных провинций на границе
+    своей территории (или лучшей провинции на карте, если территории еще нет).
+    Расчет векторный по ребрам CSR-графа и прерывается по дедлайну или отмене.
+    """
+    deadline = time.monotonic() + task.time_budget
+    _detach_stale_blocks(task.graph)
+    indptr = _resolve_array(task.graph['indptr'])
+    indices = _resolve_array(task.graph['indices'])
+    row_entities = _resolve_array(task.graph['row_entities'])
+    owners = task.owners.copy()
+    # Для каждого ребра — строка-источник (развертка indptr).
+    edge_sources = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+
+    commands: List[Command] = []
+    for _ in range(task.max_captures):
+        if _is_cancelled(deadline):
+            break
+        neutral = owners < 0
+        owned = owners == task.player_id
+        if owned.any():
+            frontier_edges = owned[edge_sources] & neutral[indices]
+            candidates = np.unique(indices[frontier_edges])
+        else:
+            candidates = np.nonzero(neutral)[0]
+        if len(candidates) == 0:
+            break
+        best = candidates[np.argmax(task.values[candidates])]
+        owners[best] = task.player_id
+        commands.append(CaptureProvinceCommand(task.player_id, int(row_entities[best])))
+    return commands
+
+
+# --- Главный поток ---
+
+class AISystem:
+    """
+    Система ходов компьютерных игроков (игроков без PlayerInputComponent).
+
+    TurnSystem.end_turn вызывает begin_turn, когда ход переходит к ИИ. Расчет
+    уходит в пул процессов, а update на каждом кадре лишь проверяет, готов ли
+    результат, поэтому игровой цикл продолжает держать FPS, пока ИИ думает.
+    Готовые ходы приходят как команды и применяются на главном потоке.
+
+    При max_workers=0 расчет выполняется синхронно (headless-прогоны, отладка).
+    Пул создается в контексте spawn, поэтому скрипт, запускающий Engine,
+    должен создавать его под `if __name__ == "__main__":`.
+    """
+    def __init__(self, max_workers: int = AI_MAX_WORKERS, time_budget: float = AI_TIME_BUDGET,
+                 max_captures: int = AI_CAPTURES_PER_TURN):
+        self.max_workers = max_workers
+        self.time_budget = time_budget
+        self.max_captures = max_captures
+
+        self._executor: ProcessPoolExecutor | None = None
+        self._cancel_event = None
+        # Текущий расчет: (игрок, future) или None.
+        self._pending: Tuple[Entity, Future] | None = None
+        # Когда текущий расчет был отправлен в пул (time.monotonic()).
+        self._dispatched_at = 0.0
+        # Синхронно посчитанные ходы, ожидающие применения в update.
+        self._ready: Tuple[Entity, List[Command]] | None = None
+        # Граф, выложенный в разделяемую память, и ссылки на его массивы.
+        self._shared_graph: ProvinceGraph | None = None
+        self._shared_blocks: List[shared_memory.SharedMemory] = []
+        self._graph_refs: Dict[str, SharedArrayRef] = {}
+
+    @staticmethod
+    def is_ai_player(world: GameWorld, player_id: Entity) -> bool:
+        return world.get_component(player_id, PlayerInputComponent) is None
+
+    @property
+    def is_thinking(self) -> bool:
+        return self._pending is not None or self._ready is not None
+
+    def begin_turn(self, world: GameWorld, player_id: Entity):
+        """Запускает расчет хода ИИ-игрока."""
+        self.cancel()
+        graph = world.province_graph
+        if graph is None:
+            # Карты еще нет — ИИ нечего делать, кроме как завершить ход.
+            self._ready = (player_id, [])
+            return
+
+        task = self._build_task(world, player_id, graph)
+        if self.max_workers <= 0:
+            self._ready = (player_id, evaluate_ai_turn(task))
+            return
+
+        executor = self._ensure_executor()
+        self._cancel_event.clear()
+        self._pending = (player_id, executor.submit(evaluate_ai_turn, task))
+        self._dispatched_at = time.monotonic()
+
+    def cancel(self):
+        """Отменяет текущий расчет; его результат будет отброшен."""
+        if self._pending is not None:
+            self._cancel_event.set()
+            self._pending[1].cancel()
+        self._pending = None
+        self._ready = None
+
+    def update(self, world: GameWorld, turn_system) -> List[Entity]:
+        """
+        Применяет готовые ходы ИИ и завершает его ход.
+
+        :return: ID сущностей, которые изменились (для RenderSystem.mark_dirty).
+        """
+        if self._pending is not None:
+            player_id, future = self._pending
+            if not future.done():
+                if time.monotonic() - self._dispatched_at > self.time_budget + CANCEL_GRACE:
+                    # Процесс не уложился в бюджет: просим его остановиться,
+                    # он вернет уже найденные ходы.
+                    self._cancel_event.set()
+                return []
+            self._pending = None
+            try:
+                commands = [] if future.cancelled() else future.result()
+            except Exception as error:
+                # Расчет упал в процессе пула: ИИ просто завершает ход без захватов.
+                print(f"AISystem: расчет хода не удался ({error!r})")
+                commands = []
+                if isinstance(error, BrokenProcessPool):
+                    # Сломанный пул новых задач не примет: следующий ход создаст новый.
+                    self._executor.shutdown(wait=False, cancel_futures=True)
+                    self._executor = None
+        elif self._ready is not None:
+            player_id, commands = self._ready
+            self._ready = None
+        else:
+            return []
+
+        changed: List[Entity] = []
+        for command in commands:
+            try:
+                changed.extend(turn_system.execute(world, command))
+            except CommandError as error:
+                # Мир мог измениться, пока ИИ думал: такой ход просто пропускаем.
+                print(f"AISystem: ход отклонен ({error})")
+        turn_system.execute(world, EndTurnCommand(player_id))
+        return changed
+
+    def shutdown(self):
+        """Останавливает пул процессов и освобождает разделяемую память."""
+        self.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        self._release_graph()
+
+    def _ensure_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn, а не fork: форк процесса с инициализированным SDL ненадежен.
+            context = multiprocessing.get_context("spawn")
+            self._cancel_event = context.Event()
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=context,
+                initializer=_init_worker,
+                initargs=(self._cancel_event,),
+            )
+        return self._executor
+
+    def _build_task(self, world: GameWorld, player_id: Entity, graph: ProvinceGraph) -> AITask:
+        # Владельцы уже лежат массивом по строкам графа: копируем его целиком.
+        owners = world.province_ownership.owners.copy()
+        # Ценность провинции — сумма ее ресурсов; матрица ресурсов тоже по строкам графа.
+        values = world.province_economy.yields.sum(axis=1)
+
+        if self.max_workers <= 0:
+            graph_arrays = {'indptr': graph.indptr, 'indices': graph.indices, 'row_entities': graph.row_entities}
+        else:
+            graph_arrays = self._share_graph(graph)
+        return AITask(player_id, graph_arrays, owners, values, self.time_budget, self.max_captures)
+
+    def _share_graph(self, graph: ProvinceGraph) -> Dict[str, SharedArrayRef]:
+        """Выкладывает граф в разделяемую память (один раз на каждый новый граф)."""
+        if graph is self._shared_graph:
+            return self._graph_refs
+        self._release_graph()
+        for name in ('indptr', 'indices', 'row_entities'):
+            array = getattr(graph, name)
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+            self._shared_blocks.append(block)
+            self._graph_refs[name] = (block.name, array.dtype.str, array.shape)
+        self._shared_graph = graph
+        return self._graph_refs
+
+    def _release_graph(self):
+        for block in self._shared_blocks:
+            block.close()
+            block.unlink()
+        self._shared_blocks = []
+        self._graph_refs = {}
+        self._shared_graph = None
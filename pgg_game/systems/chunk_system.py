@@ -0,0 +1,185 @@
+# src/pgg_game/systems/chunk_system.py
+
+import math
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from ..world.game_world import GameWorld, Entity
+from ..core.camera import Camera
+from ..components.player_info import PlayerInfoComponent
+from ..components.province_info import ProvinceInfoComponent
+from ..components.renderable import RenderableComponent
+from ..config import CHUNK_SIZE, CHUNK_CACHE_SIZE, CHUNK_PRELOAD_MARGIN, CHUNK_PRELOADS_PER_FRAME
+from .map_generator_system import generate_region_fields, materialize_fields
+
+# Координаты чанка: (столбец, строка) в чанках.
+ChunkKey = Tuple[int, int]
+
+
+class ChunkStreamingSystem:
+    """
+    Потоковая карта: мир разбит на квадратные чанки по chunk_size клеток,
+    и в GameWorld загружены только чанки рядом с камерой.
+
+    - Видимые чанки создаются сразу, соседние (в пределах preload_margin) —
+      заранее, не больше max_preloads за кадр, чтобы не было рывков.
+    - Загруженные чанки хранятся в LRU-порядке. Когда их больше cache_size,
+      самые давно не видимые выгружаются: их сущности удаляются из мира.
+    - Генерация детерминирована (generate_region_fields), поэтому выгруженный
+      чанк при возврате просто генерируется заново. Сохраняется только то, что
+      генератор восстановить не может, — владельцы провинций.
+
+    Так размер карты ограничен лишь числом клеток, а память и стоимость кадра
+    зависят от размера экрана и cache_size.
+
+    Граф соседства (world.province_graph) для потоковой карты не строится:
+    он охватывал бы всю карту целиком.
+    """
+    def __init__(self, width: int, height: int, tile_size: int, camera: Camera, seed: int | None = None,
+                 chunk_size: int = CHUNK_SIZE, cache_size: int = CHUNK_CACHE_SIZE,
+                 preload_margin: int = CHUNK_PRELOAD_MARGIN, max_preloads: int = CHUNK_PRELOADS_PER_FRAME):
+        """
+        :param width: Ширина карты в клетках.
+        :param height: Высота карты в клетках.
+        :param camera: Камера, вокруг которой подгружаются чанки.
+        :param cache_size: Сколько чанков держать загруженными одновременно.
+        """
+        self.width = width
+        self.height = height
+        self.tile_size = tile_size
+        self.camera = camera
+        self.chunk_size = chunk_size
+        self.cache_size = cache_size
+        self.preload_margin = preload_margin
+        self.max_preloads = max_preloads
+        self.seed = seed if seed is not None else int(np.random.SeedSequence().entropy % (2 ** 32))
+        # Для совместимости с MapGenerationSystem: True после первой загрузки.
+        self.map_generated = False
+
+        # Загруженные чанки в LRU-порядке (последний — самый свежий):
+        # { (cx, cy): сетка ID провинций чанка, -1 для пустоты }
+        self._chunks: 'OrderedDict[ChunkKey, np.ndarray]' = OrderedDict()
+        # Состояние выгруженных чанков, которое нельзя сгенерировать заново:
+        # { (cx, cy): { (row, col) внутри чанка: ID владельца } }
+        self._saved_owners: Dict[ChunkKey, Dict[Tuple[int, int], Entity]] = {}
+
+        # Статистика (для профилирования и бенчмарков).
+        self.chunks_loaded = 0
+        self.chunks_evicted = 0
+
+    @property
+    def loaded_chunks(self) -> int:
+        return len(self._chunks)
+
+    # Интерфейс экрана загрузки (как у MapGenerationSystem). Видимые чанки
+    # создаются синхронно в первом update, так что этапов и отмены нет.
+    stage = None
+
+    @property
+    def progress(self) -> float:
+        return 1.0 if self.map_generated else 0.0
+
+    def cancel(self, world: GameWorld):
+        pass
+
+    def update(self, world: GameWorld):
+        if not self.map_generated:
+            print(f"ChunkStreamingSystem: Потоковая карта {self.width}x{self.height} (seed={self.seed})")
+            self.map_generated = True
+
+        visible = self._chunks_in_rect(self.camera.rect, margin=0)
+        nearby = self._chunks_in_rect(self.camera.rect, margin=self.preload_margin)
+
+        for key in visible:
+            self._touch_or_load(world, key)
+
+        preloads = 0
+        for key in nearby:
+            if key in self._chunks:
+                self._chunks.move_to_end(key)
+            elif preloads < self.max_preloads:
+                self._load_chunk(world, key)
+                preloads += 1
+
+        self._evict(world, protected=set(nearby))
+
+    def chunk_of_cell(self, col: int, row: int) -> ChunkKey:
+        return col // self.chunk_size, row // self.chunk_size
+
+    def is_loaded(self, key: ChunkKey) -> bool:
+        return key in self._chunks
+
+    def _chunks_in_rect(self, rect, margin: int) -> List[ChunkKey]:
+        """Чанки, пересекающие прямоугольник мира (в пикселях), с запасом margin чанков."""
+        x, y, width, height = rect
+        chunk_pixels = self.chunk_size * self.tile_size
+        max_cx = math.ceil(self.width / self.chunk_size) - 1
+        max_cy = math.ceil(self.height / self.chunk_size) - 1
+        first_cx = max(0, x // chunk_pixels - margin)
+        first_cy = max(0, y // chunk_pixels - margin)
+        last_cx = min(max_cx, (x + width - 1) // chunk_pixels + margin)
+        last_cy = min(max_cy, (y + height - 1) // chunk_pixels + margin)
+        return [
+            (cx, cy)
+            for cy in range(first_cy, last_cy + 1)
+            for cx in range(first_cx, last_cx + 1)
+        ]
+
+    def _touch_or_load(self, world: GameWorld, key: ChunkKey):
+        if key in self._chunks:
+            self._chunks.move_to_end(key)
+        else:
+            self._load_chunk(world, key)
+
+    def _load_chunk(self, world: GameWorld, key: ChunkKey):
+        cx, cy = key
+        x0 = cx * self.chunk_size
+        y0 = cy * self.chunk_size
+        # Крайние чанки могут быть неполными.
+        width = min(self.chunk_size, self.width - x0)
+        height = min(self.chunk_size, self.height - y0)
+
+        fields = generate_region_fields(x0, y0, width, height, self.seed)
+        cell_entities = materialize_fields(world, fields, self.tile_size)
+
+        saved = self._saved_owners.pop(key, None)
+        if saved:
+            self._restore_owners(world, cell_entities, saved)
+
+        self._chunks[key] = cell_entities
+        self.chunks_loaded += 1
+
+    def _restore_owners(self, world: GameWorld, cell_entities: np.ndarray,
+                        owners: Dict[Tuple[int, int], Entity]):
+        for (row, col), owner_id in owners.items():
+            entity = int(cell_entities[row, col])
+            world.get_component(entity, ProvinceInfoComponent).owner_id = owner_id
+            player_info = world.get_component(owner_id, PlayerInfoComponent)
+            if player_info is not None:
+                world.get_component(entity, RenderableComponent).color = player_info.color
+
+    def _evict(self, world: GameWorld, protected: set):
+        """Выгружает самые давно не использованные чанки сверх cache_size."""
+        if len(self._chunks) <= self.cache_size:
+            return
+        for key in list(self._chunks):
+            if len(self._chunks) <= self.cache_size:
+                break
+            if key not in protected:
+                self._unload_chunk(world, key)
+
+    def _unload_chunk(self, world: GameWorld, key: ChunkKey):
+        cell_entities = self._chunks.pop(key)
+        owners = {}
+        rows, cols = np.nonzero(cell_entities >= 0)
+        entities = cell_entities[rows, cols].tolist()
+        for row, col, entity in zip(rows.tolist(), cols.tolist(), entities):
+            province_info = world.get_component(entity, ProvinceInfoComponent)
+            if province_info is not None and province_info.owner_id is not None:
+                owners[(row, col)] = province_info.owner_id
+        world.delete_entities(entities)
+        if owners:
+            self._saved_owners[key] = owners
+        self.chunks_evicted += 1
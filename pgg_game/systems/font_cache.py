@@ -0,0 +1,81 @@
+# src/pgg_game/systems/font_cache.py
+
+import json
+import os
+from typing import Dict, Tuple
+
+import pygame
+
+from ..config import FONT_CACHE_PATH
+
+
+class FontPathCache:
+    """
+    Пути к файлам системных шрифтов, сохраняемые на диск между запусками.
+
+    pygame.font.SysFont при первом вызове сканирует все системные шрифты
+    (на Linux — через fc-list), и это сотни миллисекунд запуска. Здесь имя
+    шрифта разрешается в путь через pygame.font.match_font один раз, а результат
+    (в том числе "шрифт не найден") записывается в JSON-файл: следующие запуски
+    открывают шрифт по пути, ничего не сканируя.
+
+    Чтобы найти шрифты заново (например, после установки Arial), файл кэша
+    достаточно удалить.
+    """
+    def __init__(self, path: str | None = FONT_CACHE_PATH):
+        """:param path: Файл кэша; None — кэшировать только в памяти."""
+        self.path = path
+        self._entries: Dict[str, dict] = self._read()
+        # Сколько раз пришлось сканировать системные шрифты.
+        self.scans = 0
+
+    def resolve(self, name: str, bold: bool = False) -> Tuple[str | None, bool]:
+        """
+        :return: (путь к файлу шрифта или None, если его нет; нужен ли
+                 искусственный жирный — у шрифта нет отдельного жирного файла).
+        """
+        key = f"{name.lower()}|{'bold' if bold else 'regular'}"
+        entry = self._entries.get(key)
+        if entry is not None and (entry['path'] is None or os.path.exists(entry['path'])):
+            return entry['path'], entry['fake_bold']
+
+        path = pygame.font.match_font(name, bold=bold)
+        # Как и SysFont: без жирного файла берется обычный и утолщается при отрисовке.
+        fake_bold = bold and (path is None or path == pygame.font.match_font(name))
+        self._entries[key] = {'path': path, 'fake_bold': fake_bold}
+        self.scans += 1
+        self._write()
+        return path, fake_bold
+
+    def load(self, name: str, size: int, bold: bool = False) -> pygame.font.Font:
+        """Аналог pygame.font.SysFont(name, size, bold) без сканирования при попадании в кэш."""
+        path, fake_bold = self.resolve(name, bold)
+        # Шрифта нет в системе — встроенный шрифт pygame (как и у SysFont).
+        font = pygame.font.Font(path, size)
+        if fake_bold:
+            font.set_bold(True)
+        return font
+
+    def _read(self) -> Dict[str, dict]:
+        if self.path is None:
+            return {}
+        try:
+            with open(self.path, encoding="utf-8") as file:
+                entries = json.load(file)
+        except (OSError, ValueError):
+            # Кэша еще нет или он испорчен — шрифты просто найдутся заново.
+            return {}
+        return entries if isinstance(entries, dict) else {}
+
+    def _write(self):
+        if self.path is None:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            temp_path = self.path + ".tmp"
+            with open(temp_path, "w", encoding="utf-8") as file:
+                json.dump(self._entries, file, ensure_ascii=False, indent=1)
+            os.replace(temp_path, self.path)
+        except OSError:
+            # Каталог недоступен для записи: игра работает, просто без кэша между запусками.
+            pass
@@ -9,6 +9,23 @@ if TYPE_CHECKING:
     from ..core.engine import Engine, GameState
 
 from ..world.game_world import GameWorld
+from ..components.province_info import ProvinceInfoComponent
+from ..components.selected import SelectedComponent
+from ..core.commands import EndTurnCommand
+from ..config import CAMERA_SPEED, ZOOM_STEP
+
+# Клавиши прокрутки камеры: клавиша -> направление (dx, dy).
+CAMERA_KEYS = {
+    pygame.K_LEFT: (-1, 0), pygame.K_a: (-1, 0),
+    pygame.K_RIGHT: (1, 0), pygame.K_d: (1, 0),
+    pygame.K_UP: (0, -1), pygame.K_w: (0, -1),
+    pygame.K_DOWN: (0, 1), pygame.K_s: (0, 1),
+}
+# Клавиши масштаба: клавиша -> направление (1 — приблизить, -1 — отдалить).
+ZOOM_KEYS = {
+    pygame.K_EQUALS: 1, pygame.K_KP_PLUS: 1,
+    pygame.K_MINUS: -1, pygame.K_KP_MINUS: -1,
+}
 
 class InputSystem:
     """
@@ -24,6 +41,10 @@ class InputSystem:
         :param world: Экземпляр GameWorld для будущих взаимодействий.
         :param engine: Экземпляр Engine для управления состоянием игры.
         """
+        # GameState импортируем здесь: модуль engine сам импортирует InputSystem,
+        # и импорт на уровне модуля привел бы к циклическому импорту.
+        from ..core.engine import GameState
+
         for event in pygame.event.get():
             # 1. Обработка закрытия окна
             if event.type == pygame.QUIT:
@@ -31,26 +52,97 @@ class InputSystem:
             
             # 2. Обработка нажатий клавиш
             if event.type == pygame.KEYDOWN:
-                # Закрытие игры по нажатию на Escape работает всегда
+                # Escape закрывает игру, а во время загрузки — отменяет генерацию карты
                 if event.key == pygame.K_ESCAPE:
-                    self.quit_requested = True
+                    if engine.state == GameState.LOADING:
+                        engine.cancel_loading()
+                    else:
+                        self.quit_requested = True
                 
                 # --- И ИЗМЕНЕНИЕ ЗДЕСЬ ---
                 # Теперь мы сравниваем engine.state напрямую с импортированным GameState.
                 
-                # Если мы в меню, нажатие Enter начинает игру
+                # Если мы в меню, нажатие Enter начинает игру (сначала генерируется карта)
                 if engine.state == GameState.MENU and event.key == pygame.K_RETURN:
-                    engine.change_state(GameState.GAME)
+                    engine.change_state(GameState.LOADING)
 
                 # Если мы в игре, можно добавить другие действия
                 # Например, завершение хода по нажатию на пробел
+                # (пока ходит ИИ, пробел игнорируется)
                 if engine.state == GameState.GAME and event.key == pygame.K_SPACE:
-                    engine.turn_system.end_turn(world)
+                    if engine.turn_system.is_human_turn(world):
+                        player_id = engine.turn_system.get_current_player_id()
+                        engine.turn_system.execute(world, EndTurnCommand(player_id))
+
+                # +/- — масштаб относительно центра экрана, M — миникарта
+                if engine.state == GameState.GAME and event.key in ZOOM_KEYS:
+                    self._zoom_camera(engine, ZOOM_KEYS[event.key])
+                if engine.state == GameState.GAME and event.key == pygame.K_m:
+                    engine.render_system.show_minimap = not engine.render_system.show_minimap
+
+                # F3 — включить/выключить профилировщик и его оверлей
+                if event.key == pygame.K_F3:
+                    engine.profiler.toggle()
 
-            # 3. Обработка кликов мыши (пока только выводим информацию)
+                # F4 — сохранить накопленные замеры в формате Chrome Trace
+                if event.key == pygame.K_F4 and engine.profiler.enabled:
+                    path = engine.profiler.export_chrome_trace()
+                    print(f"Трассировка сохранена: {path}")
+
+            # 3. Обработка кликов мыши: выбор провинции или переход по миникарте
             if event.type == pygame.MOUSEBUTTONDOWN:
                 if engine.state == GameState.GAME:
                     if event.button == 1: # Левая кнопка
-                        mouse_x, mouse_y = event.pos
-                        print(f"Клик в игровом режиме в координатах: ({mouse_x}, {mouse_y})")
-                        # Здесь в Фазе 2 будет логика выбора провинций
+                        target = engine.render_system.minimap_hit(event.pos)
+                        if target is not None:
+                            engine.camera.center_on(*target)
+                        else:
+                            # Клик приходит в координатах экрана, а провинции — в координатах мира.
+                            mouse_x, mouse_y = engine.camera.screen_to_world(*event.pos)
+                            self._select_province_at(world, mouse_x, mouse_y)
+
+            # 4. Колесо мыши меняет масштаб, точка под курсором остается на месте
+            if event.type == pygame.MOUSEWHEEL and engine.state == GameState.GAME and event.y:
+                self._zoom_camera(engine, 1 if event.y > 0 else -1, pygame.mouse.get_pos())
+
+        if engine.state == GameState.GAME:
+            self._scroll_camera(engine)
+
+    def _scroll_camera(self, engine: 'Engine'):
+        """Двигает камеру, пока зажаты стрелки или WASD (скорость не зависит от FPS)."""
+        pressed = pygame.key.get_pressed()
+        dx = dy = 0
+        for key, (step_x, step_y) in CAMERA_KEYS.items():
+            if pressed[key]:
+                dx += step_x
+                dy += step_y
+        if dx or dy:
+            # Скорость — в пикселях экрана: при отдалении камера проходит больше мира.
+            distance = CAMERA_SPEED * engine.clock.get_time() / 1000 / engine.camera.zoom
+            engine.camera.move(dx * distance, dy * distance)
+
+    def _zoom_camera(self, engine: 'Engine', direction: int, anchor=None):
+        """Приближает (direction > 0) или отдаляет камеру в ZOOM_STEP раз."""
+        camera = engine.camera
+        factor = ZOOM_STEP if direction > 0 else 1 / ZOOM_STEP
+        camera.set_zoom(camera.zoom * factor, anchor)
+
+    def _select_province_at(self, world: GameWorld, x: int, y: int):
+        """
+        Выбирает провинцию под курсором, снимая выделение с предыдущей.
+        Поиск идет через пространственный индекс мира, поэтому не зависит
+        от количества провинций на карте.
+        """
+        picked = None
+        for entity in world.query_point(x, y):
+            if world.get_component(entity, ProvinceInfoComponent):
+                picked = entity
+                break
+
+        # Копия нужна, так как remove_component меняет "живое" множество запроса.
+        for selected in list(world.get_entities_with_components(SelectedComponent)):
+            if selected != picked:
+                world.remove_component(selected, SelectedComponent)
+
+        if picked is not None:
+            world.add_component(picked, SelectedComponent())
@@ -1,53 +1,591 @@
 # src/pgg_game/systems/map_generator_system.py
 
-import random
-from ..world.game_world import GameWorld
-from ..config import TILE_SIZE, GRID_WIDTH, GRID_HEIGHT
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List
+
+import numpy as np
+
+from ..world.game_world import GameWorld, gc_paused
+from ..world.province_graph import ProvinceGraph, NeighborsView
+from ..world.ownership import ProvinceOwnership
+from ..world.economy import ProvinceEconomy
+from ..world.territory import TerritoryMap
+from ..config import TILE_SIZE, GRID_WIDTH, GRID_HEIGHT, PROVINCE_CONNECTIVITY, MAP_COMMIT_BUDGET
 from ..components.transform import TransformComponent
 from ..components.renderable import RenderableComponent, ShapeType
 from ..components.province_info import ProvinceInfoComponent
 from ..config import COLORS
 
+# Вероятность того, что клетка окажется "водой" (пустотой без провинции).
+HOLE_CHANCE = 0.1
+# Периоды (в клетках) октав шума рельефа: от крупных форм к мелким деталям.
+TERRAIN_OCTAVES = (16, 8, 4)
+
+# Независимые "каналы" хэш-функции: каждому полю — свой поток случайных чисел.
+_CHANNEL_LAND = 0
+_CHANNEL_JITTER = 1
+_CHANNEL_TERRAIN = 2    # + номер октавы
+
+_UINT64_MASK = (1 << 64) - 1
+
+# Этапы генерации карты и их доля в общем прогрессе.
+# "entities" — подготовка колонок компонентов и создание сущностей в мире.
+MAP_STAGES = ('mask', 'terrain', 'resources', 'entities')
+STAGE_WEIGHTS = {'mask': 0.05, 'terrain': 0.25, 'resources': 0.1, 'entities': 0.6}
+# Сколько провинций подготавливать за один шаг этапа "entities" в фоновом потоке.
+ENTITY_BATCH = 16384
+# Сколько провинций создавать на главном потоке за один шаг (шаги укладываются в бюджет кадра).
+COMMIT_BATCH = 1024
+
+# Колбэк прогресса: (этап, доля этапа от 0 до 1). Может бросить GenerationCancelled.
+ProgressCallback = Callable[[str, float], None]
+
+
+class GenerationCancelled(Exception):
+    """Генерация карты отменена (см. MapGenerationSystem.cancel)."""
+
+
+def _no_progress(stage: str, fraction: float):
+    pass
+
+
+@dataclass
+class MapFields:
+    """
+    Результат генерации прямоугольного участка карты в виде NumPy-массивов
+    формы (height, width). Левый верхний угол участка — клетка (x0, y0).
+    Одинаковый seed всегда дает одинаковые значения в одной и той же клетке,
+    независимо от того, каким участком ее сгенерировали.
+    """
+    seed: int
+    width: int
+    height: int
+    land_mask: np.ndarray               # bool: True — клетка является провинцией
+    terrain: np.ndarray                 # float32 в [0, 1): высота рельефа
+    resources: Dict[str, np.ndarray]    # int32: количество ресурса в клетке
+    x0: int = 0
+    y0: int = 0
+
+
+def _hash_unit(seed: int, channel: int, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+    """
+    Детерминированное псевдослучайное число в [0, 1) для каждой пары целых
+    координат (xs и ys транслируются по правилам NumPy). В отличие от
+    последовательного генератора, значение в клетке не зависит от того,
+    какие еще клетки генерируются, — на этом держится генерация по чанкам.
+    """
+    salt = np.uint64((((seed & 0xFFFFFFFF) << 8) | channel) * 0x165667B19E3779F9 & _UINT64_MASK)
+    h = (np.asarray(xs, dtype=np.int64).view(np.uint64) * np.uint64(0x9E3779B97F4A7C15)) \
+        ^ (np.asarray(ys, dtype=np.int64).view(np.uint64) * np.uint64(0xC2B2AE3D27D4EB4F)) \
+        ^ salt
+    # Финализатор splitmix64: перемешивает биты, чтобы соседние клетки не коррелировали.
+    h ^= h >> np.uint64(30)
+    h *= np.uint64(0xBF58476D1CE4E5B9)
+    h ^= h >> np.uint64(27)
+    h *= np.uint64(0x94D049BB133111EB)
+    h ^= h >> np.uint64(31)
+    return (h >> np.uint64(40)).astype(np.float32) / np.float32(1 << 24)
+
+
+def _value_noise(seed: int, channel: int, x0: int, y0: int, width: int, height: int,
+                 period: int) -> np.ndarray:
+    """
+    Однооктавный value noise: псевдослучайные значения в узлах решетки с шагом
+    period и гладкая билинейная интерполяция между ними. Полностью векторизован.
+    Значения узлов берутся из _hash_unit, поэтому соседние участки карты
+    стыкуются без швов.
+    """
+    ys = np.arange(y0, y0 + height, dtype=np.int64)
+    xs = np.arange(x0, x0 + width, dtype=np.int64)
+    # Номера узлов решетки слева/сверху от клетки (floor работает и для отрицательных).
+    ly = ys // period
+    lx = xs // period
+    first_ly, first_lx = int(ly[0]), int(lx[0])
+    lattice = _hash_unit(
+        seed, channel,
+        np.arange(first_lx, int(lx[-1]) + 2)[None, :],
+        np.arange(first_ly, int(ly[-1]) + 2)[:, None],
+    )
+
+    # smoothstep убирает "ступеньки" на границах ячеек решетки.
+    ty = ((ys - ly * period) / period).astype(np.float32)
+    tx = ((xs - lx * period) / period).astype(np.float32)
+    ty = (ty * ty * (3 - 2 * ty))[:, None]
+    tx = (tx * tx * (3 - 2 * tx))[None, :]
+
+    y0i = ly - first_ly
+    x0i = lx - first_lx
+    top = lattice[y0i][:, x0i] * (1 - tx) + lattice[y0i][:, x0i + 1] * tx
+    bottom = lattice[y0i + 1][:, x0i] * (1 - tx) + lattice[y0i + 1][:, x0i + 1] * tx
+    return top * (1 - ty) + bottom * ty
+
+
+def _generate_land_mask(x0: int, y0: int, width: int, height: int, seed: int) -> np.ndarray:
+    """Маска суши: ~HOLE_CHANCE клеток становятся пустотами."""
+    xs = np.arange(x0, x0 + width, dtype=np.int64)[None, :]
+    ys = np.arange(y0, y0 + height, dtype=np.int64)[:, None]
+    return _hash_unit(seed, _CHANNEL_LAND, xs, ys) >= HOLE_CHANCE
+
+
+def _generate_terrain(x0: int, y0: int, width: int, height: int, seed: int,
+                      report: ProgressCallback = _no_progress) -> np.ndarray:
+    """Рельеф: сумма октав value noise, нормированная в [0, 1)."""
+    terrain = np.zeros((height, width), dtype=np.float32)
+    total_weight = 0.0
+    for octave, period in enumerate(TERRAIN_OCTAVES):
+        weight = 0.5 ** octave
+        terrain += _value_noise(seed, _CHANNEL_TERRAIN + octave, x0, y0, width, height, period) * weight
+        total_weight += weight
+        report('terrain', (octave + 1) / len(TERRAIN_OCTAVES))
+    terrain /= total_weight
+    return terrain
+
+
+def _generate_resources(x0: int, y0: int, seed: int, land_mask: np.ndarray,
+                        terrain: np.ndarray) -> Dict[str, np.ndarray]:
+    """Ресурсы зависят от рельефа: на равнинах больше еды, в горах больше золота."""
+    height, width = land_mask.shape
+    xs = np.arange(x0, x0 + width, dtype=np.int64)[None, :]
+    ys = np.arange(y0, y0 + height, dtype=np.int64)[:, None]
+    jitter = (_hash_unit(seed, _CHANNEL_JITTER, xs, ys) * 3).astype(np.int32)
+    resources = {
+        'gold': (terrain * 6).astype(np.int32) + jitter,
+        'food': ((1 - terrain) * 6).astype(np.int32) + (2 - jitter),
+    }
+    for values in resources.values():
+        values[~land_mask] = 0
+    return resources
+
+
+def generate_region_fields(x0: int, y0: int, width: int, height: int, seed: int,
+                           report: ProgressCallback = _no_progress) -> MapFields:
+    """
+    Генерирует маску суши, рельеф и ресурсы для участка карты width x height
+    с левым верхним углом в клетке (x0, y0). Не создает сущностей и не трогает GameWorld.
+
+    :param report: Колбэк прогресса по этапам mask, terrain, resources.
+    """
+    land_mask = _generate_land_mask(x0, y0, width, height, seed)
+    report('mask', 1.0)
+    terrain = _generate_terrain(x0, y0, width, height, seed, report)
+    resources = _generate_resources(x0, y0, seed, land_mask, terrain)
+    report('resources', 1.0)
+    return MapFields(seed, width, height, land_mask, terrain, resources, x0, y0)
+
+
+def generate_map_fields(width: int, height: int, seed: int) -> MapFields:
+    """
+    Генерирует маску суши, рельеф и ресурсы для всей карты за несколько
+    векторных операций NumPy. Не создает сущностей и не трогает GameWorld.
+    """
+    return generate_region_fields(0, 0, width, height, seed)
+
+
+def materialize_fields(world: GameWorld, fields: MapFields, tile_size: int) -> np.ndarray:
+    """
+    Создает сущности провинций по готовым массивам участка карты.
+    Сущности и компоненты добавляются пакетами (по колонкам), а не по одному.
+
+    :return: Сетка (height, width) с ID провинции в клетке или -1 для пустоты.
+    """
+    rows, cols = np.nonzero(fields.land_mask)
+    columns = _province_columns(fields, rows, cols, tile_size)
+    cell_entities = np.full((fields.height, fields.width), -1, dtype=np.int64)
+    with gc_paused():
+        cell_entities[rows, cols] = _create_provinces(world, columns, 0, len(rows))
+    return cell_entities
+
+
+def _province_columns(fields: MapFields, rows: np.ndarray, cols: np.ndarray,
+                      tile_size: int, province_info: bool = True) -> Dict[type, Dict[str, Any]]:
+    """
+    Колонки компонентов для клеток (rows, cols) участка: { тип компонента: { поле: значения } }.
+
+    :param province_info: Готовить и колонки ProvinceInfoComponent. Без них
+        компоненты провинций строит _ProvinceFactory при первом обращении.
+    """
+    xs = fields.x0 + cols
+    ys = fields.y0 + rows
+    columns = {
+        TransformComponent: {
+            'x': xs * tile_size,
+            'y': ys * tile_size,
+            'width': tile_size,
+            'height': tile_size,
+        },
+        RenderableComponent: {
+            'color': COLORS['province_neutral'],
+            'shape': ShapeType.RECTANGLE,
+            'layer': 1, # Слой карты
+        },
+    }
+    if province_info:
+        # У каждой провинции свой словарь ресурсов (он изменяемый, делить его нельзя).
+        resource_names = list(fields.resources)
+        resource_rows = zip(*(fields.resources[name][rows, cols].tolist() for name in resource_names))
+        columns[ProvinceInfoComponent] = {
+            'name': [f"P-{x}-{y}" for x, y in zip(xs.tolist(), ys.tolist())], # Уникальное имя по координатам
+            'owner_id': None,
+            'resources': [dict(zip(resource_names, values)) for values in resource_rows],
+        }
+    return columns
+
+
+def _concat_columns(parts: List[Dict[type, Dict[str, Any]]]) -> Dict[type, Dict[str, Any]]:
+    """Склеивает колонки, подготовленные порциями (скаляры у всех порций одинаковые)."""
+    columns = {}
+    for component_type, first in parts[0].items():
+        columns[component_type] = {}
+        for name, values in first.items():
+            if isinstance(values, np.ndarray):
+                values = np.concatenate([part[component_type][name] for part in parts])
+            elif isinstance(values, list):
+                values = [value for part in parts for value in part[component_type][name]]
+            columns[component_type][name] = values
+    return columns
+
+
+def _create_provinces(world: GameWorld, columns: Dict[type, Dict[str, Any]], start: int, stop: int) -> List[int]:
+    """Создает провинции start..stop-1 из подготовленных колонок (скаляры общие для всех)."""
+    entities = world.create_entities(stop - start)
+    for component_type, component_columns in columns.items():
+        world.add_component_columns(component_type, entities, {
+            name: values[start:stop] if isinstance(values, (list, np.ndarray)) else values
+            for name, values in component_columns.items()
+        })
+    return entities
+
+
+@dataclass
+class PreparedMap:
+    """
+    Карта, подготовленная без участия GameWorld: поля, колонки компонентов
+    и граф соседства в номерах строк. Осталось только создать сущности
+    (MapGenerationSystem делает это на главном потоке).
+    """
+    fields: MapFields
+    rows: np.ndarray                        # Клетки провинций (в порядке строк графа)
+    cols: np.ndarray
+    columns: Dict[type, Dict[str, Any]]     # См. _province_columns (без ProvinceInfoComponent)
+    topology: ProvinceGraph                 # Граф, где ID провинции = номер строки
+
+    @property
+    def num_provinces(self) -> int:
+        return len(self.rows)
+
+    def resource_matrix(self) -> np.ndarray:
+        """Ресурсы провинций (число провинций, число ресурсов) в порядке fields.resources."""
+        resources = self.fields.resources
+        return np.stack([resources[name][self.rows, self.cols] for name in resources], axis=1)
+
+
+class _ProvinceFactory:
+    """
+    Строит компоненты провинции по номеру строки подготовленной карты
+    (фабрики ленивых хранилищ, см. GameWorld.enable_lazy_storage).
+
+    Миллион провинций не создает миллион экземпляров Transform, Renderable и
+    ProvinceInfo: компонент появляется, только когда к нему обращаются (тайл
+    попал на экран, клик по провинции, захват, сохранение). Владелец нового
+    ProvinceInfoComponent — None: менять владельца и ресурсы можно только через
+    компонент, а значит, уже построенный.
+    Компоненты, построенные до готовности графа, получают соседей в set_graph.
+    """
+    def __init__(self, prepared: PreparedMap):
+        self.xs = prepared.fields.x0 + prepared.cols
+        self.ys = prepared.fields.y0 + prepared.rows
+        self.columns = prepared.columns
+        self.resource_names = list(prepared.fields.resources)
+        self.resources = prepared.resource_matrix()
+        self.graph: ProvinceGraph | None = None
+        # { строка: компонент, построенный без соседей }
+        self._without_neighbors: Dict[int, ProvinceInfoComponent] = {}
+
+    def factory_for(self, component_type: type) -> Callable[[int, int], Any]:
+        """Фабрика для ленивого хранилища типа."""
+        if component_type is ProvinceInfoComponent:
+            return self.province_info
+        return lambda entity, row: self.from_columns(component_type, row)
+
+    def from_columns(self, component_type: type, row: int) -> Any:
+        """Компонент из колонок PreparedMap.columns (скаляры общие для всех)."""
+        return component_type(*(values[row].item() if isinstance(values, np.ndarray) else values
+                                for values in self.columns[component_type].values()))
+
+    def province_info(self, entity: int, row: int) -> ProvinceInfoComponent:
+        component = ProvinceInfoComponent(
+            name=f"P-{self.xs[row]}-{self.ys[row]}", # Уникальное имя по координатам
+            resources=dict(zip(self.resource_names, self.resources[row].tolist())),
+        )
+        if self.graph is None:
+            self._without_neighbors[row] = component
+        else:
+            component.neighbors = NeighborsView(self.graph, row)
+        return component
+
+    def set_graph(self, graph: ProvinceGraph):
+        self.graph = graph
+        for row, component in self._without_neighbors.items():
+            component.neighbors = NeighborsView(graph, row)
+        self._without_neighbors = {}
+
+
+def prepare_map(width: int, height: int, seed: int, tile_size: int,
+                connectivity: int = PROVINCE_CONNECTIVITY, report: ProgressCallback = _no_progress) -> PreparedMap:
+    """
+    Выполняет все этапы генерации, которые не трогают GameWorld, поэтому
+    может работать в фоновом потоке. Прогресс сообщается через report;
+    report может прервать генерацию, бросив GenerationCancelled.
+    """
+    fields = generate_region_fields(0, 0, width, height, seed, report)
+    rows, cols = np.nonzero(fields.land_mask)
+
+    # Колонки готовятся порциями, чтобы прогресс двигался, а отмена срабатывала быстро.
+    parts = []
+    for start in range(0, max(len(rows), 1), ENTITY_BATCH):
+        stop = min(start + ENTITY_BATCH, len(rows))
+        parts.append(_province_columns(fields, rows[start:stop], cols[start:stop], tile_size, province_info=False))
+        # Подготовка колонок — первая половина этапа "entities", создание сущностей — вторая.
+        report('entities', 0.5 * stop / max(len(rows), 1))
+    columns = _concat_columns(parts)
+
+    cell_rows = np.full((height, width), -1, dtype=np.int64)
+    cell_rows[rows, cols] = np.arange(len(rows))
+    topology = ProvinceGraph.from_grid(cell_rows, connectivity)
+    return PreparedMap(fields, rows, cols, columns, topology)
+
+
+class _GenerationJob:
+    """Фоновый поток, выполняющий prepare_map для одной карты."""
+    def __init__(self, width: int, height: int, seed: int, tile_size: int, connectivity: int):
+        self.cancel_event = threading.Event()
+        # Текущий этап и его доля; пишет фоновый поток, читает главный.
+        self.stage = MAP_STAGES[0]
+        self.fraction = 0.0
+        self.result: PreparedMap | None = None
+        self.error: BaseException | None = None
+        self.thread = threading.Thread(
+            target=self._run, args=(width, height, seed, tile_size, connectivity),
+            name="map-generation", daemon=True)
+        self.thread.start()
+
+    @property
+    def done(self) -> bool:
+        return not self.thread.is_alive()
+
+    def _report(self, stage: str, fraction: float):
+        if self.cancel_event.is_set():
+            raise GenerationCancelled()
+        self.stage, self.fraction = stage, fraction
+
+    def _run(self, width: int, height: int, seed: int, tile_size: int, connectivity: int):
+        try:
+            self.result = prepare_map(width, height, seed, tile_size, connectivity, self._report)
+        except GenerationCancelled:
+            pass
+        except Exception as error:
+            # Ошибку перебросит главный поток в MapGenerationSystem.update.
+            self.error = error
+
+
 class MapGenerationSystem:
-    def __init__(self, width: int, height: int, tile_size: int):
+    """
+    Генерация карты целиком (MapGenerationSystem.update создает ее один раз).
+
+    В фоновом режиме (background=True) этапы mask, terrain, resources и
+    подготовка колонок выполняются в отдельном потоке (NumPy отпускает GIL на
+    больших операциях), а сущности создаются на главном потоке порциями, не
+    дольше commit_budget секунд за кадр. Эти сущности появляются в мире сразу,
+    от кадра к кадру (запросы и события компонентов их видят), а граф, владельцы,
+    экономика и территории подставляются последним шагом — только тогда
+    map_generated становится True. Системам, которым нужна карта целиком,
+    надо ждать map_generated. Ход генерации — stage и progress.
+    """
+    def __init__(self, width: int, height: int, tile_size: int, seed: int | None = None,
+                 connectivity: int = PROVINCE_CONNECTIVITY, background: bool = False,
+                 commit_budget: float = MAP_COMMIT_BUDGET):
+        """
+        :param background: Генерировать в фоновом потоке, не блокируя кадры.
+        :param commit_budget: Сколько секунд за кадр тратить на создание сущностей
+            в фоновом режиме.
+        """
         self.width = width
         self.height = height
         self.tile_size = tile_size
+        self.connectivity = connectivity
+        self.background = background
+        self.commit_budget = commit_budget
+        # Если seed не задан, берем случайный, но запоминаем его,
+        # чтобы карту можно было воспроизвести.
+        self.seed = seed if seed is not None else int(np.random.SeedSequence().entropy % (2 ** 32))
         self.map_generated = False
+        # Поля последней сгенерированной карты (маска, рельеф, ресурсы).
+        self.fields: MapFields | None = None
+        # Сетка ID провинций последней карты (-1 — пустота).
+        self.cell_entities: np.ndarray | None = None
+
+        # Текущая фоновая генерация и пошаговое создание ее сущностей.
+        self._job: _GenerationJob | None = None
+        self._commit: Iterator[float] | None = None
+        # Уже созданные сущности незавершенной карты (удаляются при отмене).
+        self._created: List[int] = []
+        # Текущий этап и его доля (для экрана загрузки).
+        self.stage: str | None = None
+        self._stage_fraction = 0.0
+
+    @property
+    def is_generating(self) -> bool:
+        return self._job is not None
+
+    @property
+    def progress(self) -> float:
+        """Общий прогресс генерации от 0 до 1."""
+        if self.map_generated:
+            return 1.0
+        if self.stage is None:
+            return 0.0
+        done = sum(STAGE_WEIGHTS[stage] for stage in MAP_STAGES[:MAP_STAGES.index(self.stage)])
+        return done + STAGE_WEIGHTS[self.stage] * self._stage_fraction
+
+    def regenerate(self, world: GameWorld, seed: int | None = None):
+        """
+        Удаляет текущую карту из мира; новая будет создана на следующем update.
+
+        :param seed: Seed новой карты (None — случайный).
+        """
+        self.cancel(world)
+        if self.cell_entities is not None:
+            world.delete_entities(self.cell_entities[self.cell_entities >= 0].tolist())
+            self.cell_entities = None
+        world.province_graph = None
+        world.province_ownership = None
+        world.province_economy = None
+        world.province_territories = None
+        self.seed = seed if seed is not None else int(np.random.SeedSequence().entropy % (2 ** 32))
+        self.map_generated = False
+
+    def cancel(self, world: GameWorld):
+        """Прерывает фоновую генерацию и удаляет уже созданные ею сущности."""
+        if self._job is None:
+            return
+        self._job.cancel_event.set()
+        self._job = None
+        if self._commit is not None:
+            # Закрытие генератора снова включает сборщик мусора (см. _commit_steps).
+            self._commit.close()
+            self._commit = None
+        if self._created:
+            world.delete_entities(self._created)
+            self._created = []
+        self.stage = None
+        self._stage_fraction = 0.0
+        print("MapGenerationSystem: Генерация карты отменена.")
 
     def update(self, world: GameWorld):
         # Эта система должна сработать только один раз.
         if self.map_generated:
             return
 
-        print("MapGenerationSystem: Начало генерации карты...")
-        
-        # Простая генерация сетки провинций, как в вашем старом проекте.
-        for y in range(self.height):
-            for x in range(self.width):
-                # Пропускаем некоторые тайлы для создания "воды" или пустот
-                if random.random() < 0.1: # 10% шанс пропуска
-                    continue
-                
-                # Создаем сущность для новой провинции
-                province_entity = world.create_entity()
-                
-                # Добавляем компоненты
-                world.add_component(province_entity, TransformComponent(
-                    x=x * self.tile_size,
-                    y=y * self.tile_size,
-                    width=self.tile_size,
-                    height=self.tile_size
-                ))
-                world.add_component(province_entity, RenderableComponent(
-                    color=COLORS['province_neutral'],
-                    shape=ShapeType.RECTANGLE,
-                    layer=1 # Слой карты
-                ))
-                world.add_component(province_entity, ProvinceInfoComponent(
-                    name=f"P-{x}-{y}" # Уникальное имя по координатам
-                ))
+        if not self.background:
+            print(f"MapGenerationSystem: Начало генерации карты (seed={self.seed})...")
+            prepared = prepare_map(self.width, self.height, self.seed, self.tile_size,
+                                   self.connectivity, self._set_stage)
+            # Кадры не ждут, поэтому порции крупнее: меньше накладных расходов на порцию.
+            for _ in self._commit_steps(world, prepared, ENTITY_BATCH):
+                pass
+            return
+
+        if self._job is None:
+            print(f"MapGenerationSystem: Фоновая генерация карты (seed={self.seed})...")
+            self._job = _GenerationJob(self.width, self.height, self.seed, self.tile_size, self.connectivity)
 
-        print(f"MapGenerationSystem: Генерация карты завершена.")
-        self.map_generated = True
+        job = self._job
+        if self._commit is None:
+            self._set_stage(job.stage, job.fraction)
+            if not job.done:
+                return
+            if job.error is not None:
+                self._job = None
+                raise job.error
+            self._commit = self._commit_steps(world, job.result)
+
+        # Создаем сущности, пока не исчерпан бюджет кадра.
+        deadline = time.perf_counter() + self.commit_budget
+        for _ in self._commit:
+            if time.perf_counter() >= deadline:
+                return
+
+    def _set_stage(self, stage: str, fraction: float):
+        self.stage = stage
+        self._stage_fraction = fraction
 
+    def _commit_steps(self, world: GameWorld, prepared: PreparedMap,
+                      batch_size: int = COMMIT_BATCH) -> Iterator[float]:
+        """
+        Создает сущности подготовленной карты порциями по batch_size, отдавая
+        управление после каждой. Компоненты провинций строятся лениво
+        (_ProvinceFactory), а клетки карты пишутся в плотную область TileGrid.
+        Последний шаг подставляет карту в мир целиком:
+        граф, владельцы, cell_entities и map_generated.
+        """
+        count = prepared.num_provinces
+        self._created = []
+        factory = _ProvinceFactory(prepared)
+        # Колоночные хранилища (columnar_storage=True) получают колонки сразу,
+        # остальные типы провинций строятся лениво.
+        eager_columns = {component_type: columns for component_type, columns in prepared.columns.items()
+                         if world.get_columnar_store(component_type) is not None}
+        lazy_types = [component_type for component_type in (*prepared.columns, ProvinceInfoComponent)
+                      if component_type not in eager_columns]
+        for component_type in lazy_types:
+            world.enable_lazy_storage(component_type, factory.factory_for(component_type))
+        # Клетки карты займут плотную область сетки тайлов, а не записи словаря.
+        fields = prepared.fields
+        world.spatial_index.tile_grid.reserve_region(fields.x0, fields.y0, fields.width, fields.height)
+        rects = prepared.columns[TransformComponent]
+        # Сборщик мусора выключен на все время создания (в фоне — между кадрами тоже):
+        # иначе полные сборки по уже созданным провинциям дают паузы в сотни мс.
+        with gc_paused():
+            for start in range(0, count, batch_size):
+                stop = min(start + batch_size, count)
+                entities = _create_provinces(world, eager_columns, start, stop)
+                world.add_lazy_components(lazy_types, entities, np.arange(start, stop), {
+                    name: values[start:stop] if isinstance(values, np.ndarray) else values
+                    for name, values in rects.items()
+                })
+                self._created.extend(entities)
+                # Создание сущностей — вторая половина этапа "entities".
+                self._set_stage('entities', 0.5 + 0.5 * stop / count)
+                yield self.progress
+
+            entities = np.array(self._created, dtype=np.int64)
+            topology = prepared.topology
+            graph = ProvinceGraph(entities, topology.indptr, topology.indices, topology.cell_rows)
+            factory.set_graph(graph)
+
+        # Новая карта целиком нейтральна.
+        ownership = ProvinceOwnership(graph)
+        # Ресурсы берутся прямо из массивов генератора, без обхода компонентов.
+        economy = ProvinceEconomy(ownership, list(prepared.fields.resources), prepared.resource_matrix())
+        yield self.progress
+        # Территориям нужны списки смежности графа: на больших картах это отдельный шаг.
+        territories = TerritoryMap(ownership, self.tile_size)
+        yield self.progress
+
+        # Карта готова: подставляем ее в мир одним шагом.
+        cell_entities = np.full((prepared.fields.height, prepared.fields.width), -1, dtype=np.int64)
+        cell_entities[prepared.rows, prepared.cols] = entities
+        world.province_graph = graph
+        world.province_ownership = ownership
+        world.province_economy = economy
+        world.province_territories = territories
+        self.fields = prepared.fields
+        self.cell_entities = cell_entities
+        self._created = []
+        self._job = None
+        self._commit = None
+        self.map_generated = True
+        print(f"MapGenerationSystem: Генерация карты завершена.")
+        yield 1.0
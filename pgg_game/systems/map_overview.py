@@ -0,0 +1,178 @@
+# src/pgg_game/systems/map_overview.py
+
+import numpy as np
+import pygame
+from typing import Dict, Tuple
+
+from ..world.game_world import GameWorld, Entity
+from ..world.ownership import ProvinceOwnership, NEUTRAL
+from ..components.player_info import PlayerInfoComponent
+from ..core.camera import Camera
+from ..config import COLORS, TILE_SIZE, MINIMAP_SIZE, MINIMAP_MARGIN
+
+# Индексы палитры обзора.
+EMPTY_INDEX = 0         # Клетка без провинции (фон)
+NEUTRAL_INDEX = 1       # Нейтральная провинция
+FIRST_OWNER_INDEX = 2   # Дальше — игроки в порядке появления
+MAX_INDEX = 255
+
+
+class MapOverview:
+    """
+    Упрощенное изображение карты для стратегического масштаба и миникарты.
+
+    Каждая клетка сетки — один пиксель 8-битной поверхности с палитрой:
+    в пикселе хранится индекс (фон, нейтральная провинция или игрок), а цвета
+    игроков заданы палитрой. Индексы записываются через pygame.surfarray,
+    а на экран нужная часть поверхности выводится одним
+    pygame.transform.scale. Поэтому кадр обзора стоит пропорционально размеру
+    экрана, а не карты: что 40x22, что 4000x4000 клеток.
+
+    Смены владельцев приходят от ProvinceOwnership (add_listener) и копятся;
+    перед отрисовкой они записываются в пиксели одной векторной операцией.
+    """
+    def __init__(self, world: GameWorld, ownership: ProvinceOwnership, tile_size: int = TILE_SIZE):
+        graph = ownership.graph
+        if graph.cell_rows is None:
+            raise ValueError("Для обзора карты нужен граф с раскладкой клеток (cell_rows)")
+        self.world = world
+        self.ownership = ownership
+        self.tile_size = tile_size
+        self.grid_height, self.grid_width = graph.cell_rows.shape
+
+        # Клетка каждой строки графа (у провинции ровно одна клетка).
+        ys, xs = np.nonzero(graph.cell_rows >= 0)
+        rows = graph.cell_rows[ys, xs]
+        self._row_x = np.zeros(graph.num_provinces, dtype=np.int64)
+        self._row_y = np.zeros(graph.num_provinces, dtype=np.int64)
+        self._row_x[rows] = xs
+        self._row_y[rows] = ys
+
+        # Индекс палитры каждого встреченного игрока.
+        self._indices: Dict[Entity, int] = {}
+        self.surface = pygame.Surface((self.grid_width, self.grid_height), depth=8)
+        self.surface.set_palette([COLORS['background']] * (MAX_INDEX + 1))
+        self.surface.set_palette_at(NEUTRAL_INDEX, COLORS['province_neutral'])
+
+        # surfarray индексирует пиксели как [x, y].
+        indices = np.full((self.grid_width, self.grid_height), EMPTY_INDEX, dtype=np.uint8)
+        indices[xs, ys] = self._palette_indices(ownership.owners[rows])
+        pygame.surfarray.blit_array(self.surface, indices)
+
+        # Отложенные смены владельцев: { строка графа: новый владелец }.
+        self._pending: Dict[int, Entity] = {}
+        # Растет при каждом применении изменений; по нему перестраиваются кэши.
+        self.version = 0
+        self._view_surface: pygame.Surface | None = None
+        self._view_key = None
+        self._minimap_surface: pygame.Surface | None = None
+        self._minimap_version = -1
+        ownership.add_listener(self._on_owner_changed)
+
+    def flush(self) -> bool:
+        """
+        Записывает накопленные смены владельцев в пиксели.
+
+        :return: True, если изображение изменилось.
+        """
+        if not self._pending:
+            return False
+        rows = np.fromiter(self._pending.keys(), dtype=np.int64, count=len(self._pending))
+        owners = np.fromiter(self._pending.values(), dtype=np.int64, count=len(self._pending))
+        self._pending.clear()
+        pixels = pygame.surfarray.pixels2d(self.surface)
+        pixels[self._row_x[rows], self._row_y[rows]] = self._palette_indices(owners)
+        # Пока жив массив пикселей, поверхность заблокирована и не выводится.
+        del pixels
+        self.version += 1
+        return True
+
+    def draw_view(self, target: pygame.Surface, camera: Camera) -> pygame.Rect:
+        """
+        Рисует видимую камерой часть карты на всю поверхность target
+        (каждая клетка — прямоугольник tile_size * camera.zoom пикселей).
+        """
+        self.flush()
+        key = (camera.x, camera.y, camera.zoom, target.get_size(), self.version)
+        if key != self._view_key:
+            self._view_key = key
+            self._view_surface = self._render_view(target.get_size(), camera)
+        return target.blit(self._view_surface, (0, 0))
+
+    def minimap_rect(self, screen_size: Tuple[int, int]) -> pygame.Rect:
+        """Место миникарты на экране: правый нижний угол, пропорции карты."""
+        scale = MINIMAP_SIZE / max(self.grid_width, self.grid_height)
+        width = max(1, round(self.grid_width * scale))
+        height = max(1, round(self.grid_height * scale))
+        rect = pygame.Rect(0, 0, width, height)
+        rect.bottomright = (screen_size[0] - MINIMAP_MARGIN, screen_size[1] - MINIMAP_MARGIN)
+        return rect
+
+    def draw_minimap(self, target: pygame.Surface, camera: Camera) -> pygame.Rect:
+        """Рисует миникарту с рамкой видимой области и возвращает ее прямоугольник."""
+        self.flush()
+        rect = self.minimap_rect(target.get_size())
+        if self._minimap_version != self.version or self._minimap_surface.get_size() != rect.size:
+            # Масштабирование стоит O(размер миникарты) и нужно только после изменений.
+            self._minimap_surface = pygame.transform.scale(self.surface, rect.size).convert()
+            self._minimap_version = self.version
+        target.blit(self._minimap_surface, rect)
+
+        world_width = self.grid_width * self.tile_size
+        world_height = self.grid_height * self.tile_size
+        frame = pygame.Rect(
+            rect.x + camera.x * rect.width // world_width,
+            rect.y + camera.y * rect.height // world_height,
+            max(2, camera.view_width * rect.width // world_width),
+            max(2, camera.view_height * rect.height // world_height),
+        ).clip(rect)
+        pygame.draw.rect(target, COLORS['highlight'], frame, 1)
+        pygame.draw.rect(target, COLORS['text'], rect, 1)
+        return rect
+
+    def minimap_to_world(self, screen_size: Tuple[int, int], x: int, y: int) -> Tuple[float, float]:
+        """Точка мира под точкой (x, y) миникарты."""
+        rect = self.minimap_rect(screen_size)
+        return ((x - rect.x) * self.grid_width * self.tile_size / rect.width,
+                (y - rect.y) * self.grid_height * self.tile_size / rect.height)
+
+    def _render_view(self, size: Tuple[int, int], camera: Camera) -> pygame.Surface:
+        view = pygame.Surface(size).convert()
+        view.fill(COLORS['background'])
+        tile = self.tile_size
+        # Видимые клетки (с запасом в одну клетку по краям) в пределах карты.
+        left = max(0, camera.x // tile)
+        top = max(0, camera.y // tile)
+        right = min(self.grid_width, (camera.x + camera.view_width) // tile + 1)
+        bottom = min(self.grid_height, (camera.y + camera.view_height) // tile + 1)
+        if right <= left or bottom <= top:
+            return view
+
+        screen_left, screen_top = camera.world_to_screen(left * tile, top * tile)
+        screen_right, screen_bottom = camera.world_to_screen(right * tile, bottom * tile)
+        screen_left, screen_top = round(screen_left), round(screen_top)
+        size = (max(1, round(screen_right) - screen_left), max(1, round(screen_bottom) - screen_top))
+        cells = self.surface.subsurface(pygame.Rect(left, top, right - left, bottom - top))
+        view.blit(pygame.transform.scale(cells, size), (screen_left, screen_top))
+        return view
+
+    def _on_owner_changed(self, row: int, old_owner: Entity, new_owner: Entity):
+        self._pending[row] = new_owner
+
+    def _palette_indices(self, owners: np.ndarray) -> np.ndarray:
+        """Индексы палитры для массива владельцев (NEUTRAL — нейтральная)."""
+        unique, inverse = np.unique(owners, return_inverse=True)
+        lookup = np.array([self._index_of(owner) for owner in unique.tolist()], dtype=np.uint8)
+        return lookup[inverse]
+
+    def _index_of(self, owner: Entity) -> int:
+        if owner == NEUTRAL:
+            return NEUTRAL_INDEX
+        index = self._indices.get(owner)
+        if index is None:
+            # Игроков больше, чем мест в палитре, не бывает; на всякий случай делят последний индекс.
+            index = min(FIRST_OWNER_INDEX + len(self._indices), MAX_INDEX)
+            self._indices[owner] = index
+            player_info = self.world.get_component(owner, PlayerInfoComponent)
+            self.surface.set_palette_at(index, player_info.color if player_info is not None else COLORS['highlight'])
+        return index
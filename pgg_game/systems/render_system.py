@@ -1,50 +1,459 @@
 # src/pgg_game/systems/render_system.py
 
+import bisect
 import pygame
-from ..world.game_world import GameWorld
+from typing import Dict, List, Set, Tuple
+from ..world.game_world import GameWorld, Entity
+from ..world.events import ComponentEvent
+from ..core.camera import Camera
 from ..components.transform import TransformComponent
 from ..components.renderable import RenderableComponent, ShapeType
-from ..config import COLORS
+from ..config import COLORS, TERRITORY_BORDER_WIDTH
+from .map_overview import MapOverview
+
+# Слои до этого номера включительно (фон и тайлы карты) считаются статичными:
+# они рисуются один раз во внеэкранную поверхность и перерисовываются только
+# для "грязных" сущностей. Все, что выше (юниты, эффекты), рисуется каждый кадр.
+STATIC_LAYER_MAX = 1
+
+# Порядок форм внутри одного слоя: сущности одной формы рисуются подряд.
+SHAPE_ORDER = {ShapeType.RECTANGLE: 0, ShapeType.CIRCLE: 1}
+# Ключ корзины очереди отрисовки: (слой, порядок формы).
+BucketKey = Tuple[int, int]
+
+
+class RenderQueue:
+    """
+    Очередь отрисовки динамичных сущностей (слой выше STATIC_LAYER_MAX).
+
+    Сущности разложены по корзинам (слой, форма), ключи корзин хранятся
+    отсортированными. Каждая запись — прямые ссылки на TransformComponent и
+    RenderableComponent, поэтому кадр не сортирует сущности и не ищет их
+    компоненты заново. Очередь обновляется по событиям мира: при добавлении и
+    удалении компонентов, а смену слоя или формы "на месте" нужно сообщить
+    через world.notify_changed(entity, RenderableComponent).
+
+    Компоненты, которые ленивое хранилище еще не построило (тайлы карты, см.
+    LazyComponentStore), очередь не строит и считает статичными.
+    """
+    def __init__(self, world: GameWorld):
+        self.world = world
+        # { ключ: { сущность: (transform, renderable) } }
+        self.buckets: Dict[BucketKey, Dict[Entity, tuple]] = {}
+        # Ключи непустых корзин по возрастанию: порядок отрисовки.
+        self.order: List[BucketKey] = []
+        self._keys: Dict[Entity, BucketKey] = {}
+        # Сущности очереди ровно в одну клетку: индекс держит их в TileGrid
+        # вместе с клетками карты, и запрос tiles=False их не находит.
+        # { сущность: transform }
+        self.tiled: Dict[Entity, TransformComponent] = {}
+        # Сущности, перешедшие между статичными и динамичными слоями, —
+        # кэш карты должен перестроиться (см. RenderSystem.update).
+        self.static_layers_changed = False
+
+        renderables = world.components[RenderableComponent]
+        transforms = world.components[TransformComponent]
+        for entity, renderable in getattr(renderables, 'built_items', renderables.items)():
+            if renderable.layer > STATIC_LAYER_MAX and entity in transforms:
+                self._insert(entity, transforms[entity], renderable)
+        world.subscribe(RenderableComponent, self._on_event)
+        world.subscribe(TransformComponent, self._on_event)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def close(self):
+        """Отписывается от мира."""
+        self.world.unsubscribe(RenderableComponent, self._on_event)
+        self.world.unsubscribe(TransformComponent, self._on_event)
+
+    def _on_event(self, event: ComponentEvent, entity_ids):
+        renderables = self.world.components[RenderableComponent]
+        transforms = self.world.components[TransformComponent]
+        get_renderable = getattr(renderables, 'peek', renderables.get)
+        keys = self._keys
+        for entity in entity_ids:
+            renderable = get_renderable(entity)
+            static = renderable is None or renderable.layer <= STATIC_LAYER_MAX
+            if static and entity not in keys:
+                # Тайлы карты (их большинство) очередь не касаются.
+                continue
+            transform = transforms.get(entity)
+            if static or transform is None:
+                self._discard(entity)
+                if renderable is not None and transform is not None:
+                    # Сущность опустилась в статичный слой: ее надо нарисовать в кэше карты.
+                    self.static_layers_changed = True
+                continue
+            if entity not in keys and event == ComponentEvent.CHANGED:
+                # Тайл поднялся в динамичный слой: из кэша карты его надо стереть.
+                self.static_layers_changed = True
+            self._discard(entity)
+            self._insert(entity, transform, renderable)
+
+    def _insert(self, entity: Entity, transform, renderable):
+        key = (renderable.layer, SHAPE_ORDER[renderable.shape])
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = {}
+            bisect.insort(self.order, key)
+        bucket[entity] = (transform, renderable)
+        self._keys[entity] = key
+        if entity in self.world.spatial_index.tile_grid:
+            self.tiled[entity] = transform
+
+    def _discard(self, entity: Entity):
+        key = self._keys.pop(entity, None)
+        if key is None:
+            return
+        self.tiled.pop(entity, None)
+        bucket = self.buckets[key]
+        del bucket[entity]
+        if not bucket:
+            del self.buckets[key]
+            self.order.remove(key)
+
 
 class RenderSystem:
     """
     Система отрисовки. Теперь отвечает ТОЛЬКО за отрисовку сущностей.
     Очистка экрана и обновление дисплея вынесены в Engine.
+
+    Рисуется только то, что видит камера: сущности выбираются через
+    пространственный индекс мира, поэтому стоимость кадра зависит от размера
+    экрана, а не от размера карты.
+
+    Видимая часть карты (статичные слои) кэшируется в отдельной поверхности
+    размером с экран и выводится на экран одним blit. Если у тайла изменился
+    цвет, форма или владелец, вызывающий код сообщает об этом через mark_dirty,
+    и перерисовывается только этот тайл. При движении камеры кэш сдвигается
+    (Surface.scroll), а дорисовываются только открывшиеся полосы.
+
+    Изменения Renderable "на месте" (world.notify_changed) помечают тайл
+    грязным сами, без явного mark_dirty. Динамичные сущности рисуются по
+    очереди отрисовки (RenderQueue), которая обновляется по событиям мира.
+
+    Клетки по отдельности рисуются только в масштабе 1. При отдалении камеры
+    (camera.zoom < 1) карта выводится обзором (MapOverview): масштабированием
+    массива цветов клеток, без юнитов и контуров. Он же рисует миникарту.
     """
-    def __init__(self, screen: pygame.Surface):
+    def __init__(self, screen: pygame.Surface, camera: Camera | None = None, world: GameWorld | None = None):
+        """
+        :param camera: Камера. По умолчанию — неподвижная камера размером с экран.
+        :param world: Мир, на события которого сразу подписаться. Если не задан,
+            подписка (и сбор очереди отрисовки) происходит на первом update.
+        """
         self.screen = screen
+        self.camera = camera or Camera(*screen.get_size())
+        self._queue: RenderQueue | None = None
 
-    def update(self, world: GameWorld):
+        # Внеэкранная поверхность с уже нарисованной видимой частью карты.
+        self._static_surface = pygame.Surface(screen.get_size()).convert()
+        # Версия запроса (Transform, Renderable), с которой строился кэш.
+        # None — кэш еще не построен или сброшен через invalidate().
+        self._static_version: int | None = None
+        # Положение камеры, для которого нарисован кэш.
+        self._static_origin: Tuple[int, int] = (0, 0)
+        # Прямоугольник (в координатах мира), который занимает каждая
+        # нарисованная в кэше статичная сущность.
+        self._static_rects: Dict[Entity, pygame.Rect] = {}
+        # Сущности, которые нужно перерисовать в кэше на следующем кадре.
+        self._dirty_entities: Set[Entity] = set()
+        # Прямоугольники динамичных сущностей прошлого кадра: их нужно обновить
+        # на дисплее, чтобы стереть старое положение.
+        self._previous_dynamic_rects: List[pygame.Rect] = []
+        # Обзор карты для отдаления и миникарты (строится по ProvinceOwnership мира).
+        self.overview: MapOverview | None = None
+        # Миникарта включается снаружи (Engine — если карта больше экрана, клавиша M).
+        self.show_minimap = False
+        # Прошлый кадр был нарисован обзором: экран не совпадает с кэшем карты.
+        self._overview_drawn = False
+        if world is not None:
+            self._attach(world)
+
+    def mark_dirty(self, entity: Entity):
+        """
+        Сообщает, что у сущности изменились Renderable или владелец,
+        и ее нужно перерисовать в кэше карты.
+        """
+        self._dirty_entities.add(entity)
+
+    def invalidate(self):
+        """Полностью сбрасывает кэш карты (он будет перестроен на следующем кадре)."""
+        self._static_version = None
+
+    def _attach(self, world: GameWorld):
+        """Подписывается на события мира и собирает очередь отрисовки."""
+        if self._queue is not None:
+            self._queue.close()
+            self._queue.world.unsubscribe(RenderableComponent, self._on_renderable_event)
+        self._queue = RenderQueue(world)
+        world.subscribe(RenderableComponent, self._on_renderable_event)
+        self.invalidate()
+
+    def _on_renderable_event(self, event: ComponentEvent, entity_ids):
+        if event == ComponentEvent.CHANGED or event == ComponentEvent.REPLACED:
+            self._dirty_entities.update(entity_ids)
+
+    def update(self, world: GameWorld) -> List[pygame.Rect]:
         """
         Рисует все видимые сущности из мира на экране.
+
+        :return: Список прямоугольников экрана, которые изменились за кадр.
+                 Engine передает его в pygame.display.update.
         """
-        # Получаем все сущности, которые можно отрисовать
-        entities_to_render = world.get_entities_with_components(
-            TransformComponent,
-            RenderableComponent
-        )
-        
+        queue = self._queue
+        if queue is None or queue.world is not world:
+            self._attach(world)
+            queue = self._queue
+        if queue.static_layers_changed:
+            # Сущность перешла между статичным и динамичным слоями: кэш карты строим заново.
+            queue.static_layers_changed = False
+            self.invalidate()
+
+        overview = self._get_overview(world)
+        if overview is not None and self.camera.zoom < 1:
+            return self._render_overview(world, overview)
+        if self._overview_drawn:
+            self._overview_drawn = False
+            self.invalidate()
+
+        version = world.get_query_version(TransformComponent, RenderableComponent)
+        origin = (self.camera.x, self.camera.y)
+
+        dirty_rects = None
+        if version == self._static_version:
+            dirty_rects = self._scroll_static_layer(world, origin)
+            if dirty_rects is not None:
+                redrawn = self._redraw_dirty_entities(world)
+                dirty_rects = None if redrawn is None else dirty_rects + redrawn
+
+        if dirty_rects is None:
+            # Состав сущностей изменился (например, сгенерирована карта) — строим кэш заново.
+            self._rebuild_static_layer(world, origin)
+            self._static_version = version
+            dirty_rects = [self.screen.get_rect()]
+
+        # 1. Карта выводится на экран одним вызовом.
+        self.screen.blit(self._static_surface, (0, 0))
+        # Контуры территорий рисуются поверх карты каждый кадр (ломаные закэшированы),
+        # а на дисплее обновляются только окрестности захваченных клеток.
+        dirty_rects.extend(self._draw_territory_borders(world, origin))
+
+        # 2. Поверх рисуем видимые динамичные сущности: корзины очереди уже идут
+        # в порядке слоев, а внутри слоя сущности одной формы рисуются подряд.
+        dynamic_rects = []
+        if len(queue):
+            # Тайловая сетка индекса — это почти вся карта, поэтому ищем среди
+            # остальных сущностей, а динамичные сущности из сетки (очередь знает их
+            # наперечет) проверяем по прямоугольнику.
+            x, y, width, height = self.camera.rect
+            visible = world.query_rect(x, y, width, height, tiles=False)
+            if queue.tiled:
+                visible |= {entity for entity, transform in queue.tiled.items()
+                            if transform.x < x + width and x < transform.x + transform.width
+                            and transform.y < y + height and y < transform.y + transform.height}
+            for key in queue.order:
+                bucket = queue.buckets[key]
+                if len(bucket) <= len(visible):
+                    pairs = [pair for entity, pair in bucket.items() if entity in visible]
+                else:
+                    pairs = [bucket[entity] for entity in visible if entity in bucket]
+                if pairs:
+                    dynamic_rects.extend(self._draw_bucket(self.screen, key[1], pairs, origin))
+
+        dirty_rects.extend(dynamic_rects)
+        dirty_rects.extend(self._previous_dynamic_rects)
+        self._previous_dynamic_rects = dynamic_rects
+        if overview is not None and self.show_minimap:
+            dirty_rects.append(overview.draw_minimap(self.screen, self.camera))
+        return dirty_rects
+
+    def minimap_hit(self, position: Tuple[int, int]) -> Tuple[float, float] | None:
+        """Точка мира под точкой экрана на миникарте или None, если миникарты там нет."""
+        overview = self.overview
+        if overview is None or not self.show_minimap:
+            return None
+        size = self.screen.get_size()
+        if not overview.minimap_rect(size).collidepoint(position):
+            return None
+        return overview.minimap_to_world(size, *position)
+
+    def _get_overview(self, world: GameWorld) -> MapOverview | None:
+        """Обзор для текущей карты мира; создается заново после генерации или загрузки карты."""
+        ownership = world.province_ownership
+        if ownership is None or ownership.graph.cell_rows is None:
+            self.overview = None
+        elif self.overview is None or self.overview.ownership is not ownership:
+            self.overview = MapOverview(world, ownership)
+        return self.overview
+
+    def _render_overview(self, world: GameWorld, overview: MapOverview) -> List[pygame.Rect]:
+        """Кадр стратегического масштаба: обзор на весь экран и миникарта."""
+        self._overview_drawn = True
+        self._previous_dynamic_rects = []
+        territories = world.province_territories
+        if territories is not None:
+            # Контуры в обзоре не рисуются; изменения для них копить не нужно.
+            territories.drain_changed()
+        overview.draw_view(self.screen, self.camera)
+        if self.show_minimap:
+            overview.draw_minimap(self.screen, self.camera)
+        return [self.screen.get_rect()]
+
+    def _rebuild_static_layer(self, world: GameWorld, origin: Tuple[int, int]):
+        """Перерисовывает весь кэш карты для камеры в точке origin."""
+        self._static_rects.clear()
+        self._dirty_entities.clear()
+        self._static_origin = origin
+        self._draw_static_region(world, self._static_surface.get_rect())
+
+    def _scroll_static_layer(self, world: GameWorld, origin: Tuple[int, int]) -> List[pygame.Rect] | None:
+        """
+        Сдвигает кэш вслед за камерой и дорисовывает открывшиеся полосы.
+
+        :return: Измененные прямоугольники экрана или None, если камера ушла
+                 дальше, чем на экран, и кэш проще построить заново.
+        """
+        if origin == self._static_origin:
+            return []
+        width, height = self._static_surface.get_size()
+        # Содержимое сдвигается в сторону, противоположную движению камеры.
+        dx = self._static_origin[0] - origin[0]
+        dy = self._static_origin[1] - origin[1]
+        if abs(dx) >= width or abs(dy) >= height:
+            return None
+
+        self._static_surface.scroll(dx, dy)
+        self._static_origin = origin
+
+        # Забываем сущности, ушедшие за край экрана.
+        view = pygame.Rect(origin, (width, height))
+        self._static_rects = {
+            entity: rect for entity, rect in self._static_rects.items() if view.colliderect(rect)
+        }
+
+        if dx > 0:
+            self._draw_static_region(world, pygame.Rect(0, 0, dx, height))
+        elif dx < 0:
+            self._draw_static_region(world, pygame.Rect(width + dx, 0, -dx, height))
+        if dy > 0:
+            self._draw_static_region(world, pygame.Rect(0, 0, width, dy))
+        elif dy < 0:
+            self._draw_static_region(world, pygame.Rect(0, height + dy, width, -dy))
+        return [self.screen.get_rect()]
+
+    def _draw_static_region(self, world: GameWorld, screen_rect: pygame.Rect):
+        """Перерисовывает в кэше прямоугольник экрана: фон и все статичные сущности в нем."""
+        surface = self._static_surface
+        origin_x, origin_y = self._static_origin
+        surface.set_clip(screen_rect)
+        surface.fill(COLORS['background'], screen_rect)
+
         # Сортируем по слою для правильного порядка отрисовки
-        sorted_entities = sorted(
-            entities_to_render,
-            key=lambda e: world.get_component(e, RenderableComponent).layer
-        )
+        entities = world.query_rect(origin_x + screen_rect.x, origin_y + screen_rect.y,
+                                    screen_rect.width, screen_rect.height)
+        layered = []
+        for entity in entities:
+            renderable = world.get_component(entity, RenderableComponent)
+            if renderable is not None and renderable.layer <= STATIC_LAYER_MAX:
+                layered.append((renderable.layer, entity, renderable))
+        layered.sort(key=lambda item: item[0])
+
+        for _, entity, renderable in layered:
+            transform = world.get_component(entity, TransformComponent)
+            self._static_rects[entity] = self._draw_entity(surface, transform, renderable, self._static_origin)
+        surface.set_clip(None)
+
+    def _redraw_dirty_entities(self, world: GameWorld) -> List[pygame.Rect] | None:
+        """
+        Перерисовывает в кэше только помеченные сущности. Стоимость — O(изменений).
+
+        :return: Измененные прямоугольники экрана или None, если кэш нужно перестроить целиком.
+        """
+        if not self._dirty_entities:
+            return []
+
+        origin_x, origin_y = self._static_origin
+        dirty_rects = []
+        for entity in self._dirty_entities:
+            old_rect = self._static_rects.get(entity)
+            if old_rect is None:
+                # Сущность динамичная (она и так рисуется каждый кадр) или не видна.
+                continue
 
-        # Проходим по сущностям и рисуем каждую
-        for entity in sorted_entities:
             transform = world.get_component(entity, TransformComponent)
             renderable = world.get_component(entity, RenderableComponent)
+            if renderable.layer > STATIC_LAYER_MAX:
+                # Сущность перешла в динамичный слой: для верного порядка слоев
+                # пересобираем кэш целиком (это редкое событие).
+                return None
+
+            # Стираем старое изображение тайла.
+            old_screen_rect = old_rect.move(-origin_x, -origin_y)
+            self._static_surface.fill(COLORS['background'], old_screen_rect)
+            dirty_rects.append(old_screen_rect)
 
-            if not transform or not renderable:
+            new_rect = self._draw_entity(self._static_surface, transform, renderable, self._static_origin)
+            self._static_rects[entity] = new_rect
+            if new_rect != old_rect:
+                dirty_rects.append(new_rect.move(-origin_x, -origin_y))
+
+        self._dirty_entities.clear()
+        return dirty_rects
+
+    def _draw_territory_borders(self, world: GameWorld, origin: Tuple[int, int]) -> List[pygame.Rect]:
+        """Рисует видимые контуры территорий (TerritoryMap) и возвращает изменившиеся области экрана."""
+        territories = world.province_territories
+        if territories is None:
+            return []
+        origin_x, origin_y = origin
+        view = pygame.Rect(origin, self.screen.get_size()).inflate(TERRITORY_BORDER_WIDTH, TERRITORY_BORDER_WIDTH)
+        color = COLORS['territory_border']
+        for region in territories.regions():
+            if not view.colliderect(territories.bounds(region)):
                 continue
+            for line in territories.border_polylines(region):
+                points = [(x - origin_x, y - origin_y) for x, y in line]
+                pygame.draw.lines(self.screen, color, True, points, TERRITORY_BORDER_WIDTH)
+        return [rect.move(-origin_x, -origin_y) for rect in territories.drain_changed()]
+
+    @staticmethod
+    def _draw_bucket(surface: pygame.Surface, shape_order: int, pairs: List[tuple],
+                     origin: Tuple[int, int]) -> List[pygame.Rect]:
+        """
+        Рисует корзину сущностей одной формы: ветвление по форме — одно на корзину.
 
-            if renderable.shape == ShapeType.RECTANGLE:
-                rect = pygame.Rect(transform.x, transform.y, transform.width, transform.height)
-                pygame.draw.rect(self.screen, renderable.color, rect)
-            
-            elif renderable.shape == ShapeType.CIRCLE:
-                center = (transform.x + transform.width // 2, transform.y + transform.height // 2)
-                radius = min(transform.width, transform.height) // 2
-                pygame.draw.circle(self.screen, renderable.color, center, radius)
+        :return: Занятые прямоугольники в координатах экрана.
+        """
+        origin_x, origin_y = origin
+        rects = []
+        draw_rect = pygame.draw.rect
+        draw_circle = pygame.draw.circle
+        circles = shape_order == SHAPE_ORDER[ShapeType.CIRCLE]
+        for transform, renderable in pairs:
+            width, height = transform.width, transform.height
+            screen_rect = pygame.Rect(transform.x - origin_x, transform.y - origin_y, width, height)
+            if circles:
+                draw_circle(surface, renderable.color, screen_rect.center, min(width, height) // 2)
+            else:
+                draw_rect(surface, renderable.color, screen_rect)
+            rects.append(screen_rect)
+        return rects
+
+    @staticmethod
+    def _draw_entity(surface: pygame.Surface, transform, renderable,
+                     origin: Tuple[int, int] = (0, 0)) -> pygame.Rect:
+        """
+        Рисует одну сущность на поверхности со сдвигом камеры origin
+        и возвращает занятый прямоугольник в координатах мира.
+        """
+        rect = pygame.Rect(transform.x, transform.y, transform.width, transform.height)
+        screen_rect = rect.move(-origin[0], -origin[1])
+        if renderable.shape == ShapeType.RECTANGLE:
+            pygame.draw.rect(surface, renderable.color, screen_rect)
 
-        # ОБРАТИТЕ ВНИМАНИЕ: self.screen.fill() и pygame.display.flip() отсюда УБРАНЫ.
+        elif renderable.shape == ShapeType.CIRCLE:
+            radius = min(transform.width, transform.height) // 2
+            pygame.draw.circle(surface, renderable.color, screen_rect.center, radius)
+        return rect
@@ -0,0 +1,58 @@
+# src/pgg_game/systems/text_cache.py
+
+from collections import OrderedDict
+from typing import Dict
+
+import pygame
+
+# Сколько отрендеренных строк держать в кэше по умолчанию.
+DEFAULT_CAPACITY = 256
+
+
+class TextSurfaceCache:
+    """
+    LRU-кэш поверхностей с отрендеренным текстом.
+
+    font.render — один из самых дорогих вызовов кадра, а строки HUD
+    (меню, номер хода, золото, название провинции) меняются редко.
+    Ключ — (текст, шрифт, цвет, сглаживание); при переполнении вытесняется
+    строка, которая дольше всех не использовалась.
+    """
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self._surfaces: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._surfaces)
+
+    def render(self, text: str, font: pygame.font.Font, color, antialias: bool = True) -> pygame.Surface:
+        """Возвращает поверхность с текстом, рендеря ее только при промахе кэша."""
+        # pygame.Color изменяемый и не хэшируется, поэтому в ключ кладем кортеж.
+        key = (text, font, tuple(color), antialias)
+        surface = self._surfaces.get(key)
+        if surface is not None:
+            self._surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+
+        self.misses += 1
+        surface = font.render(text, antialias, color)
+        self._surfaces[key] = surface
+        if len(self._surfaces) > self.capacity:
+            self._surfaces.popitem(last=False)
+            self.evictions += 1
+        return surface
+
+    def clear(self):
+        self._surfaces.clear()
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': len(self._surfaces),
+        }
@@ -1,21 +1,35 @@
 # src/pgg_game/systems/turn_system.py
 
-from typing import List
+from typing import TYPE_CHECKING, Any, Dict, List
 from ..world.game_world import GameWorld, Entity
 from ..components.player_info import PlayerInfoComponent
 
+if TYPE_CHECKING:
+    from .ai_system import AISystem
+    from ..core.commands import Command
+    from ..core.command_log import CommandLog
+
 class TurnSystem:
     """
     Система управления ходами. Отвечает за определение текущего игрока
     и переход хода к следующему.
     """
-    def __init__(self):
+    def __init__(self, ai_system: 'AISystem | None' = None):
+        """
+        :param ai_system: Система ИИ. Если задана, ход компьютерного игрока
+            (без PlayerInputComponent) автоматически отправляется ей на расчет.
+        """
+        self.ai_system = ai_system
         # Список ID сущностей-игроков, отсортированный по порядку хода.
         self.players: List[Entity] = []
         self.current_turn_index: int = 0
         self.turn_number: int = 1
         # Флаг, чтобы инициализация прошла только один раз.
         self.is_initialized: bool = False
+        # Печатать ли сообщения о смене хода (отключается в headless-прогонах).
+        self.verbose: bool = True
+        # Журнал примененных команд (см. execute); None — не записывать.
+        self.command_log: 'CommandLog | None' = None
 
     def _initialize(self, world: GameWorld):
         """
@@ -37,6 +51,7 @@ class TurnSystem:
             print("TurnSystem: Внимание! В мире не найдено ни одного игрока.")
         
         self.is_initialized = True
+        self._dispatch_ai(world)
 
     def update(self, world: GameWorld):
         """
@@ -46,10 +61,22 @@ class TurnSystem:
         if not self.is_initialized:
             self._initialize(world)
     
+    def execute(self, world: GameWorld, command: 'Command') -> List[Entity]:
+        """
+        Применяет команду и, если она принята, записывает ее в журнал.
+        CommandError пробрасывается вызывающему — отклоненные команды не записываются.
+
+        :return: ID сущностей, чей внешний вид изменился (см. Command.apply).
+        """
+        changed = command.apply(world, self)
+        if self.command_log is not None:
+            self.command_log.append(command)
+        return changed
+
     def end_turn(self, world: GameWorld):
         """
         Завершает текущий ход и передает его следующему игроку.
-        Этот метод будет вызываться извне (например, из InputSystem по нажатию кнопки).
+        Извне вызывается через EndTurnCommand (TurnSystem.execute), чтобы ход попал в журнал.
         """
         if not self.players:
             return  # Нечего делать, если нет игроков
@@ -61,11 +88,63 @@ class TurnSystem:
         # Если мы вернулись к первому игроку (индекс 0), значит, начался новый глобальный ход.
         if self.current_turn_index == 0:
             self.turn_number += 1
-            print(f"--- Начало хода номер {self.turn_number} ---")
-            
+            self._collect_income(world)
+            if self.verbose:
+                print(f"--- Начало хода номер {self.turn_number} ---")
+
+        if self.verbose:
+            current_player_id = self.get_current_player_id()
+            player_info = world.get_component(current_player_id, PlayerInfoComponent)
+            print(f"Ход переходит к игроку: {player_info.name}")
+
+        self._dispatch_ai(world)
+
+    def _collect_income(self, world: GameWorld):
+        """
+        Экономический этап: начисляет всем игрокам доход с провинций.
+        Суммы по владельцам ведет world.province_economy, поэтому этап не
+        зависит от числа провинций. Это часть EndTurnCommand, и в журнал
+        доход отдельными командами не пишется.
+        """
+        economy = world.province_economy
+        if economy is None:
+            return
+        owner_ids, incomes = economy.incomes()
+        for owner_id, income in zip(owner_ids, incomes.tolist()):
+            player_info = world.get_component(owner_id, PlayerInfoComponent)
+            if player_info is not None:
+                player_info.gold += income
+
+    def _dispatch_ai(self, world: GameWorld):
+        """Если сейчас ходит компьютерный игрок, отправляет его ход на расчет."""
         current_player_id = self.get_current_player_id()
-        player_info = world.get_component(current_player_id, PlayerInfoComponent)
-        print(f"Ход переходит к игроку: {player_info.name}")
+        if self.ai_system is None or current_player_id is None:
+            return
+        if self.ai_system.is_ai_player(world, current_player_id):
+            self.ai_system.begin_turn(world, current_player_id)
+
+    def is_human_turn(self, world: GameWorld) -> bool:
+        """True, если сейчас ходит игрок-человек (или ИИ не подключен)."""
+        current_player_id = self.get_current_player_id()
+        if current_player_id is None:
+            return False
+        return self.ai_system is None or not self.ai_system.is_ai_player(world, current_player_id)
+
+    def get_state(self) -> Dict[str, Any]:
+        """Возвращает состояние очередности ходов (для сохранений и реплеев)."""
+        return {
+            'players': list(self.players),
+            'current_turn_index': self.current_turn_index,
+            'turn_number': self.turn_number,
+        }
+
+    def set_state(self, state: Dict[str, Any]):
+        """Восстанавливает состояние, полученное из get_state (например, при загрузке)."""
+        self.players = list(state['players'])
+        self.current_turn_index = state['current_turn_index']
+        self.turn_number = state['turn_number']
+        # Игроки уже известны — повторный поиск в update не нужен.
+        self.is_initialized = True
 
     def get_current_player_id(self) -> Entity | None:
         """Возвращает ID игрока, чей сейчас ход."""
@@ -1,12 +1,33 @@
 # src/pgg_game/systems/ui_system.py
 
+import time
 import pygame
-from ..world.game_world import GameWorld
+from typing import Dict, List
+from ..world.game_world import GameWorld, Entity
+from ..world.events import ComponentChanges
+from ..core.profiler import FrameProfiler
 from .turn_system import TurnSystem
+from .text_cache import TextSurfaceCache
+from .font_cache import FontPathCache
 from ..components.player_info import PlayerInfoComponent
 from ..components.province_info import ProvinceInfoComponent
 from ..components.selected import SelectedComponent
-from ..config import COLORS, SCREEN_WIDTH, SCREEN_HEIGHT
+from ..config import COLORS, SCREEN_WIDTH, SCREEN_HEIGHT, FONT_NAME
+
+# Подписи этапов генерации карты на экране загрузки (см. MAP_STAGES).
+STAGE_TITLES = {
+    'mask': "Суша и вода",
+    'terrain': "Рельеф",
+    'resources': "Ресурсы",
+    'entities': "Провинции",
+}
+
+# Шрифты интерфейса: имя -> (размер, жирный, размер запасного встроенного шрифта).
+FONT_SPECS = {
+    'title': (48, True, 54),
+    'main': (28, False, 32),
+    'small': (20, False, 24),
+}
 
 class UISystem:
     """
@@ -17,92 +38,168 @@ class UISystem:
         self.screen = screen
         self.turn_system = turn_system
         
-        # Загружаем шрифты один раз при инициализации для производительности
-        try:
-            self.font_title = pygame.font.SysFont("Arial", 48, bold=True)
-            self.font_main = pygame.font.SysFont("Arial", 28)
-            self.font_small = pygame.font.SysFont("Arial", 20)
-        except pygame.error:
-            # Запасные шрифты, если системные не найдены
-            self.font_title = pygame.font.Font(None, 54)
-            self.font_main = pygame.font.Font(None, 32)
-            self.font_small = pygame.font.Font(None, 24)
-
-    def _render_text(self, text: str, position: tuple, font: pygame.font.Font, color=COLORS['text'], center=False):
+        # Шрифты загружаются при первом использовании (см. _font), а пути к
+        # системным шрифтам берутся из кэша на диске, чтобы не сканировать их при запуске.
+        self.font_paths = FontPathCache()
+        self._fonts: Dict[str, pygame.font.Font] = {}
+        # Сколько секунд ушло на загрузку шрифтов (для отчета о запуске).
+        self.font_seconds = 0.0
+
+        # Кэш отрендеренного текста: неизменный HUD стоит только blit'ов.
+        self.text_cache = TextSurfaceCache()
+        # Заранее собранные статичные части интерфейса (строятся при первом показе).
+        self._menu_surface: pygame.Surface | None = None
+        self._panel_surface: pygame.Surface | None = None
+        # Выделение отслеживается по изменениям SelectedComponent, а не запросом каждый кадр.
+        self._selection_changes: ComponentChanges | None = None
+        self._selected: Entity | None = None
+
+    @property
+    def font_title(self) -> pygame.font.Font:
+        return self._font('title')
+
+    @property
+    def font_main(self) -> pygame.font.Font:
+        return self._font('main')
+
+    @property
+    def font_small(self) -> pygame.font.Font:
+        return self._font('small')
+
+    def _font(self, key: str) -> pygame.font.Font:
+        font = self._fonts.get(key)
+        if font is None:
+            start = time.perf_counter()
+            size, bold, fallback_size = FONT_SPECS[key]
+            try:
+                font = self.font_paths.load(FONT_NAME, size, bold)
+            except pygame.error:
+                # Запасной шрифт, если системный не открывается
+                font = pygame.font.Font(None, fallback_size)
+            self._fonts[key] = font
+            self.font_seconds += time.perf_counter() - start
+        return font
+
+    def _render_text(self, text: str, position: tuple, font: pygame.font.Font, color=COLORS['text'], center=False,
+                     surface: pygame.Surface | None = None, cached: bool = True):
         """
         Вспомогательная функция для отрисовки текста.
         Добавлен флаг 'center' для удобного центрирования текста.
+
+        :param surface: Куда рисовать (по умолчанию — экран).
+        :param cached: Брать поверхность из text_cache. Для строк, которые меняются
+                       каждый кадр (оверлей профилировщика), кэш только мешает.
         """
-        text_surface = font.render(text, True, color)
+        if cached:
+            text_surface = self.text_cache.render(text, font, color)
+        else:
+            text_surface = font.render(text, True, color)
         text_rect = text_surface.get_rect()
         if center:
             text_rect.center = position
         else:
             text_rect.topleft = position
-        self.screen.blit(text_surface, text_rect)
+        (surface or self.screen).blit(text_surface, text_rect)
+        return text_rect
 
     def update_menu(self):
         """
         Отрисовывает интерфейс главного меню.
         Вызывается из Engine, когда state == GameState.MENU.
+        Меню статично, поэтому собирается в одну поверхность один раз.
         """
+        if self._menu_surface is None:
+            self._menu_surface = self._compose_menu()
+        self.screen.blit(self._menu_surface, (0, 0))
+
+    def _compose_menu(self) -> pygame.Surface:
+        """Рисует все надписи меню на прозрачной поверхности размером с экран."""
+        menu = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
+
         title_pos = (SCREEN_WIDTH // 2, SCREEN_HEIGHT // 3)
-        self._render_text("Procedural Strategy", title_pos, self.font_title, COLORS['highlight'], center=True)
+        self._render_text("Procedural Strategy", title_pos, self.font_title, COLORS['highlight'], center=True, surface=menu)
         
         start_pos = (SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2)
-        self._render_text("Нажмите ENTER, чтобы начать игру", start_pos, self.font_main, center=True)
+        self._render_text("Нажмите ENTER, чтобы начать игру", start_pos, self.font_main, center=True, surface=menu)
         
         exit_pos = (SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 50)
-        self._render_text("Нажмите ESCAPE для выхода", exit_pos, self.font_small, center=True)
+        self._render_text("Нажмите ESCAPE для выхода", exit_pos, self.font_small, center=True, surface=menu)
+        return menu
 
-    def update_game_hud(self, world: GameWorld):
+    def update_loading(self, stage: str | None, progress: float):
+        """
+        Отрисовывает экран загрузки: этап генерации карты и полосу прогресса.
+        Вызывается из Engine, когда state == GameState.LOADING.
+        """
+        center_x = SCREEN_WIDTH // 2
+        self._render_text("Генерация карты...", (center_x, SCREEN_HEIGHT // 3), self.font_title,
+                          COLORS['highlight'], center=True)
+        stage_text = STAGE_TITLES.get(stage, "Подготовка")
+        self._render_text(f"{stage_text}: {int(progress * 100)}%", (center_x, SCREEN_HEIGHT // 2 - 40),
+                          self.font_main, center=True)
+
+        bar = pygame.Rect(0, 0, SCREEN_WIDTH // 2, 24)
+        bar.center = (center_x, SCREEN_HEIGHT // 2)
+        filled = bar.copy()
+        filled.width = int(bar.width * max(0.0, min(progress, 1.0)))
+        pygame.draw.rect(self.screen, COLORS['highlight'], filled)
+        pygame.draw.rect(self.screen, COLORS['text'], bar, 2)
+
+        self._render_text("Нажмите ESCAPE для отмены", (center_x, SCREEN_HEIGHT // 2 + 50), self.font_small,
+                          center=True)
+
+    def update_game_hud(self, world: GameWorld) -> List[pygame.Rect]:
         """
         Отрисовывает игровой HUD (Heads-Up Display).
         Вызывается из Engine, когда state == GameState.GAME.
+
+        :return: Прямоугольники экрана, занятые HUD (для pygame.display.update).
         """
         # Рисуем информационную панель о текущем ходе и игроке
-        self._draw_turn_info(world)
+        dirty_rects = self._draw_turn_info(world)
         
         # Рисуем информацию о выбранной провинции, если таковая есть
-        self._draw_selected_province_info(world)
+        dirty_rects.extend(self._draw_selected_province_info(world))
+        return dirty_rects
 
-    def _draw_turn_info(self, world: GameWorld):
+    def _draw_turn_info(self, world: GameWorld) -> List[pygame.Rect]:
         """Отрисовывает информацию о текущем игроке и ходе вверху экрана."""
         current_player_id = self.turn_system.get_current_player_id()
         if current_player_id is None:
             # Эта надпись теперь будет видна только в первые моменты, пока TurnSystem не найдет игроков
-            self._render_text("Инициализация игроков...", (10, 10), self.font_main)
-            return
+            return [self._render_text("Инициализация игроков...", (10, 10), self.font_main)]
 
         player_info = world.get_component(current_player_id, PlayerInfoComponent)
         if not player_info:
-            return
+            return []
 
         turn_text = f"Ход: {self.turn_system.turn_number}"
         player_text = f"Игрок: {player_info.name}"
         gold_text = f"Золото: {player_info.gold}"
+        # Доход берется из сумм по владельцам, которые ведет ProvinceEconomy, — без обхода провинций.
+        economy = world.province_economy
+        if economy is not None:
+            gold_text += f" (+{economy.income_of(current_player_id)})"
         
         # Рисуем текст с небольшим отступом, используя цвет игрока
-        self._render_text(turn_text, (10, 10), self.font_main, player_info.color)
-        self._render_text(player_text, (180, 10), self.font_main, player_info.color)
-        self._render_text(gold_text, (450, 10), self.font_main, player_info.color)
+        return [
+            self._render_text(turn_text, (10, 10), self.font_main, player_info.color),
+            self._render_text(player_text, (180, 10), self.font_main, player_info.color),
+            self._render_text(gold_text, (450, 10), self.font_main, player_info.color),
+        ]
 
-    def _draw_selected_province_info(self, world: GameWorld):
+    def _draw_selected_province_info(self, world: GameWorld) -> List[pygame.Rect]:
         """Ищет выбранную провинцию и, если находит, рисует информацию о ней."""
-        selected_entities = world.get_entities_with_components(SelectedComponent, ProvinceInfoComponent)
-        
-        if not selected_entities:
-            return # Ничего не выбрано, выходим
-
-        # Берем первую (и по логике единственную) выбранную сущность
-        selected_id = list(selected_entities)[0]
+        selected_id = self._selected_province(world)
+        if selected_id is None:
+            return [] # Ничего не выбрано, выходим
         province_info = world.get_component(selected_id, ProvinceInfoComponent)
         
         # --- Отрисовка инфо-панели внизу экрана ---
-        panel_height = 80
-        info_panel_rect = pygame.Rect(0, SCREEN_HEIGHT - panel_height, SCREEN_WIDTH, panel_height)
-        pygame.draw.rect(self.screen, COLORS['background'], info_panel_rect)
-        pygame.draw.line(self.screen, COLORS['highlight'], (0, SCREEN_HEIGHT - panel_height), (SCREEN_WIDTH, SCREEN_HEIGHT - panel_height), 2)
+        # Фон и рамка панели не меняются — они собраны в поверхность один раз.
+        if self._panel_surface is None:
+            self._panel_surface = self._compose_panel()
+        panel_rect = self.screen.blit(self._panel_surface, (0, SCREEN_HEIGHT - self._panel_surface.get_height()))
         
         # Название провинции
         self._render_text(f"Провинция: {province_info.name}", (20, SCREEN_HEIGHT - 65), self.font_main)
@@ -116,4 +213,58 @@ class UISystem:
                 owner_text = f"Владелец: {owner_info.name}"
                 owner_color = owner_info.color
         self._render_text(owner_text, (20, SCREEN_HEIGHT - 35), self.font_small, owner_color)
+        return [panel_rect]
+
+    def _selected_province(self, world: GameWorld) -> Entity | None:
+        """Выбранная провинция: обновляется только по изменениям выделения с прошлого кадра."""
+        changes = self._selection_changes
+        if changes is None or changes.world is not world:
+            # Первый кадр или новый мир (загрузка, новая игра): выделение ищем запросом один раз.
+            if changes is not None:
+                changes.close()
+            self._selection_changes = ComponentChanges(world, SelectedComponent)
+            # Берем первую (и по логике единственную) выбранную сущность
+            self._selected = next(iter(world.get_entities_with_components(SelectedComponent, ProvinceInfoComponent)), None)
+            return self._selected
+
+        added, removed, _ = changes.drain()
+        if self._selected in removed:
+            self._selected = None
+        for entity in added:
+            if world.get_component(entity, ProvinceInfoComponent) is not None:
+                self._selected = entity
+        return self._selected
+
+    def _compose_panel(self) -> pygame.Surface:
+        """Рисует фон инфо-панели с оранжевой линией сверху."""
+        panel_height = 80
+        # Линия толщиной 2 выходит на пиксель выше панели, поэтому +1.
+        panel = pygame.Surface((SCREEN_WIDTH, panel_height + 1))
+        panel.fill(COLORS['background'])
+        pygame.draw.line(panel, COLORS['highlight'], (0, 1), (SCREEN_WIDTH, 1), 2)
+        return panel
+
+    def draw_profiler_overlay(self, profiler: FrameProfiler, world: GameWorld) -> List[pygame.Rect]:
+        """
+        Рисует оверлей производительности в правом верхнем углу:
+        p50/p95/p99 по каждой системе и кадру, статистику кэша запросов.
+        """
+        lines = ["мс          p50     p95     p99"]
+        for name in profiler.series_names():
+            p50, p95, p99 = profiler.percentiles(name)
+            lines.append(f"{name:<12}{p50:6.2f}  {p95:6.2f}  {p99:6.2f}")
+        stats = world.get_query_stats()
+        lines.append(f"запросы: {stats['hits']} hit / {stats['misses']} miss")
+        text_stats = self.text_cache.get_stats()
+        lines.append(f"текст: {text_stats['hits']} hit / {text_stats['misses']} miss / {text_stats['evictions']} evict")
+
+        line_height = self.font_small.get_linesize()
+        panel_rect = pygame.Rect(SCREEN_WIDTH - 330, 50, 320, line_height * len(lines) + 10)
+        overlay = pygame.Surface(panel_rect.size, pygame.SRCALPHA)
+        overlay.fill((0, 0, 0, 170))
+        self.screen.blit(overlay, panel_rect)
 
+        for index, line in enumerate(lines):
+            position = (panel_rect.x + 8, panel_rect.y + 5 + index * line_height)
+            self._render_text(line, position, self.font_small, COLORS['highlight'], cached=False)
+        return [panel_rect]
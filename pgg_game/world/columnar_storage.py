@@ -0,0 +1,280 @@
+# src/pgg_game/world/columnar_storage.py
+
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pygame
+
+from ..components.transform import TransformComponent
+from ..components.renderable import RenderableComponent, ShapeType
+
+Entity = int
+
+
+@dataclass(frozen=True)
+class ColumnSpec:
+    """
+    Описание одной колонки колоночного хранилища.
+
+    :param name: Имя поля компонента (например, 'x').
+    :param dtype: Тип элементов NumPy-массива.
+    :param shape: Форма одного элемента. () — скаляр, (4,) — например, цвет RGBA.
+    :param encode: Преобразование значения поля в значение для массива.
+    :param decode: Обратное преобразование при чтении через view.
+    """
+    name: str
+    dtype: Any
+    shape: Tuple[int, ...] = ()
+    encode: Optional[Callable[[Any], Any]] = None
+    decode: Optional[Callable[[Any], Any]] = None
+
+
+class ComponentView:
+    """
+    Базовый класс "представления" компонента, хранящегося по колонкам.
+
+    View не хранит данных: каждое обращение к атрибуту читает или пишет
+    соответствующую ячейку NumPy-массива. Благодаря этому код систем вида
+    `transform.x += 1` продолжает работать без изменений.
+    Конкретные классы (TransformComponentView и т.д.) создаются в ColumnarStore.
+    """
+    __slots__ = ('_store', '_entity')
+    # Тип исходного компонента (dataclass), который представляет этот view.
+    _source_component_type: type = None
+
+    def __init__(self, store: 'ColumnarStore', entity: Entity):
+        self._store = store
+        self._entity = entity
+
+    def to_component(self) -> Any:
+        """Создает обычный экземпляр dataclass-компонента с текущими значениями."""
+        return self._source_component_type(
+            **{spec.name: getattr(self, spec.name) for spec in self._store.column_specs}
+        )
+
+    def __eq__(self, other):
+        if isinstance(other, ComponentView):
+            return self._store is other._store and self._entity == other._entity
+        return NotImplemented
+
+    def __hash__(self):
+        return hash((id(self._store), self._entity))
+
+    def __repr__(self):
+        fields = ", ".join(f"{spec.name}={getattr(self, spec.name)!r}" for spec in self._store.column_specs)
+        return f"{type(self).__name__}({fields})"
+
+
+def _make_column_property(spec: ColumnSpec) -> property:
+    """Создает property, читающее/пишущее одну колонку для сущности view."""
+    name = spec.name
+    decode = spec.decode
+    encode = spec.encode
+    is_scalar = spec.shape == ()
+
+    def getter(view: ComponentView):
+        store = view._store
+        value = store._columns[name][store._slot_of[view._entity]]
+        if decode is not None:
+            return decode(value)
+        # Возвращаем обычные числа Python, а не numpy-скаляры:
+        # pygame.Rect и f-строки работают с ними предсказуемо.
+        return value.item() if is_scalar else value
+
+    def setter(view: ComponentView, value):
+        store = view._store
+        store._columns[name][store._slot_of[view._entity]] = encode(value) if encode is not None else value
+
+    return property(getter, setter)
+
+
+class ColumnarStore:
+    """
+    Колоночное (struct-of-arrays) хранилище для компонентов с фиксированной схемой.
+
+    Вместо словаря { EntityID: dataclass } данные лежат в непрерывных NumPy-массивах,
+    по одному массиву на поле. Каждой сущности выделяется плотный слот (индекс строки).
+    При удалении последний слот переносится на место удаленного, поэтому массивы
+    всегда заполнены без дыр: column('x')[:len(store)] — это все X-координаты.
+
+    Хранилище повторяет интерфейс словаря, который использует GameWorld
+    (get, [], in, del, keys, len), поэтому его можно подставить в world.components
+    вместо обычного dict.
+    """
+    def __init__(self, component_type: type, column_specs: List[ColumnSpec], capacity: int = 1024):
+        self.component_type = component_type
+        self.column_specs = list(column_specs)
+        self._count = 0
+        # Сущность -> номер слота. Ключи этого словаря — множество сущностей хранилища.
+        self._slot_of: Dict[Entity, int] = {}
+        # Номер слота -> сущность (обратное отображение, нужно для swap-remove).
+        self._entities = np.empty(capacity, dtype=np.int64)
+        self._columns: Dict[str, np.ndarray] = {
+            spec.name: np.zeros((capacity,) + spec.shape, dtype=spec.dtype)
+            for spec in self.column_specs
+        }
+
+        # Класс view создается один раз на хранилище.
+        properties = {spec.name: _make_column_property(spec) for spec in self.column_specs}
+        properties['__slots__'] = ()
+        properties['_source_component_type'] = component_type
+        self.view_type = type(f"{component_type.__name__}View", (ComponentView,), properties)
+
+    @classmethod
+    def from_arrays(cls, component_type: type, column_specs: List[ColumnSpec],
+                    entities: np.ndarray, columns: Dict[str, np.ndarray]) -> 'ColumnarStore':
+        """
+        Создает хранилище поверх готовых массивов без поэлементного копирования.
+
+        Массивы могут быть numpy.memmap (например, из сохранения): тогда данные
+        читаются с диска только при обращении к соответствующим страницам.
+        При росте хранилища массивы копируются в обычную память.
+        """
+        store = cls(component_type, column_specs, capacity=0)
+        store._entities = entities
+        store._columns = dict(columns)
+        store._count = len(entities)
+        store._slot_of = dict(zip(entities.tolist(), range(len(entities))))
+        return store
+
+    # --- Интерфейс словаря, который использует GameWorld ---
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, entity_id: Entity) -> bool:
+        return entity_id in self._slot_of
+
+    def __iter__(self) -> Iterator[Entity]:
+        return iter(self._slot_of)
+
+    def keys(self):
+        return self._slot_of.keys()
+
+    def values(self) -> Iterator[ComponentView]:
+        return (self.view_type(self, entity_id) for entity_id in self._slot_of)
+
+    def items(self) -> Iterator[Tuple[Entity, ComponentView]]:
+        return ((entity_id, self.view_type(self, entity_id)) for entity_id in self._slot_of)
+
+    def get(self, entity_id: Entity, default: Any = None) -> Any:
+        if entity_id not in self._slot_of:
+            return default
+        return self.view_type(self, entity_id)
+
+    def __getitem__(self, entity_id: Entity) -> ComponentView:
+        if entity_id not in self._slot_of:
+            raise KeyError(entity_id)
+        return self.view_type(self, entity_id)
+
+    def __setitem__(self, entity_id: Entity, component_instance: Any):
+        slot = self._slot_of.get(entity_id)
+        if slot is None:
+            slot = self._allocate_slot(entity_id)
+        for spec in self.column_specs:
+            value = getattr(component_instance, spec.name)
+            self._columns[spec.name][slot] = spec.encode(value) if spec.encode is not None else value
+
+    def __delitem__(self, entity_id: Entity):
+        slot = self._slot_of.pop(entity_id)
+        last = self._count - 1
+        if slot != last:
+            # Переносим последнюю строку на место удаленной, чтобы не оставлять дыр.
+            moved_entity = int(self._entities[last])
+            self._entities[slot] = moved_entity
+            for column in self._columns.values():
+                column[slot] = column[last]
+            self._slot_of[moved_entity] = slot
+        self._count = last
+
+    def extend(self, entity_ids: List[Entity], columns: Dict[str, Any]):
+        """
+        Добавляет много новых сущностей за одну операцию на колонку.
+
+        :param columns: { поле: значения }. NumPy-массив записывается как есть
+            (в формате колонки), список значений полей кодируется поэлементно,
+            одно значение (не список) кодируется один раз и записывается во все строки.
+        """
+        count = len(entity_ids)
+        first = self._count
+        if first + count > len(self._entities):
+            self._grow(max(16, (first + count) * 2))
+        rows = slice(first, first + count)
+        self._entities[rows] = entity_ids
+        for spec in self.column_specs:
+            values = columns[spec.name]
+            if isinstance(values, np.ndarray):
+                self._columns[spec.name][rows] = values
+            elif isinstance(values, (list, tuple, range)):
+                if spec.encode is not None:
+                    values = [spec.encode(value) for value in values]
+                self._columns[spec.name][rows] = values
+            else:
+                self._columns[spec.name][rows] = spec.encode(values) if spec.encode is not None else values
+        self._slot_of.update(zip(entity_ids, range(first, first + count)))
+        self._count += count
+
+    # --- Векторный доступ для систем ---
+
+    def column(self, name: str) -> np.ndarray:
+        """
+        Возвращает изменяемый срез колонки для всех занятых слотов.
+        Запись в срез сразу меняет данные компонентов.
+        """
+        return self._columns[name][:self._count]
+
+    def entity_array(self) -> np.ndarray:
+        """Возвращает ID сущностей в порядке слотов (только для чтения)."""
+        entities = self._entities[:self._count]
+        entities.flags.writeable = False
+        return entities
+
+    def slot_of(self, entity_id: Entity) -> int:
+        """Возвращает номер слота сущности."""
+        return self._slot_of[entity_id]
+
+    # --- Служебные методы ---
+
+    def _allocate_slot(self, entity_id: Entity) -> int:
+        slot = self._count
+        if slot == len(self._entities):
+            self._grow(max(16, slot * 2))
+        self._entities[slot] = entity_id
+        self._slot_of[entity_id] = slot
+        self._count += 1
+        return slot
+
+    def _grow(self, new_capacity: int):
+        """Увеличивает емкость всех массивов (амортизированно O(1) на вставку)."""
+        self._entities = np.resize(self._entities, new_capacity)
+        for name, column in self._columns.items():
+            grown = np.zeros((new_capacity,) + column.shape[1:], dtype=column.dtype)
+            grown[:self._count] = column[:self._count]
+            self._columns[name] = grown
+
+
+# --- Стандартные схемы для компонентов с фиксированным набором полей ---
+
+TRANSFORM_COLUMNS = [
+    ColumnSpec('x', np.int32),
+    ColumnSpec('y', np.int32),
+    ColumnSpec('width', np.int32),
+    ColumnSpec('height', np.int32),
+]
+
+RENDERABLE_COLUMNS = [
+    # Цвет хранится как RGBA в uint8, а наружу отдается как pygame.Color.
+    ColumnSpec('color', np.uint8, (4,),
+               encode=lambda color: tuple(pygame.Color(color)),
+               decode=lambda rgba: pygame.Color(*rgba.tolist())),
+    ColumnSpec('shape', np.int8,
+               encode=lambda shape: shape.value,
+               decode=lambda value: ShapeType(int(value))),
+    ColumnSpec('layer', np.int16),
+]
+
+DEFAULT_COLUMN_SCHEMAS: Dict[type, List[ColumnSpec]] = {
+    TransformComponent: TRANSFORM_COLUMNS,
+    RenderableComponent: RENDERABLE_COLUMNS,
+}
@@ -0,0 +1,126 @@
+# src/pgg_game/world/economy.py
+
+from typing import TYPE_CHECKING, Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from .ownership import ProvinceOwnership, NEUTRAL
+from ..components.province_info import ProvinceInfoComponent
+from ..config import RESOURCE_INCOME
+
+if TYPE_CHECKING:
+    from .game_world import GameWorld
+
+Entity = int
+
+
+class ProvinceEconomy:
+    """
+    Ресурсы провинций матрицей по строкам ProvinceGraph и их суммы по владельцам.
+
+    yields[row, column] — количество ресурса resource_names[column] в провинции.
+    Суммы по игрокам не пересчитываются обходом провинций: они поправляются
+    на одну строку yields при каждой смене владельца (подписка на
+    ProvinceOwnership) и при set_resources. Поэтому доход всех игроков за ход —
+    одно матричное умножение сумм на цены ресурсов, независимо от размера карты.
+
+    Ресурсы провинции нужно менять через set_resources, а не в компоненте напрямую.
+    """
+    def __init__(self, ownership: ProvinceOwnership, resource_names: Iterable[str], yields: np.ndarray,
+                 income_rates: Dict[str, int] = RESOURCE_INCOME):
+        """
+        :param yields: int64 (число провинций, число ресурсов) по строкам графа.
+        :param income_rates: Золота за единицу ресурса (ресурсы не из словаря — 0).
+        """
+        self.ownership = ownership
+        self.graph = ownership.graph
+        self.resource_names: List[str] = list(resource_names)
+        self.yields = np.ascontiguousarray(yields, dtype=np.int64).reshape(self.graph.num_provinces,
+                                                                          len(self.resource_names))
+        self.income_rates = dict(income_rates)
+        self._rates = self._rate_vector()
+        # Строка сумм для каждого встреченного владельца: { ID игрока: строка totals }.
+        self._slots: Dict[Entity, int] = {}
+        self.totals = np.zeros((0, len(self.resource_names)), dtype=np.int64)
+        self.rebuild()
+        ownership.add_listener(self._on_owner_changed)
+
+    @classmethod
+    def from_world(cls, world: 'GameWorld', ownership: ProvinceOwnership) -> 'ProvinceEconomy':
+        """Собирает матрицу по текущим ProvinceInfoComponent (например, после загрузки)."""
+        graph = ownership.graph
+        resources = []
+        for entity in graph.row_entities.tolist():
+            province_info = world.get_component(entity, ProvinceInfoComponent)
+            # Провинция могла быть удалена после построения графа.
+            resources.append(province_info.resources if province_info is not None else {})
+        names = sorted({name for values in resources for name in values})
+        yields = np.array([[values.get(name, 0) for name in names] for values in resources], dtype=np.int64)
+        return cls(ownership, names, yields)
+
+    def rebuild(self):
+        """Пересчитывает суммы по владельцам с нуля (векторно, без обхода компонентов)."""
+        owners = self.ownership.owners
+        owned = owners != NEUTRAL
+        owner_ids, slots = np.unique(owners[owned], return_inverse=True)
+        self._slots = {owner: slot for slot, owner in enumerate(owner_ids.tolist())}
+        self.totals = np.zeros((len(owner_ids), len(self.resource_names)), dtype=np.int64)
+        np.add.at(self.totals, slots, self.yields[owned])
+
+    def set_resources(self, world: 'GameWorld', entity: Entity, resources: Dict[str, int]):
+        """Заменяет ресурсы провинции и поправляет сумму ее владельца."""
+        row = self.graph.row_of(entity)
+        if row < 0:
+            raise KeyError(f"Сущность {entity} не является провинцией графа")
+        for name in resources:
+            if name not in self.resource_names:
+                self._add_resource(name)
+        new_row = np.array([resources.get(name, 0) for name in self.resource_names], dtype=np.int64)
+        owner = int(self.ownership.owners[row])
+        if owner != NEUTRAL:
+            slot = self._slot(owner)
+            self.totals[slot] += new_row - self.yields[row]
+        self.yields[row] = new_row
+        world.get_component(entity, ProvinceInfoComponent).resources = dict(resources)
+
+    def totals_of(self, owner_id: Entity) -> Dict[str, int]:
+        """Суммарные ресурсы провинций игрока."""
+        slot = self._slots.get(owner_id)
+        if slot is None:
+            return {name: 0 for name in self.resource_names}
+        return dict(zip(self.resource_names, self.totals[slot].tolist()))
+
+    def income_of(self, owner_id: Entity) -> int:
+        """Доход игрока в золоте за глобальный ход."""
+        slot = self._slots.get(owner_id)
+        return 0 if slot is None else int(self.totals[slot] @ self._rates)
+
+    def incomes(self) -> Tuple[List[Entity], np.ndarray]:
+        """Доходы всех владельцев одним умножением: (ID игроков, доход каждого)."""
+        return list(self._slots), self.totals @ self._rates
+
+    def _on_owner_changed(self, row: int, old_owner: Entity, new_owner: Entity):
+        # _slot может заменить массив totals, поэтому строку получаем до индексации.
+        if old_owner != NEUTRAL:
+            slot = self._slot(old_owner)
+            self.totals[slot] -= self.yields[row]
+        if new_owner != NEUTRAL:
+            slot = self._slot(new_owner)
+            self.totals[slot] += self.yields[row]
+
+    def _slot(self, owner_id: Entity) -> int:
+        slot = self._slots.get(owner_id)
+        if slot is None:
+            slot = len(self._slots)
+            self._slots[owner_id] = slot
+            self.totals = np.vstack([self.totals, np.zeros((1, len(self.resource_names)), dtype=np.int64)])
+        return slot
+
+    def _add_resource(self, name: str):
+        self.resource_names.append(name)
+        self.yields = np.hstack([self.yields, np.zeros((len(self.yields), 1), dtype=np.int64)])
+        self.totals = np.hstack([self.totals, np.zeros((len(self.totals), 1), dtype=np.int64)])
+        self._rates = self._rate_vector()
+
+    def _rate_vector(self) -> np.ndarray:
+        return np.array([self.income_rates.get(name, 0) for name in self.resource_names], dtype=np.int64)
@@ -0,0 +1,69 @@
+# src/pgg_game/world/events.py
+
+"""
+Уведомления об изменениях компонентов.
+
+GameWorld сообщает подписчикам (GameWorld.subscribe) о добавлении, удалении
+и явных изменениях (GameWorld.notify_changed) компонентов заданного типа.
+Благодаря этому системы и кэши делают работу, пропорциональную изменениям,
+а не обходят мир каждый кадр.
+
+Слушатель получает событие и список ID сущностей: пакетные операции мира
+(add_components, delete_entities) присылают одно событие на весь пакет.
+"""
+
+from enum import Enum, auto
+from typing import TYPE_CHECKING, Callable, Sequence, Set, Tuple
+
+if TYPE_CHECKING:
+    from .game_world import GameWorld, ComponentType
+
+Entity = int
+
+
+class ComponentEvent(Enum):
+    ADDED = auto()      # Компонент появился у сущности
+    REMOVED = auto()    # Компонент убран (remove_component, удаление сущности)
+    REPLACED = auto()   # add_component для сущности, у которой компонент уже был
+    CHANGED = auto()    # Поля изменены "на месте" (GameWorld.notify_changed)
+
+
+ComponentListener = Callable[[ComponentEvent, Sequence[Entity]], None]
+
+
+class ComponentChanges:
+    """
+    Накопитель изменений одного типа компонента между кадрами.
+
+    Система заводит его один раз и в начале своего update забирает
+    накопленное через drain(): так она узнает, что поменялось с прошлого кадра,
+    не подписывая собственный колбэк.
+    """
+    def __init__(self, world: 'GameWorld', component_type: 'ComponentType'):
+        self.world = world
+        self.component_type = component_type
+        self.added: Set[Entity] = set()
+        self.removed: Set[Entity] = set()
+        self.changed: Set[Entity] = set()
+        world.subscribe(component_type, self._on_event)
+
+    def _on_event(self, event: ComponentEvent, entity_ids: Sequence[Entity]):
+        if event == ComponentEvent.ADDED:
+            self.added.update(entity_ids)
+            self.removed.difference_update(entity_ids)
+        elif event == ComponentEvent.REMOVED:
+            self.removed.update(entity_ids)
+            self.added.difference_update(entity_ids)
+            self.changed.difference_update(entity_ids)
+        else:
+            self.changed.update(entity_ids)
+
+    def drain(self) -> Tuple[Set[Entity], Set[Entity], Set[Entity]]:
+        """Возвращает (added, removed, changed) с прошлого вызова и начинает копить заново."""
+        result = (self.added, self.removed, self.changed)
+        self.added, self.removed, self.changed = set(), set(), set()
+        return result
+
+    def close(self):
+        """Отписывается от мира."""
+        self.world.unsubscribe(self.component_type, self._on_event)
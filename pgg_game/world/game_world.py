@@ -1,13 +1,74 @@
 # src/pgg_game/world/game_world.py
 
-from typing import Dict, Type, Any, Set, Optional, List
+from typing import Dict, Type, Any, Set, Optional, List, FrozenSet, Iterable, Mapping, Sequence, Tuple
+import gc
 from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import fields
+from itertools import repeat
+
+import numpy as np
+
+from .spatial_index import SpatialIndex
+from .events import ComponentEvent, ComponentListener
+from ..components.transform import TransformComponent
+from ..config import TILE_SIZE
 
 # Это базовые типы, которые мы будем использовать для ясности.
 # Entity — это просто уникальный идентификатор (число).
 Entity = int
 # ComponentType — это любой из наших классов компонентов (например, TransformComponent).
 ComponentType = Type[Any]
+# Ключ запроса — неупорядоченный набор типов компонентов.
+# (Transform, Renderable) и (Renderable, Transform) — один и тот же запрос.
+QueryKey = FrozenSet[ComponentType]
+
+# ID сущности состоит из двух частей: младшие ENTITY_INDEX_BITS бит — номер слота
+# (слоты удаленных сущностей переиспользуются, поэтому номера остаются плотными),
+# старшие — поколение слота. При удалении поколение увеличивается, и старые ID,
+# сохраненные где-то в игре, перестают совпадать с живой сущностью.
+# У первого поколения ID совпадает с номером слота: 0, 1, 2, ...
+ENTITY_INDEX_BITS = 32
+ENTITY_INDEX_MASK = (1 << ENTITY_INDEX_BITS) - 1
+# Поколение ограничено 31 битом, чтобы ID помещались в int64 (массивы NumPy, снимки).
+ENTITY_GENERATION_MASK = (1 << 31) - 1
+
+
+def entity_index(entity_id: Entity) -> int:
+    """Номер слота сущности (плотный индекс для массивов и битовых масок)."""
+    return entity_id & ENTITY_INDEX_MASK
+
+
+def entity_generation(entity_id: Entity) -> int:
+    """Поколение слота, к которому относится ID."""
+    return entity_id >> ENTITY_INDEX_BITS
+
+
+@contextmanager
+def gc_paused():
+    """
+    Отключает циклический сборщик мусора на время массового создания компонентов.
+    Сборщик запускается по числу новых объектов и каждый раз обходит все уже
+    созданные, поэтому на миллионе провинций он съедает до половины времени.
+    Компоненты — простые dataclass без циклов, так что пауза безопасна.
+    """
+    was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if was_enabled:
+            gc.enable()
+
+
+def _column_values(column: Any, count: int) -> Iterable[Any]:
+    """Значения колонки как итерируемое длины count (одно значение повторяется)."""
+    if hasattr(column, 'tolist'):
+        # NumPy-массив: обычные числа Python вместо numpy-скаляров.
+        return column.tolist()
+    if isinstance(column, (list, tuple, range)):
+        return column
+    return repeat(column, count)
 
 
 class GameWorld:
@@ -21,10 +82,32 @@ class GameWorld:
     - Системы (Systems) будут запрашивать у этого мира данные для обработки.
 
     Сам GameWorld не содержит никакой игровой логики, только управляет данными.
+    Об изменениях компонентов он сообщает подписчикам (см. subscribe и world/events.py).
     """
-    def __init__(self):
-        # Счетчик для генерации уникальных ID для каждой новой сущности.
-        self.next_entity_id: Entity = 0
+    def __init__(self, columnar_storage: bool = False):
+        """
+        :param columnar_storage: Если True, компоненты с фиксированной схемой
+            (TransformComponent, RenderableComponent) хранятся в NumPy-колонках
+            (см. enable_columnar_storage).
+        """
+        # --- Учет сущностей по слотам (индекс слота = entity_index(ID)) ---
+        # Текущее поколение каждого слота.
+        self._generations: List[int] = []
+        # 1 — в слоте живая сущность, 0 — слот свободен.
+        self._alive = bytearray()
+        # Битовая маска компонентов каждой сущности (см. _component_bits).
+        # Благодаря ей удаление трогает только хранилища, где сущность есть.
+        self._masks: List[int] = []
+        # Свободные слоты удаленных сущностей (берутся с конца).
+        self._free_indices: List[int] = []
+        # Номер бита в маске для каждого типа компонента и обратное отображение.
+        self._component_bits: Dict[ComponentType, int] = {}
+        self._component_types_by_bit: List[ComponentType] = []
+        # Кэш разбора масок: { маска: (тип, ...) }. Различных масок в игре единицы.
+        self._types_by_mask: Dict[int, Tuple[ComponentType, ...]] = {}
+        # Запросы, которые может затронуть удаление сущности с такой маской
+        # (сбрасывается при регистрации нового запроса).
+        self._queries_by_mask: Dict[int, Tuple[QueryKey, ...]] = {}
 
         # Основное хранилище компонентов.
         # Это словарь словарей, структурированный для быстрого доступа:
@@ -36,13 +119,271 @@ class GameWorld:
         # нового типа, так как не требует предварительной проверки ключа.
         self.components: Dict[ComponentType, Dict[Entity, Any]] = defaultdict(dict)
 
+        # --- Кэш запросов (query views) ---
+        # Для каждого зарегистрированного запроса храним готовое множество сущностей,
+        # которое поддерживается в актуальном состоянии при add_component,
+        # remove_component и delete_entity. Повторный запрос стоит O(1).
+        # { frozenset({Transform, Renderable}): {0, 1, 2, ...} }
+        self._query_views: Dict[QueryKey, Set[Entity]] = {}
+        # Обратный индекс: какие запросы затрагивает каждый тип компонента.
+        # Нужен, чтобы при добавлении компонента обновлять только связанные запросы.
+        self._queries_by_component: Dict[ComponentType, List[QueryKey]] = defaultdict(list)
+        # Маска запроса: OR битов всех его типов компонентов.
+        self._query_masks: Dict[QueryKey, int] = {}
+        # Версия каждого запроса увеличивается, когда меняется его состав.
+        # Системы-кэши (например, RenderSystem) сравнивают версию, чтобы понять,
+        # появились ли новые или исчезли старые сущности.
+        self._query_versions: Dict[QueryKey, int] = defaultdict(int)
+
+        # Статистика кэша запросов.
+        # hit — результат взят из готового представления,
+        # miss — представление пришлось построить с нуля.
+        self.query_hits: int = 0
+        self.query_misses: int = 0
+
+        # Подписчики на изменения компонентов: { тип: [слушатель, ...] } (см. subscribe).
+        self._listeners: Dict[ComponentType, List[ComponentListener]] = {}
+
+        # Пространственный индекс по TransformComponent: поиск сущностей по точке,
+        # прямоугольнику или радиусу (выбор провинции мышью, отсечение по экрану).
+        self.spatial_index = SpatialIndex(TILE_SIZE)
+
+        # Граф соседства провинций (ProvinceGraph в формате CSR).
+        # Строится генератором карты; None, пока карта не создана.
+        self.province_graph = None
+        # Владельцы провинций по строкам графа (ProvinceOwnership); создается вместе с графом.
+        self.province_ownership = None
+        # Ресурсы провинций и их суммы по владельцам (ProvinceEconomy); создается вместе с графом.
+        self.province_economy = None
+        # Связные территории игроков и их границы (TerritoryMap); создается вместе с графом.
+        self.province_territories = None
+
+        if columnar_storage:
+            from .columnar_storage import DEFAULT_COLUMN_SCHEMAS
+            for component_type in DEFAULT_COLUMN_SCHEMAS:
+                self.enable_columnar_storage(component_type)
+
+    def enable_columnar_storage(self, component_type: ComponentType, column_specs=None):
+        """
+        Переключает хранилище компонентов заданного типа на колоночное (NumPy).
+
+        Вместо словаря экземпляров данные хранятся в непрерывных массивах по полям,
+        а get_component возвращает легкий view с теми же атрибутами.
+        Системы могут получить хранилище через get_columnar_store и обрабатывать
+        целые колонки векторно. Уже добавленные компоненты переносятся.
+
+        :param component_type: Класс компонента (например, TransformComponent).
+        :param column_specs: Схема колонок. Если не указана, берется стандартная
+            из DEFAULT_COLUMN_SCHEMAS.
+        :return: Созданное ColumnarStore.
+        """
+        # Модуль колоночного хранилища нужен только в этом режиме, поэтому импортируем здесь.
+        from .columnar_storage import ColumnarStore, DEFAULT_COLUMN_SCHEMAS
+
+        existing = self.components.get(component_type)
+        if isinstance(existing, ColumnarStore):
+            return existing
+
+        if column_specs is None:
+            column_specs = DEFAULT_COLUMN_SCHEMAS[component_type]
+        store = ColumnarStore(component_type, column_specs, capacity=max(1024, len(existing or ())))
+        for entity_id, component_instance in (existing or {}).items():
+            store[entity_id] = component_instance
+        self.components[component_type] = store
+        return store
+
+    def replace_storage(self, component_type: ComponentType, storage):
+        """
+        Подменяет хранилище компонентов типа целиком (например, колоночным
+        хранилищем поверх колонок сохранения) и приводит в порядок все, что от него
+        зависит: маски сущностей, пространственный индекс и представления запросов.
+        Все сущности нового хранилища должны быть живыми.
+        """
+        bit = self._component_bit(component_type)
+        old_storage = self.components.get(component_type, {})
+        for entity_id in old_storage.keys():
+            self._masks[entity_id & ENTITY_INDEX_MASK] &= ~bit
+        for entity_id in storage.keys():
+            if not self.is_alive(entity_id):
+                raise KeyError(f"Сущность {entity_id} не существует или уже удалена")
+            self._masks[entity_id & ENTITY_INDEX_MASK] |= bit
+        self.components[component_type] = storage
+
+        if component_type is TransformComponent:
+            for entity_id in old_storage.keys():
+                self.spatial_index.remove(entity_id)
+            for entity_id in storage.keys():
+                self._index_transform(entity_id)
+
+        # "Живые" множества запросов обновляем на месте: системы держат на них ссылки.
+        for query_key in self._queries_by_component.get(component_type, ()):
+            view = self._query_views[query_key]
+            view.clear()
+            view.update(self._build_query_view(query_key))
+            self._query_versions[query_key] += 1
+
+        if component_type in self._listeners:
+            self._emit(component_type, ComponentEvent.REMOVED, list(old_storage.keys()))
+            self._emit(component_type, ComponentEvent.ADDED, list(storage.keys()))
+
+    def get_columnar_store(self, component_type: ComponentType):
+        """
+        Возвращает ColumnarStore для типа компонента или None,
+        если этот тип хранится обычным словарем.
+        """
+        store = self.components.get(component_type)
+        return store if hasattr(store, 'column') else None
+
+    def enable_lazy_storage(self, component_type: ComponentType, factory):
+        """
+        Переключает хранилище типа на ленивое: компоненты, добавленные через
+        add_lazy_components, создаются factory(entity, row) при первом обращении.
+        Уже добавленные компоненты переносятся как есть. Если хранилище уже ленивое,
+        еще не созданные компоненты сначала строятся старой фабрикой.
+
+        :param factory: ComponentFactory (см. lazy_storage).
+        :return: LazyComponentStore типа.
+        """
+        # Ленивое хранилище нужно только генератору карты, поэтому импортируем здесь.
+        from .lazy_storage import LazyComponentStore
+
+        existing = self.components.get(component_type)
+        if isinstance(existing, LazyComponentStore):
+            existing.materialize_all()
+            existing.factory = factory
+            return existing
+        if hasattr(existing, 'column'):
+            raise TypeError(f"Хранилище {component_type.__name__} колоночное, ленивым оно быть не может")
+        store = LazyComponentStore(factory, existing)
+        self.components[component_type] = store
+        return store
+
+    def subscribe(self, component_type: ComponentType, listener: ComponentListener):
+        """
+        Подписывает listener(event, entity_ids) на изменения компонентов типа
+        (см. ComponentEvent). Слушатель вызывается после того, как мир уже
+        изменен; менять мир из слушателя нельзя.
+        """
+        self._listeners.setdefault(component_type, []).append(listener)
+
+    def unsubscribe(self, component_type: ComponentType, listener: ComponentListener):
+        listeners = self._listeners.get(component_type)
+        if listeners and listener in listeners:
+            listeners.remove(listener)
+            if not listeners:
+                del self._listeners[component_type]
+
+    def notify_changed(self, entity_id: Entity, component_type: ComponentType):
+        """
+        Сообщает подписчикам, что поля компонента изменены "на месте"
+        (например, команда перекрасила Renderable захваченной провинции).
+        """
+        self._emit(component_type, ComponentEvent.CHANGED, (entity_id,))
+
+    def _emit(self, component_type: ComponentType, event: ComponentEvent, entity_ids: Sequence[Entity]):
+        listeners = self._listeners.get(component_type)
+        if listeners:
+            for listener in tuple(listeners):
+                listener(event, entity_ids)
+
     def create_entity(self) -> Entity:
         """
         Создает новую сущность и возвращает ее уникальный ID.
+        Слоты удаленных сущностей переиспользуются с новым поколением.
+        """
+        if self._free_indices:
+            index = self._free_indices.pop()
+        else:
+            index = len(self._generations)
+            self._generations.append(0)
+            self._alive.append(0)
+            self._masks.append(0)
+        self._alive[index] = 1
+        return (self._generations[index] << ENTITY_INDEX_BITS) | index
+
+    def create_entities(self, count: int) -> List[Entity]:
+        """
+        Создает сразу count сущностей (сначала в свободных слотах, затем в новых)
+        и возвращает их ID. Дешевле, чем count вызовов create_entity.
+        """
+        reused_count = min(count, len(self._free_indices))
+        reused = self._free_indices[len(self._free_indices) - reused_count:]
+        del self._free_indices[len(self._free_indices) - reused_count:]
+        entity_ids = []
+        for index in reversed(reused):
+            self._alive[index] = 1
+            entity_ids.append((self._generations[index] << ENTITY_INDEX_BITS) | index)
+
+        fresh_count = count - reused_count
+        first = len(self._generations)
+        self._generations.extend(repeat(0, fresh_count))
+        self._alive.extend(b'\x01' * fresh_count)
+        self._masks.extend(repeat(0, fresh_count))
+        entity_ids.extend(range(first, first + fresh_count))
+        return entity_ids
+
+    def is_alive(self, entity_id: Entity) -> bool:
+        """True, если ID указывает на существующую сущность (а не на удаленную)."""
+        index = entity_id & ENTITY_INDEX_MASK
+        return (index < len(self._generations)
+                and self._alive[index] == 1
+                and self._generations[index] == entity_id >> ENTITY_INDEX_BITS)
+
+    @property
+    def entity_count(self) -> int:
+        """Количество живых сущностей."""
+        return len(self._generations) - len(self._free_indices)
+
+    def get_entity_state(self) -> Tuple[List[int], List[int]]:
+        """
+        Возвращает состояние выдачи ID: (поколения слотов, свободные слоты).
+        Нужно для сохранений: после загрузки старые ID должны остаться
+        действительными, а ID удаленных сущностей — нет.
+        """
+        return list(self._generations), list(self._free_indices)
+
+    def set_entity_state(self, generations: Iterable[int], free_indices: Iterable[int]):
         """
-        entity_id = self.next_entity_id
-        self.next_entity_id += 1
-        return entity_id
+        Восстанавливает состояние из get_entity_state. Вызывается на пустом мире
+        до добавления компонентов: все слоты, кроме свободных, становятся живыми.
+        """
+        self._generations = [int(generation) for generation in generations]
+        self._free_indices = [int(index) for index in free_indices]
+        self._alive = bytearray(b'\x01' * len(self._generations))
+        for index in self._free_indices:
+            self._alive[index] = 0
+        self._masks = [0] * len(self._generations)
+
+    def _component_bit(self, component_type: ComponentType) -> int:
+        """Возвращает бит маски для типа компонента (назначается при первом обращении)."""
+        bit = self._component_bits.get(component_type)
+        if bit is None:
+            bit = 1 << len(self._component_types_by_bit)
+            self._component_bits[component_type] = bit
+            self._component_types_by_bit.append(component_type)
+        return bit
+
+    def _component_types_of(self, mask: int) -> Tuple[ComponentType, ...]:
+        """Типы компонентов, чьи биты установлены в маске."""
+        types = self._types_by_mask.get(mask)
+        if types is None:
+            types = []
+            rest = mask
+            while rest:
+                lowest = rest & -rest
+                types.append(self._component_types_by_bit[lowest.bit_length() - 1])
+                rest ^= lowest
+            types = self._types_by_mask[mask] = tuple(types)
+        return types
+
+    def _queries_of(self, mask: int) -> Tuple[QueryKey, ...]:
+        """Зарегистрированные запросы, в которые может входить сущность с маской mask."""
+        queries = self._queries_by_mask.get(mask)
+        if queries is None:
+            queries = tuple(query_key for query_key, query_mask in self._query_masks.items()
+                            if mask & query_mask == query_mask)
+            self._queries_by_mask[mask] = queries
+        return queries
 
     def add_component(self, entity_id: Entity, component_instance: Any):
         """
@@ -51,8 +392,241 @@ class GameWorld:
         :param entity_id: ID сущности, к которой добавляется компонент.
         :param component_instance: Экземпляр компонента (например, TransformComponent(0, 0, 32, 32)).
         """
-        component_type = type(component_instance)
-        self.components[component_type][entity_id] = component_instance
+        # View из колоночного хранилища сообщает тип исходного компонента.
+        component_type = getattr(component_instance, '_source_component_type', None) or type(component_instance)
+        if not self.is_alive(entity_id):
+            raise KeyError(f"Сущность {entity_id} не существует или уже удалена")
+        storage = self.components[component_type]
+        is_new = entity_id not in storage
+        storage[entity_id] = component_instance
+
+        if component_type is TransformComponent:
+            self._index_transform(entity_id)
+
+        # Замена уже существующего компонента не меняет состав запросов.
+        if is_new:
+            index = entity_id & ENTITY_INDEX_MASK
+            mask = self._masks[index] | self._component_bit(component_type)
+            self._masks[index] = mask
+            for query_key in self._queries_by_component.get(component_type, ()):
+                query_mask = self._query_masks[query_key]
+                if mask & query_mask == query_mask:
+                    self._query_views[query_key].add(entity_id)
+                    self._query_versions[query_key] += 1
+
+        if component_type in self._listeners:
+            self._emit(component_type, ComponentEvent.ADDED if is_new else ComponentEvent.REPLACED, (entity_id,))
+
+    def add_components(self, component_type: ComponentType, entity_ids: Sequence[Entity],
+                       components: Iterable[Any]):
+        """
+        Привязывает компоненты одного типа к многим сущностям за одну операцию.
+        Маски, представления запросов и пространственный индекс обновляются
+        один раз в конце, а не после каждого компонента.
+
+        :param entity_ids: Живые сущности, у которых еще нет компонента этого типа.
+        :param components: Экземпляры компонента, по одному на сущность.
+        """
+        entity_ids = list(entity_ids)
+        components = list(components)
+        if len(components) != len(entity_ids):
+            raise ValueError(f"Сущностей {len(entity_ids)}, а компонентов {len(components)}")
+        storage = self._prepare_batch(component_type, entity_ids)
+
+        if hasattr(storage, 'extend'):
+            storage.extend(entity_ids, {
+                spec.name: [getattr(component, spec.name) for component in components]
+                for spec in storage.column_specs
+            })
+        else:
+            storage.update(zip(entity_ids, components))
+
+        rects = None
+        if component_type is TransformComponent:
+            rects = [(c.x, c.y, c.width, c.height) for c in components]
+        self._finish_batch((component_type,), entity_ids, rects)
+
+    def add_component_columns(self, component_type: ComponentType, entity_ids: Sequence[Entity],
+                              columns: Mapping[str, Any]):
+        """
+        Привязывает компоненты, заданные по колонкам: { поле: значения }.
+        Значение колонки — список, кортеж или NumPy-массив (по элементу на сущность)
+        либо одно значение, общее для всех (например, width=TILE_SIZE).
+        Общее значение не копируется, поэтому изменяемые объекты так передавать не стоит.
+
+        Колоночное хранилище получает NumPy-массивы как есть (они должны быть
+        уже в формате колонки), обычное — собирает из колонок экземпляры dataclass.
+        """
+        entity_ids = list(entity_ids)
+        count = len(entity_ids)
+        storage = self._prepare_batch(component_type, entity_ids)
+
+        if hasattr(storage, 'extend'):
+            storage.extend(entity_ids, columns)
+        else:
+            names = list(columns)
+            values = [_column_values(columns[name], count) for name in names]
+            field_names = [field.name for field in fields(component_type)]
+            if names == field_names[:len(names)]:
+                # Колонки идут в порядке полей dataclass: создаем экземпляры позиционно.
+                instances = map(component_type, *values)
+            else:
+                instances = (component_type(**dict(zip(names, row))) for row in zip(*values))
+            storage.update(zip(entity_ids, instances))
+
+        if component_type is TransformComponent:
+            self.spatial_index.insert_columns(entity_ids, *(columns[name] for name in ('x', 'y', 'width', 'height')))
+        self._finish_batch((component_type,), entity_ids, None)
+
+    def add_lazy_components(self, component_types: Sequence[ComponentType], entity_ids: Sequence[Entity],
+                            rows: np.ndarray, rects: Mapping[str, Any] | None = None):
+        """
+        Привязывает к сущностям компоненты нескольких типов, которые будут созданы
+        фабриками ленивых хранилищ (см. enable_lazy_storage) при первом обращении.
+        Маски, запросы, пространственный индекс и подписчики обновляются сразу,
+        как при add_components, — один раз на все типы.
+
+        :param component_types: Типы с ленивыми хранилищами.
+        :param rows: Номера строк для фабрик (массив int64), по одному на сущность.
+        :param rects: Колонки x, y, width, height (как у add_component_columns),
+            если среди типов есть TransformComponent: сущность попадает
+            в пространственный индекс, еще не имея экземпляра Transform.
+        """
+        entity_ids = list(entity_ids)
+        ids = self._check_alive(entity_ids)
+        bits = 0
+        for component_type in component_types:
+            if not hasattr(self.components[component_type], 'add_pending'):
+                raise TypeError(f"Хранилище {component_type.__name__} не ленивое, сначала вызовите enable_lazy_storage")
+            bits |= self._component_bit(component_type)
+        if TransformComponent in component_types and rects is None:
+            raise ValueError("Для ленивого TransformComponent нужны колонки rects")
+        # Бит типа в маске есть ровно у сущностей из его хранилища.
+        masks = self._masks
+        if any(map(bits.__and__, map(masks.__getitem__, (ids & ENTITY_INDEX_MASK).tolist()))):
+            duplicate = next(entity_id for entity_id in entity_ids if masks[entity_id & ENTITY_INDEX_MASK] & bits)
+            raise ValueError(f"У сущности {duplicate} уже есть компонент одного из типов пакета")
+
+        rows = np.asarray(rows, dtype=np.int64)
+        if len(rows) != len(ids):
+            raise ValueError(f"Сущностей {len(ids)}, а номеров строк {len(rows)}")
+        for component_type in component_types:
+            self.components[component_type].add_pending(ids, rows)
+        if TransformComponent in component_types:
+            self.spatial_index.insert_columns(entity_ids, *(rects[name] for name in ('x', 'y', 'width', 'height')))
+        self._finish_batch(tuple(component_types), entity_ids, None)
+
+    def _check_alive(self, entity_ids: List[Entity]) -> np.ndarray:
+        """
+        То же, что is_alive для каждой сущности, но массивами NumPy.
+        Бросает KeyError, если хоть одна сущность мертва.
+
+        :return: ID сущностей массивом int64.
+        """
+        ids = np.array(entity_ids, dtype=np.int64)
+        indices = ids & ENTITY_INDEX_MASK
+        if len(ids) and (
+                indices.max() >= len(self._generations)
+                or not np.frombuffer(self._alive, dtype=np.uint8)[indices].all()
+                or (np.fromiter(map(self._generations.__getitem__, indices.tolist()), dtype=np.int64, count=len(ids))
+                    != ids >> ENTITY_INDEX_BITS).any()):
+            dead = next(entity_id for entity_id in entity_ids if not self.is_alive(entity_id))
+            raise KeyError(f"Сущность {dead} не существует или уже удалена")
+        return ids
+
+    def _prepare_batch(self, component_type: ComponentType, entity_ids: List[Entity]):
+        """Проверяет сущности пакета и возвращает хранилище типа."""
+        storage = self.components[component_type]
+        self._check_alive(entity_ids)
+        if not storage.keys().isdisjoint(entity_ids):
+            duplicate = next(entity_id for entity_id in entity_ids if entity_id in storage)
+            raise ValueError(f"У сущности {duplicate} уже есть {component_type.__name__}")
+        return storage
+
+    def _finish_batch(self, component_types: Tuple[ComponentType, ...], entity_ids: List[Entity],
+                      rects: List[Tuple[int, int, int, int]] | None):
+        """Отложенные обновления после пакетного добавления: маски, запросы, индекс."""
+        bits = 0
+        for component_type in component_types:
+            bits |= self._component_bit(component_type)
+        masks = self._masks
+        for entity_id in entity_ids:
+            masks[entity_id & ENTITY_INDEX_MASK] |= bits
+
+        # Запрос, затронутый несколькими типами пакета, обновляется один раз.
+        query_keys = dict.fromkeys(query_key for component_type in component_types
+                                   for query_key in self._queries_by_component.get(component_type, ()))
+        for query_key in query_keys:
+            query_mask = self._query_masks[query_key]
+            matched = [entity_id for entity_id in entity_ids
+                       if masks[entity_id & ENTITY_INDEX_MASK] & query_mask == query_mask]
+            if matched:
+                self._query_views[query_key].update(matched)
+                self._query_versions[query_key] += 1
+
+        if rects is not None:
+            self.spatial_index.insert_many(entity_ids, rects)
+
+        for component_type in component_types:
+            self._emit(component_type, ComponentEvent.ADDED, entity_ids)
+
+    def remove_component(self, entity_id: Entity, component_type: ComponentType):
+        """
+        Отвязывает компонент заданного типа от сущности (если он есть).
+        Сама сущность и остальные ее компоненты остаются в мире.
+        """
+        storage = self.components.get(component_type)
+        if not storage or entity_id not in storage:
+            return
+        del storage[entity_id]
+        self._masks[entity_id & ENTITY_INDEX_MASK] &= ~self._component_bits[component_type]
+
+        if component_type is TransformComponent:
+            self.spatial_index.remove(entity_id)
+
+        for query_key in self._queries_by_component.get(component_type, ()):
+            view = self._query_views[query_key]
+            if entity_id in view:
+                view.remove(entity_id)
+                self._query_versions[query_key] += 1
+
+        self._emit(component_type, ComponentEvent.REMOVED, (entity_id,))
+
+    def update_spatial_index(self, entity_id: Entity):
+        """
+        Обновляет положение сущности в пространственном индексе.
+        Вызывайте после изменения полей TransformComponent "на месте"
+        (add_component делает это автоматически). Подписчики Transform получают
+        событие CHANGED: например, очередь отрисовки узнает, в какой структуре
+        индекса теперь сущность.
+        """
+        self._index_transform(entity_id)
+        self.notify_changed(entity_id, TransformComponent)
+
+    def _index_transform(self, entity_id: Entity):
+        transform = self.components[TransformComponent].get(entity_id)
+        if transform is None:
+            self.spatial_index.remove(entity_id)
+            return
+        self.spatial_index.insert(
+            entity_id, (transform.x, transform.y, transform.width, transform.height)
+        )
+
+    def query_point(self, x: float, y: float) -> List[Entity]:
+        """Возвращает сущности с TransformComponent, содержащие точку (x, y)."""
+        return self.spatial_index.query_point(x, y)
+
+    def query_rect(self, x: float, y: float, width: float, height: float, tiles: bool = True) -> Set[Entity]:
+        """
+        Возвращает сущности с TransformComponent, пересекающие прямоугольник.
+
+        :param tiles: False — пропустить тайлы карты (см. SpatialIndex.query_rect).
+        """
+        return self.spatial_index.query_rect(x, y, width, height, tiles)
+
+    def query_radius(self, x: float, y: float, radius: float) -> Set[Entity]:
+        """Возвращает сущности с TransformComponent, пересекающие круг."""
+        return self.spatial_index.query_radius(x, y, radius)
 
     def get_component(self, entity_id: Entity, component_type: ComponentType) -> Optional[Any]:
         """
@@ -70,44 +644,169 @@ class GameWorld:
         Это ключевой метод для систем. Например, RenderSystem запросит сущности,
         у которых есть и TransformComponent, и RenderableComponent.
 
+        При первом вызове для набора типов запрос регистрируется (см. register_query),
+        а все последующие вызовы возвращают готовое множество за O(1).
+
+        ВАЖНО: возвращается "живое" представление, которое мир обновляет сам.
+        Его нельзя изменять, а если нужно менять мир во время обхода —
+        сначала сделайте копию (например, list(...)).
+
         :param component_types: Один или несколько классов компонентов.
         :return: Множество ID сущностей.
         """
         # Если типы компонентов не переданы, возвращаем пустое множество.
         if not component_types:
             return set()
-        
-        # Начинаем с множества сущностей, имеющих первый тип компонента.
-        # Используем .get(component_types[0], {}) для безопасности, если
-        # ни одна сущность не имеет такого компонента.
-        try:
-            result_entities = set(self.components[component_types[0]].keys())
-        except KeyError:
-            # Если ни одна сущность не имеет первого компонента, то результат - пустое множество.
-            return set()
 
-        # Если запрошен только один тип компонента, возвращаем результат.
-        if len(component_types) == 1:
-            return result_entities
+        query_key = frozenset(component_types)
+        view = self._query_views.get(query_key)
+        if view is not None:
+            self.query_hits += 1
+            return view
 
-        # Для остальных типов компонентов, мы последовательно "пересекаем" множества.
-        # Это эффективно оставляет только те сущности, которые есть во всех списках.
-        for component_type in component_types[1:]:
-            entities_with_comp = set(self.components.get(component_type, {}).keys())
-            result_entities.intersection_update(entities_with_comp)
+        self.query_misses += 1
+        return self.register_query(*component_types)
+
+    def register_query(self, *component_types: ComponentType) -> Set[Entity]:
+        """
+        Регистрирует запрос по набору типов компонентов и строит его представление.
+        Системы могут вызывать этот метод заранее (например, в __init__),
+        чтобы первый кадр не тратил время на построение.
 
+        :return: "Живое" множество сущностей, удовлетворяющих запросу.
+        """
+        query_key = frozenset(component_types)
+        view = self._query_views.get(query_key)
+        if view is not None:
+            return view
+
+        view = self._build_query_view(query_key)
+        self._query_views[query_key] = view
+        query_mask = 0
+        for component_type in query_key:
+            self._queries_by_component[component_type].append(query_key)
+            query_mask |= self._component_bit(component_type)
+        self._query_masks[query_key] = query_mask
+        self._queries_by_mask.clear()
+        return view
+
+    def get_query_version(self, *component_types: ComponentType) -> int:
+        """
+        Возвращает номер версии запроса. Он меняется при каждом добавлении
+        или удалении сущности из результата запроса.
+        """
+        return self._query_versions[frozenset(component_types)]
+
+    def get_query_stats(self) -> Dict[str, int]:
+        """Возвращает статистику кэша запросов (для профилирования)."""
+        return {
+            'hits': self.query_hits,
+            'misses': self.query_misses,
+            'views': len(self._query_views),
+        }
+
+    def _build_query_view(self, query_key: QueryKey) -> Set[Entity]:
+        """Строит множество сущностей для запроса полным пересечением хранилищ."""
+        # Начинаем с самого маленького хранилища — так пересечение дешевле всего.
+        storages = sorted(
+            (self.components.get(component_type, {}) for component_type in query_key),
+            key=len
+        )
+        result_entities = set(storages[0].keys())
+        for storage in storages[1:]:
             # Оптимизация: если на каком-то шаге результат стал пустым,
             # нет смысла продолжать.
             if not result_entities:
-                return set()
-
+                break
+            result_entities.intersection_update(storage.keys())
         return result_entities
 
     def delete_entity(self, entity_id: Entity):
         """
         Полностью удаляет сущность и все связанные с ней компоненты.
+        Обходит только хранилища, в которых сущность есть (по ее маске).
+        Удаление уже удаленной сущности (устаревшего ID) ничего не делает.
         """
-        for component_storage in self.components.values():
-            if entity_id in component_storage:
-                del component_storage[entity_id]
+        index = entity_id & ENTITY_INDEX_MASK
+        if (index >= len(self._generations) or not self._alive[index]
+                or self._generations[index] != entity_id >> ENTITY_INDEX_BITS):
+            return
+        mask = self._masks[index]
+        components = self.components
+        for component_type in self._component_types_of(mask):
+            del components[component_type][entity_id]
+            if component_type is TransformComponent:
+                self.spatial_index.remove(entity_id)
+        # По маске сущность точно входит в эти запросы, проверка "in" не нужна.
+        for query_key in self._queries_of(mask):
+            self._query_views[query_key].remove(entity_id)
+            self._query_versions[query_key] += 1
+        self._release_slot(index)
+
+        if self._listeners:
+            for component_type in self._component_types_of(mask):
+                self._emit(component_type, ComponentEvent.REMOVED, (entity_id,))
+
+    def delete_entities(self, entity_ids: Iterable[Entity]):
+        """
+        Удаляет много сущностей разом (перегенерация карты, выгрузка чанка,
+        гибель целой волны юнитов). Сущности группируются по маске компонентов,
+        хранилища чистятся по типам, а представления запросов обновляются одной
+        операцией над множеством, и версия каждого запроса увеличивается один раз.
+        """
+        # { маска компонентов: [ID, ...] }
+        by_mask: Dict[int, List[Entity]] = defaultdict(list)
+        generations = self._generations
+        alive = self._alive
+        masks = self._masks
+        slot_count = len(generations)
+        # В порядке возрастания ID обращения к спискам слотов и к словарям
+        # хранилищ (хэш int — само число) идут почти последовательно по памяти.
+        for entity_id in sorted(entity_ids):
+            index = entity_id & ENTITY_INDEX_MASK
+            # То же, что is_alive, но без вызова функции на каждую сущность.
+            if index >= slot_count or not alive[index] or generations[index] != entity_id >> ENTITY_INDEX_BITS:
+                continue
+            by_mask[masks[index]].append(entity_id)
+            self._release_slot(index)
+        if not by_mask:
+            return
+
+        # { тип компонента: [ID, ...] }
+        by_component_type: Dict[ComponentType, List[Entity]] = defaultdict(list)
+        for mask, entities in by_mask.items():
+            for component_type in self._component_types_of(mask):
+                by_component_type[component_type].extend(entities)
+
+        for component_type, entities in by_component_type.items():
+            storage = self.components[component_type]
+            if hasattr(storage, 'discard_many'):
+                # Ленивое хранилище снимает еще не построенные компоненты массивами.
+                storage.discard_many(entities)
+            else:
+                for entity_id in entities:
+                    del storage[entity_id]
+            if component_type is TransformComponent:
+                self.spatial_index.remove_many(entities)
+
+        # { запрос: [группы ID, которые из него уходят] }
+        by_query: Dict[QueryKey, List[List[Entity]]] = defaultdict(list)
+        for mask, entities in by_mask.items():
+            for query_key in self._queries_of(mask):
+                by_query[query_key].append(entities)
+        for query_key, groups in by_query.items():
+            view = self._query_views[query_key]
+            for entities in groups:
+                view.difference_update(entities)
+            self._query_versions[query_key] += 1
+
+        if self._listeners:
+            for component_type, entities in by_component_type.items():
+                self._emit(component_type, ComponentEvent.REMOVED, entities)
 
+    def _release_slot(self, index: int):
+        """Освобождает слот: следующая сущность в нем получит новое поколение."""
+        self._generations[index] = (self._generations[index] + 1) & ENTITY_GENERATION_MASK
+        self._alive[index] = 0
+        self._masks[index] = 0
+        self._free_indices.append(index)
@@ -0,0 +1,161 @@
+# src/pgg_game/world/lazy_storage.py
+
+from array import array
+from collections.abc import KeysView
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+import numpy as np
+
+from .game_world import ENTITY_INDEX_MASK
+
+Entity = int
+# Фабрика компонента: (сущность, номер строки) -> экземпляр компонента.
+ComponentFactory = Callable[[Entity, int], Any]
+
+
+class _KeysView(KeysView):
+    # KeysView обходит ключи генератором Python; список ключей быстрее
+    # (set(...) и intersection_update в запросах GameWorld).
+    def __iter__(self) -> Iterator[Entity]:
+        return iter(self._mapping)
+
+
+class LazyComponentStore(dict):
+    """
+    Хранилище компонентов, экземпляры которых создаются при первом обращении.
+
+    Построенные (и добавленные обычным путем) компоненты — обычные записи dict,
+    поэтому store[entity] для них не вызывает кода Python. Еще не построенные
+    записаны не в словаре, а в двух массивах по слоту сущности (entity_index):
+    ID сущности и номер строки, по которому factory(entity, row) построит
+    компонент из исходных массивов (например, полей генератора карты).
+    Миллион сущностей добавляется несколькими операциями NumPy — без миллиона
+    объектов и записей словаря. Построенный компонент живет дальше как обычный:
+    его можно менять на месте.
+
+    Хранилище повторяет интерфейс словаря, который использует GameWorld
+    (get, [], in, del, keys, len), как и ColumnarStore.
+    """
+    def __init__(self, factory: ComponentFactory, existing: Dict[Entity, Any] | None = None):
+        super().__init__(existing or {})
+        self.factory = factory
+        # Массивы array, как _alive в GameWorld: поэлементный доступ без скаляров
+        # NumPy, а пакетные операции — через np.frombuffer (см. _pending_arrays).
+        # Слот -> ID сущности с еще не построенным компонентом (-1 — нет такой).
+        self._pending_entities = array('q')
+        # Слот -> номер строки для factory.
+        self._pending_rows = array('q')
+        self._pending_count = 0
+
+    def add_pending(self, entity_ids: np.ndarray, rows: np.ndarray):
+        """
+        Добавляет сущности (которых в хранилище еще нет), компоненты которых
+        factory построит по номерам строк.
+        """
+        slots = entity_ids & ENTITY_INDEX_MASK
+        if len(slots) and slots.max() >= len(self._pending_entities):
+            self._grow(int(slots.max()) + 1)
+        entities, pending_rows = self._pending_arrays()
+        entities[slots] = entity_ids
+        pending_rows[slots] = rows
+        self._pending_count += len(slots)
+
+    def discard_many(self, entity_ids: List[Entity]):
+        """Удаляет компоненты многих сущностей разом (тех, что есть в хранилище)."""
+        ids = np.array(entity_ids, dtype=np.int64)
+        slots = ids & ENTITY_INDEX_MASK
+        entities, _ = self._pending_arrays()
+        inside = slots < len(entities)
+        pending = np.zeros(len(ids), dtype=bool)
+        pending[inside] = entities[slots[inside]] == ids[inside]
+        entities[slots[pending]] = -1
+        self._pending_count -= int(np.count_nonzero(pending))
+        for entity in ids[~pending].tolist():
+            dict.pop(self, entity, None)
+
+    def peek(self, entity: Entity, default: Any = None) -> Any:
+        """Компонент, если он уже построен; еще не построенный не строится (возвращается default)."""
+        return dict.get(self, entity, default)
+
+    def built_items(self) -> List[Tuple[Entity, Any]]:
+        """Пары (сущность, компонент) только для уже построенных компонентов."""
+        return list(dict.items(self))
+
+    def materialize_all(self):
+        """Строит все еще не построенные компоненты (например, перед сменой фабрики)."""
+        for entity in self._pending_list():
+            self[entity]
+
+    def _pending_arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        # Временные view: пока они живы, array нельзя увеличить.
+        return (np.frombuffer(self._pending_entities, dtype=np.int64),
+                np.frombuffer(self._pending_rows, dtype=np.int64))
+
+    def _pending_row(self, entity: Entity) -> int:
+        slot = entity & ENTITY_INDEX_MASK
+        if slot < len(self._pending_entities) and self._pending_entities[slot] == entity:
+            return self._pending_rows[slot]
+        return -1
+
+    def _pending_list(self) -> List[Entity]:
+        if not self._pending_count:
+            return []
+        entities, _ = self._pending_arrays()
+        return entities[entities >= 0].tolist()
+
+    def _grow(self, size: int):
+        extra = max(size, 2 * len(self._pending_entities)) - len(self._pending_entities)
+        self._pending_entities.extend(array('q', [-1]) * extra)
+        self._pending_rows.extend(array('q', [0]) * extra)
+
+    # --- Интерфейс словаря, который использует GameWorld ---
+
+    def __missing__(self, entity: Entity) -> Any:
+        # Вызывается dict.__getitem__, если компонента нет среди построенных.
+        row = self._pending_row(entity)
+        if row < 0:
+            raise KeyError(entity)
+        self._pending_entities[entity & ENTITY_INDEX_MASK] = -1
+        self._pending_count -= 1
+        component = self.factory(entity, row)
+        dict.__setitem__(self, entity, component)
+        return component
+
+    def __contains__(self, entity: Entity) -> bool:
+        return dict.__contains__(self, entity) or (self._pending_count > 0 and self._pending_row(entity) >= 0)
+
+    def __len__(self) -> int:
+        return dict.__len__(self) + self._pending_count
+
+    def __iter__(self) -> Iterator[Entity]:
+        return iter(list(dict.keys(self)) + self._pending_list())
+
+    def __setitem__(self, entity: Entity, component: Any):
+        if self._pending_count and self._pending_row(entity) >= 0:
+            self._pending_entities[entity & ENTITY_INDEX_MASK] = -1
+            self._pending_count -= 1
+        dict.__setitem__(self, entity, component)
+
+    def __delitem__(self, entity: Entity):
+        # Сущность не бывает сразу и построенной, и ожидающей (см. __setitem__).
+        slot = entity & ENTITY_INDEX_MASK
+        if slot < len(self._pending_entities) and self._pending_entities[slot] == entity:
+            self._pending_entities[slot] = -1
+            self._pending_count -= 1
+        else:
+            dict.__delitem__(self, entity)
+
+    def get(self, entity: Entity, default: Any = None) -> Any:
+        try:
+            return self[entity]
+        except KeyError:
+            return default
+
+    def keys(self) -> KeysView:
+        return _KeysView(self)
+
+    def values(self) -> Iterator[Any]:
+        return (self[entity] for entity in list(self))
+
+    def items(self) -> Iterator[Tuple[Entity, Any]]:
+        return ((entity, self[entity]) for entity in list(self))
@@ -0,0 +1,75 @@
+# src/pgg_game/world/ownership.py
+
+from typing import TYPE_CHECKING, Callable, List, Optional
+
+import numpy as np
+
+from .province_graph import ProvinceGraph
+from ..components.province_info import ProvinceInfoComponent
+
+if TYPE_CHECKING:
+    from .game_world import GameWorld
+
+Entity = int
+# Значение в массиве владельцев для нейтральной провинции.
+NEUTRAL = -1
+
+
+class ProvinceOwnership:
+    """
+    Владельцы провинций в виде NumPy-массива по строкам ProvinceGraph.
+
+    Дублирует ProvinceInfoComponent.owner_id, но в форме, удобной для векторных
+    расчетов (поиск пути, экономика, ИИ): owners[row] — ID игрока или NEUTRAL.
+    Номер версии увеличивается при каждой смене владельца, по нему кэши
+    понимают, что их данные устарели.
+
+    Владельца нужно менять через set_owner одновременно с компонентом
+    (это делает CaptureProvinceCommand). Кто ведет данные по владельцам
+    инкрементально (ProvinceEconomy), подписывается через add_listener.
+    """
+    def __init__(self, graph: ProvinceGraph, owners: np.ndarray | None = None):
+        self.graph = graph
+        if owners is None:
+            owners = np.full(graph.num_provinces, NEUTRAL, dtype=np.int64)
+        self.owners = owners
+        self.version = 0
+        self._listeners: List[Callable[[int, Entity, Entity], None]] = []
+
+    @classmethod
+    def from_world(cls, world: 'GameWorld', graph: ProvinceGraph) -> 'ProvinceOwnership':
+        """Собирает массив по текущим ProvinceInfoComponent (например, после загрузки)."""
+        owners = np.full(graph.num_provinces, NEUTRAL, dtype=np.int64)
+        for row, entity in enumerate(graph.row_entities.tolist()):
+            province_info = world.get_component(entity, ProvinceInfoComponent)
+            # Провинция могла быть удалена после построения графа.
+            if province_info is not None and province_info.owner_id is not None:
+                owners[row] = province_info.owner_id
+        return cls(graph, owners)
+
+    def add_listener(self, callback: Callable[[int, Entity, Entity], None]):
+        """callback(row, old_owner, new_owner) вызывается при каждой смене владельца (NEUTRAL — нейтральная)."""
+        self._listeners.append(callback)
+
+    def owner_of(self, entity: Entity) -> Optional[Entity]:
+        row = self.graph.row_of(entity)
+        if row < 0:
+            return None
+        owner = int(self.owners[row])
+        return None if owner == NEUTRAL else owner
+
+    def set_owner(self, entity: Entity, owner_id: Optional[Entity]):
+        row = self.graph.row_of(entity)
+        if row < 0:
+            return
+        value = NEUTRAL if owner_id is None else owner_id
+        old = int(self.owners[row])
+        if old != value:
+            self.owners[row] = value
+            self.version += 1
+            for callback in self._listeners:
+                callback(row, old, value)
+
+    def rows_of(self, owner_id: Entity) -> np.ndarray:
+        """Строки графа всех провинций игрока."""
+        return np.nonzero(self.owners == owner_id)[0]
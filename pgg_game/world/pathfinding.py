@@ -0,0 +1,459 @@
+# src/pgg_game/world/pathfinding.py
+
+"""
+Поиск пути и поля расстояний по графу соседства провинций.
+
+Стоимость хода — стоимость входа в провинцию, она зависит от того, кому
+провинция принадлежит относительно идущего игрока (OwnershipCosts).
+Стоимости целые и маленькие, поэтому поля расстояний считаются алгоритмом
+Дейкстры с корзинами (Dial): все вершины на одном расстоянии раскрываются
+разом, векторно по CSR-массивам графа. При единичных стоимостях это обычный
+поуровневый BFS.
+
+Pathfinder кэширует поля и пути. Поля с единичной стоимостью зависят только
+от графа, а поля игроков — еще и от владельцев, поэтому сбрасываются только
+при смене версии ProvinceOwnership.
+"""
+
+import heapq
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .ownership import ProvinceOwnership
+from .province_graph import ProvinceGraph
+from ..config import PATH_CACHE_SIZE
+
+Entity = int
+# Расстояние до недостижимой провинции.
+UNREACHABLE = np.iinfo(np.int64).max
+# В таблице следующих шагов: провинция — сама цель или из нее цель недостижима.
+NO_STEP = -1
+
+
+@dataclass(frozen=True)
+class OwnershipCosts:
+    """
+    Стоимость входа в провинцию в зависимости от ее владельца.
+    0 — провинция непроходима (например, запретить проход через чужие земли).
+    """
+    own: int = 1
+    neutral: int = 2
+    foreign: int = 4
+
+    def node_costs(self, owners: np.ndarray, player_id: Entity) -> np.ndarray:
+        """Стоимость входа в каждую строку графа для игрока player_id."""
+        costs = np.full(len(owners), self.foreign, dtype=np.int64)
+        costs[owners < 0] = self.neutral
+        costs[owners == player_id] = self.own
+        return costs
+
+
+def gather_neighbors(graph: ProvinceGraph, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Соседи сразу нескольких строк одним массивом (без цикла Python).
+
+    :return: (строки соседей подряд, число соседей у каждой строки из rows).
+    """
+    starts = graph.indptr[rows]
+    counts = graph.indptr[rows + 1] - starts
+    total = int(counts.sum())
+    if total == 0:
+        return graph.indices[:0], counts
+    # Позиция j результата, попавшая в блок строки i, — это starts[i] + (j - начало блока i).
+    offsets = np.repeat(starts - (np.cumsum(counts) - counts), counts) + np.arange(total)
+    return graph.indices[offsets], counts
+
+
+def _without_repeats(rows: np.ndarray, stamp: np.ndarray) -> np.ndarray:
+    """Убирает повторы из rows за O(len(rows)) с помощью рабочего массива stamp."""
+    positions = np.arange(len(rows))
+    stamp[rows] = positions
+    # При повторах запись выигрывает последняя позиция, остальные отбрасываются.
+    return rows[stamp[rows] == positions]
+
+
+def distance_field(graph: ProvinceGraph, source_rows: Iterable[int], node_costs: np.ndarray | None = None,
+                   toward: bool = False, max_cost: int | None = None) -> np.ndarray:
+    """
+    Мультиисточниковое поле расстояний (Дейкстра с корзинами / BFS).
+
+    :param source_rows: Строки-источники, расстояние до них 0.
+    :param node_costs: Целая стоимость входа в каждую строку (<= 0 — непроходима).
+        None — все стоимости 1 (поле зависит только от графа).
+    :param toward: False — стоимость пути от источников до каждой провинции;
+        True — стоимость пути от каждой провинции до ближайшего источника
+        (при несимметричных стоимостях это разные поля).
+    :param max_cost: Не искать дальше этой стоимости; более дальние провинции
+        считаются недостижимыми.
+    :return: int64 по строкам графа, UNREACHABLE для недостижимых.
+    """
+    dist = np.full(graph.num_provinces, UNREACHABLE, dtype=np.int64)
+    sources = np.unique(np.asarray(list(source_rows), dtype=np.int64))
+    if len(sources) == 0:
+        return dist
+    dist[sources] = 0
+    # Возможные шаги (стоимости бывают лишь нескольких видов): по ним раскладываем по корзинам.
+    step_values = [1] if node_costs is None else np.unique(node_costs[node_costs > 0]).tolist()
+    # Корзины: { расстояние: [массивы строк, получивших это расстояние] }.
+    buckets: Dict[int, List[np.ndarray]] = {0: [sources]}
+    # Метки для удаления повторов без сортировки: stamp[row] = позиция row в массиве.
+    stamp = np.empty(graph.num_provinces, dtype=np.int64)
+
+    while buckets:
+        level = min(buckets)
+        if max_cost is not None and level > max_cost:
+            break
+        parts = buckets.pop(level)
+        frontier = parts[0] if len(parts) == 1 else np.concatenate(parts)
+        # Строки, чье расстояние с тех пор улучшилось, уже раскрыты в другой корзине.
+        frontier = frontier[dist[frontier] == level]
+        frontier = _without_repeats(frontier, stamp)
+        if len(frontier) == 0:
+            continue
+
+        neighbors, counts = gather_neighbors(graph, frontier)
+        if node_costs is None:
+            steps = None
+        elif toward:
+            # Идем к источнику: из соседа входим в раскрываемую строку.
+            steps = np.repeat(node_costs[frontier], counts)
+        else:
+            steps = node_costs[neighbors]
+        if steps is None:
+            candidate = np.full(len(neighbors), level + 1, dtype=np.int64)
+        else:
+            passable = steps > 0
+            neighbors = neighbors[passable]
+            candidate = level + steps[passable]
+
+        better = candidate < dist[neighbors]
+        neighbors, candidate = neighbors[better], candidate[better]
+        # Один сосед может встретиться несколько раз: берем минимум.
+        np.minimum.at(dist, neighbors, candidate)
+        won = dist[neighbors] == candidate
+        neighbors, candidate = neighbors[won], candidate[won]
+        if len(neighbors) == 0:
+            continue
+        if len(step_values) == 1:
+            buckets.setdefault(level + step_values[0], []).append(neighbors)
+            continue
+        for step in step_values:
+            selected = neighbors[candidate == level + step]
+            if len(selected):
+                buckets.setdefault(level + step, []).append(selected)
+
+    if max_cost is not None:
+        dist[dist > max_cost] = UNREACHABLE
+    return dist
+
+
+def next_steps(graph: ProvinceGraph, field: np.ndarray, node_costs: np.ndarray | None = None) -> np.ndarray:
+    """
+    Таблица следующих шагов по полю, построенному с toward=True.
+
+    Для каждой строки — сосед, через которого идет кратчайший путь к источникам
+    (NO_STEP для самих источников и недостижимых строк). Считается векторно
+    по всем ребрам, после чего путь из любой провинции восстанавливается
+    простым проходом по таблице.
+    """
+    num_rows = graph.num_provinces
+    edge_sources = np.repeat(np.arange(num_rows), np.diff(graph.indptr))
+    targets = graph.indices
+    reachable = field[targets] != UNREACHABLE
+    if node_costs is not None:
+        reachable &= node_costs[targets] > 0
+    costs = np.ones(len(targets), dtype=np.int64) if node_costs is None else node_costs[targets]
+    # Стоимость пути через ребро: войти в соседа и дойти от него до источника.
+    via = np.full(len(targets), UNREACHABLE, dtype=np.int64)
+    via[reachable] = field[targets[reachable]] + costs[reachable]
+
+    # Минимум по ребрам каждой строки (reduceat по сегментам CSR без сортировки).
+    has_edges = np.diff(graph.indptr) > 0
+    rows = np.nonzero(has_edges)[0]
+    best_via = np.full(num_rows, UNREACHABLE, dtype=np.int64)
+    best_via[rows] = np.minimum.reduceat(via, graph.indptr[:-1][has_edges])
+
+    # Подходит любое ребро, на котором минимум достигается и он равен полю строки.
+    on_path = (via == best_via[edge_sources]) & (via == field[edge_sources]) & (field[edge_sources] > 0)
+    steps = np.full(num_rows, NO_STEP, dtype=np.int64)
+    steps[edge_sources[on_path]] = targets[on_path]
+    return steps
+
+
+def follow_steps(steps: Sequence[int], field: np.ndarray, start_row: int) -> Optional[List[int]]:
+    """
+    Путь (строки, включая start_row) по таблице next_steps или None, если он не существует.
+    steps лучше передавать списком: проход поэлементный.
+    """
+    if field[start_row] == UNREACHABLE:
+        return None
+    path = [start_row]
+    step = steps[start_row]
+    while step != NO_STEP:
+        path.append(step)
+        step = steps[step]
+    return path
+
+
+def astar(graph: ProvinceGraph, start_row: int, goal_row: int, node_costs: Sequence[int] | None = None,
+          coords: Tuple[List[int], List[int]] | None = None, diagonal: bool = False) -> Optional[List[int]]:
+    """
+    A* между двумя провинциями.
+
+    Раскрывает только область вокруг прямой между start и goal, поэтому для
+    одиночных запросов на большой карте намного дешевле полного поля.
+    Обход поэлементный, поэтому работает со списками Python, а не с NumPy.
+
+    :param node_costs: Стоимость входа в каждую строку (список; <= 0 — непроходима).
+    :param coords: (y, x) строк на сетке — для эвристики. None — эвристика 0 (обычная Дейкстра).
+    :param diagonal: В графе есть диагональные соседства (8-связность).
+    :return: Строки пути от start до goal включительно или None.
+    """
+    if start_row == goal_row:
+        return [start_row]
+    indptr, indices = graph.adjacency_lists()
+    costs = node_costs
+    if costs is not None and costs[goal_row] <= 0:
+        return None
+
+    if coords is None:
+        def heuristic(row: int) -> int:
+            return 0
+    else:
+        # Манхэттенское расстояние при 4-связности, Чебышёва при 8-связности,
+        # умноженное на минимальную стоимость входа, — допустимая эвристика.
+        min_cost = 1 if costs is None else min(cost for cost in set(costs) if cost > 0)
+        ys, xs = coords
+        goal_y, goal_x = ys[goal_row], xs[goal_row]
+
+        def heuristic(row: int) -> int:
+            dy, dx = abs(ys[row] - goal_y), abs(xs[row] - goal_x)
+            return min_cost * (max(dy, dx) if diagonal else dy + dx)
+
+    best = {start_row: 0}
+    came_from: Dict[int, int] = {}
+    # (f, -g, строка): при равных f первой раскрывается строка ближе к цели.
+    heap = [(heuristic(start_row), 0, start_row)]
+    while heap:
+        _, negative_cost, row = heapq.heappop(heap)
+        cost = -negative_cost
+        if row == goal_row:
+            path = [row]
+            while row in came_from:
+                row = came_from[row]
+                path.append(row)
+            path.reverse()
+            return path
+        if cost > best[row]:
+            continue
+        for position in range(indptr[row], indptr[row + 1]):
+            neighbor = indices[position]
+            step = 1 if costs is None else costs[neighbor]
+            if step <= 0:
+                continue
+            new_cost = cost + step
+            if new_cost < best.get(neighbor, UNREACHABLE):
+                best[neighbor] = new_cost
+                came_from[neighbor] = row
+                heapq.heappush(heap, (new_cost + heuristic(neighbor), -new_cost, neighbor))
+    return None
+
+
+class Pathfinder:
+    """
+    Кэширующий поиск пути по world.province_graph.
+
+    Запросы принимают и возвращают ID сущностей. player_id=None — стоимость
+    всех провинций 1 (кэш таких запросов живет, пока жив граф); иначе стоимость
+    зависит от владельцев (OwnershipCosts) и кэш сбрасывается при смене версии
+    ProvinceOwnership. Новый граф (новая карта) — новый Pathfinder.
+
+    Для пакетов запросов к одной цели (например, все армии идут к столице)
+    используйте find_paths/distances: они строят одно поле и таблицу шагов,
+    после чего каждый путь — просто проход по таблице.
+    """
+    def __init__(self, graph: ProvinceGraph, ownership: ProvinceOwnership | None = None,
+                 costs: OwnershipCosts = OwnershipCosts(), cache_size: int = PATH_CACHE_SIZE):
+        """
+        :param ownership: Владельцы провинций; обязательны для запросов с player_id.
+        :param cache_size: Сколько полей и путей держать в LRU-кэше.
+        """
+        self.graph = graph
+        self.ownership = ownership
+        self.costs = costs
+        self.cache_size = cache_size
+        # Координаты строк на сетке для эвристики A* (строки нумеруются в порядке обхода сетки).
+        self._coords: Tuple[List[int], List[int]] | None = None
+        self._diagonal = False
+        if graph.cell_rows is not None:
+            ys, xs = np.nonzero(graph.cell_rows >= 0)
+            self._coords = (ys.tolist(), xs.tolist())
+            edge_sources = np.repeat(np.arange(graph.num_provinces), np.diff(graph.indptr))
+            self._diagonal = bool(((ys[edge_sources] != ys[graph.indices])
+                                   & (xs[edge_sources] != xs[graph.indices])).any())
+
+        # { ключ запроса: результат }. Ключ начинается с player_id: по нему
+        # при смене владельцев выбрасываются записи, зависящие от них.
+        self._cache: 'OrderedDict[Tuple[Hashable, ...], object]' = OrderedDict()
+        self._ownership_version = ownership.version if ownership is not None else 0
+        # Стоимости входа по игрокам: { player_id: (массив, тот же список) }.
+        self._node_costs: Dict[Entity, Tuple[np.ndarray, List[int]]] = {}
+
+        # Статистика кэша.
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def distance_field(self, sources: Iterable[Entity], player_id: Entity | None = None,
+                       toward: bool = False) -> np.ndarray:
+        """
+        Поле расстояний от провинций sources (или до них при toward=True).
+
+        :return: Read-only int64 по строкам графа (graph.row_of), UNREACHABLE для недостижимых.
+        """
+        rows = self._rows_of(sources)
+        field, _ = self._field(rows, player_id, toward, with_steps=False)
+        return field
+
+    def distance(self, start: Entity, goal: Entity, player_id: Entity | None = None) -> Optional[int]:
+        """Стоимость пути от start до goal или None, если пути нет."""
+        path = self.find_path(start, goal, player_id)
+        if path is None:
+            return None
+        if player_id is None:
+            return len(path) - 1
+        costs = self._costs_for(player_id)
+        return int(costs[[self.graph.row_of(entity) for entity in path[1:]]].sum())
+
+    def find_path(self, start: Entity, goal: Entity, player_id: Entity | None = None) -> Optional[List[Entity]]:
+        """Кратчайший путь (ID провинций от start до goal включительно) или None."""
+        start_row, goal_row = self._row_or_error(start), self._row_or_error(goal)
+        key = (player_id, 'path', start_row, goal_row)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return list(cached) if cached else None
+
+        # Если поле к этой цели уже посчитано (пакетные запросы), A* не нужен.
+        field_with_steps = self._cache.get((player_id, 'field', True, True, (goal_row,)))
+        if field_with_steps is not None:
+            field, steps = field_with_steps
+            rows = follow_steps(steps, field, start_row)
+        else:
+            costs = self._cost_list_for(player_id) if player_id is not None else None
+            rows = astar(self.graph, start_row, goal_row, costs, self._coords, self._diagonal)
+
+        path = None if rows is None else self.graph.row_entities[rows].tolist()
+        self._cache_put(key, tuple(path) if path is not None else ())
+        return path
+
+    def find_paths(self, starts: Sequence[Entity], goal: Entity | Iterable[Entity],
+                   player_id: Entity | None = None) -> List[Optional[List[Entity]]]:
+        """
+        Пакетный поиск путей из многих провинций к одной цели (или к ближайшей
+        из нескольких): одно поле toward=True на весь пакет.
+        """
+        goals = [goal] if isinstance(goal, (int, np.integer)) else list(goal)
+        field, steps = self._field(self._rows_of(goals), player_id, toward=True, with_steps=True)
+        row_entities = self.graph.row_entities
+        paths: List[Optional[List[Entity]]] = []
+        for start in starts:
+            rows = follow_steps(steps, field, self._row_or_error(start))
+            paths.append(None if rows is None else row_entities[rows].tolist())
+        return paths
+
+    def distances(self, starts: Sequence[Entity], goal: Entity | Iterable[Entity],
+                  player_id: Entity | None = None) -> np.ndarray:
+        """Стоимости путей из каждой провинции starts до цели (UNREACHABLE, если пути нет)."""
+        goals = [goal] if isinstance(goal, (int, np.integer)) else list(goal)
+        field = self.distance_field(goals, player_id, toward=True)
+        return field[self._rows_of(starts)]
+
+    def reachable(self, sources: Iterable[Entity], max_cost: int, player_id: Entity | None = None) -> np.ndarray:
+        """ID провинций, до которых из sources можно дойти не дороже max_cost."""
+        costs = self._costs_for(player_id) if player_id is not None else None
+        field = distance_field(self.graph, self._rows_of(sources), costs, max_cost=max_cost)
+        return self.graph.row_entities[field != UNREACHABLE]
+
+    def invalidate(self):
+        """Сбрасывает весь кэш."""
+        self._cache.clear()
+        self._node_costs.clear()
+
+    # --- Внутреннее ---
+
+    def _field(self, rows: np.ndarray, player_id: Entity | None, toward: bool,
+               with_steps: bool) -> Tuple[np.ndarray, List[int] | None]:
+        sources = tuple(np.unique(rows).tolist())
+        if player_id is not None:
+            self._check_ownership()
+        # Поле с таблицей шагов годится и для запросов без нее.
+        if not with_steps:
+            cached = self._cache.get((player_id, 'field', toward, True, sources))
+            if cached is not None:
+                return cached
+        cached = self._cache_get((player_id, 'field', toward, with_steps, sources))
+        if cached is not None:
+            return cached
+
+        costs = self._costs_for(player_id) if player_id is not None else None
+        field = distance_field(self.graph, sources, costs, toward=toward)
+        field.flags.writeable = False
+        steps = None
+        if with_steps:
+            # Списком: по таблице ходят поэлементно (follow_steps).
+            steps = next_steps(self.graph, field, costs).tolist()
+        self._cache_put((player_id, 'field', toward, with_steps, sources), (field, steps))
+        return field, steps
+
+    def _costs_for(self, player_id: Entity) -> np.ndarray:
+        return self._player_costs(player_id)[0]
+
+    def _cost_list_for(self, player_id: Entity) -> List[int]:
+        return self._player_costs(player_id)[1]
+
+    def _player_costs(self, player_id: Entity) -> Tuple[np.ndarray, List[int]]:
+        if self.ownership is None:
+            raise ValueError("Для запросов с player_id Pathfinder нужен ProvinceOwnership")
+        self._check_ownership()
+        costs = self._node_costs.get(player_id)
+        if costs is None:
+            array = self.costs.node_costs(self.ownership.owners, player_id)
+            costs = self._node_costs[player_id] = (array, array.tolist())
+        return costs
+
+    def _check_ownership(self):
+        """Выбрасывает из кэша все, что зависит от владельцев, если они изменились."""
+        if self.ownership is None or self.ownership.version == self._ownership_version:
+            return
+        self._ownership_version = self.ownership.version
+        self._node_costs.clear()
+        for key in [key for key in self._cache if key[0] is not None]:
+            del self._cache[key]
+
+    def _cache_get(self, key):
+        if key[0] is not None:
+            self._check_ownership()
+        value = self._cache.get(key)
+        if value is None:
+            self.cache_misses += 1
+            return None
+        self._cache.move_to_end(key)
+        self.cache_hits += 1
+        return value
+
+    def _cache_put(self, key, value):
+        self._cache[key] = value
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _row_or_error(self, entity: Entity) -> int:
+        row = self.graph.row_of(entity)
+        if row < 0:
+            raise KeyError(f"Сущность {entity} не является провинцией графа")
+        return row
+
+    def _rows_of(self, entities: Iterable[Entity]) -> np.ndarray:
+        return np.array([self._row_or_error(int(entity)) for entity in entities], dtype=np.int64)
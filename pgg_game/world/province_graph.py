@@ -0,0 +1,162 @@
+# src/pgg_game/world/province_graph.py
+
+from typing import Iterator, List, Tuple
+
+import numpy as np
+
+from .game_world import ENTITY_INDEX_MASK
+
+Entity = int
+
+# Смещения (dy, dx) к соседним клеткам для 4- и 8-связности.
+OFFSETS_4 = ((-1, 0), (0, -1), (0, 1), (1, 0))
+OFFSETS_8 = ((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1))
+
+
+class ProvinceGraph:
+    """
+    Граф соседства провинций в компактном формате CSR (compressed sparse row).
+
+    Каждой провинции соответствует строка (row) — плотный индекс от 0 до N-1.
+    Соседи строки r лежат в indices[indptr[r]:indptr[r + 1]].
+    Весь граф — это несколько NumPy-массивов, без отдельного set на провинцию,
+    поэтому по нему удобно ходить и векторно, и из ИИ/поиска пути.
+    """
+    def __init__(self, row_entities: np.ndarray, indptr: np.ndarray, indices: np.ndarray,
+                 cell_rows: np.ndarray | None = None):
+        # Строка -> ID сущности провинции.
+        self.row_entities = row_entities
+        # Смещения начала списка соседей каждой строки (длина N + 1).
+        self.indptr = indptr
+        # Номера строк соседей.
+        self.indices = indices
+        # Те же соседи, но сразу в виде ID сущностей.
+        self.neighbor_entities = row_entities[indices]
+        # Сетка (height, width): номер строки провинции в клетке или -1 для пустоты.
+        self.cell_rows = cell_rows
+
+        # Слот сущности (entity_index) -> строка (-1, если в слоте нет провинции этого графа).
+        # Индексация по слоту, а не по ID: ID с поколением > 0 очень большие.
+        slots = row_entities & ENTITY_INDEX_MASK
+        size = int(slots.max()) + 1 if len(row_entities) else 0
+        self.entity_rows = np.full(size, -1, dtype=np.int64)
+        self.entity_rows[slots] = np.arange(len(row_entities))
+
+        self._adjacency_lists: Tuple[List[int], List[int]] | None = None
+
+        for array in (self.row_entities, self.indptr, self.indices, self.neighbor_entities, self.entity_rows):
+            array.flags.writeable = False
+
+    @classmethod
+    def from_grid(cls, cell_entities: np.ndarray, connectivity: int = 4) -> 'ProvinceGraph':
+        """
+        Строит граф по сетке карты за линейное время.
+
+        :param cell_entities: Массив (height, width) с ID провинции в клетке или -1 для пустоты.
+        :param connectivity: 4 (соседи по сторонам) или 8 (еще и по диагонали).
+        """
+        if connectivity not in (4, 8):
+            raise ValueError(f"connectivity должна быть 4 или 8, получено {connectivity}")
+        offsets = OFFSETS_4 if connectivity == 4 else OFFSETS_8
+
+        height, width = cell_entities.shape
+        land = cell_entities >= 0
+        # Строки нумеруются в порядке обхода клеток (сверху вниз, слева направо).
+        cell_rows = np.full((height, width), -1, dtype=np.int64)
+        cell_rows[land] = np.arange(np.count_nonzero(land))
+        row_entities = cell_entities[land].astype(np.int64)
+
+        # Таблица (N, число направлений): строка соседа в каждом направлении или -1.
+        # Сетка дополняется рамкой из -1, чтобы не обрабатывать края отдельно.
+        padded = np.full((height + 2, width + 2), -1, dtype=np.int64)
+        padded[1:-1, 1:-1] = cell_rows
+        table = np.empty((len(row_entities), len(offsets)), dtype=np.int64)
+        for column, (dy, dx) in enumerate(offsets):
+            shifted = padded[1 + dy:height + 1 + dy, 1 + dx:width + 1 + dx]
+            table[:, column] = shifted[land]
+
+        # Сжатие таблицы в CSR: убираем -1, сохраняя порядок строк.
+        present = table >= 0
+        indptr = np.zeros(len(row_entities) + 1, dtype=np.int64)
+        np.cumsum(present.sum(axis=1), out=indptr[1:])
+        indices = table[present]
+        return cls(row_entities, indptr, indices, cell_rows)
+
+    @property
+    def num_provinces(self) -> int:
+        return len(self.row_entities)
+
+    @property
+    def num_edges(self) -> int:
+        """Количество ориентированных ребер (каждое соседство учтено дважды)."""
+        return len(self.indices)
+
+    def row_of(self, entity: Entity) -> int:
+        """Возвращает строку провинции или -1, если сущности нет в графе."""
+        slot = entity & ENTITY_INDEX_MASK
+        if entity < 0 or slot >= len(self.entity_rows):
+            return -1
+        row = int(self.entity_rows[slot])
+        # В слоте могла оказаться уже другая сущность (устаревший ID).
+        if row < 0 or int(self.row_entities[row]) != entity:
+            return -1
+        return row
+
+    def adjacency_lists(self) -> Tuple[List[int], List[int]]:
+        """
+        (indptr, indices) в виде списков Python — для поэлементных обходов
+        (A*), где индексация NumPy-скаляров заметно медленнее. Строятся один раз.
+        """
+        if self._adjacency_lists is None:
+            self._adjacency_lists = (self.indptr.tolist(), self.indices.tolist())
+        return self._adjacency_lists
+
+    def neighbor_rows(self, row: int) -> np.ndarray:
+        """Строки соседей (read-only срез без копирования)."""
+        return self.indices[self.indptr[row]:self.indptr[row + 1]]
+
+    def neighbors_of(self, entity: Entity) -> np.ndarray:
+        """ID сущностей-соседей (read-only срез без копирования)."""
+        row = self.row_of(entity)
+        if row < 0:
+            return self.neighbor_entities[:0]
+        return self.neighbor_entities[self.indptr[row]:self.indptr[row + 1]]
+
+    def view(self, entity: Entity) -> 'NeighborsView':
+        """Возвращает представление соседей для ProvinceInfoComponent.neighbors."""
+        return NeighborsView(self, self.row_of(entity))
+
+
+class NeighborsView:
+    """
+    Read-only представление соседей одной провинции.
+
+    Ведет себя как неизменяемая коллекция ID сущностей (in, len, итерация),
+    но данных не хранит: читает их из общего ProvinceGraph.
+    """
+    __slots__ = ('_graph', '_row')
+
+    def __init__(self, graph: ProvinceGraph, row: int):
+        self._graph = graph
+        self._row = row
+
+    def as_array(self) -> np.ndarray:
+        """Соседи в виде read-only NumPy-среза."""
+        if self._row < 0:
+            return self._graph.neighbor_entities[:0]
+        graph = self._graph
+        return graph.neighbor_entities[graph.indptr[self._row]:graph.indptr[self._row + 1]]
+
+    def __len__(self) -> int:
+        if self._row < 0:
+            return 0
+        return int(self._graph.indptr[self._row + 1] - self._graph.indptr[self._row])
+
+    def __iter__(self) -> Iterator[Entity]:
+        return iter(self.as_array().tolist())
+
+    def __contains__(self, entity: Entity) -> bool:
+        return bool((self.as_array() == entity).any())
+
+    def __repr__(self) -> str:
+        return f"NeighborsView({self.as_array().tolist()})"
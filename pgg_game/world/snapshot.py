@@ -0,0 +1,550 @@
+# src/pgg_game/world/snapshot.py
+
+"""
+Бинарные снимки (сохранения) GameWorld.
+
+Формат файла:
+
+    [MAGIC 8 байт] [блок 0] [блок 1] ... [индекс JSON] [длина индекса, uint64] [MAGIC 8 байт]
+
+Каждое хранилище компонентов записывается по колонкам: отдельный типизированный
+блок на поле (ID сущностей, x, y, цвет и т.д.), строки — таблицей (смещения + UTF-8).
+Блоки выровнены по 64 байтам, поэтому при загрузке они открываются через
+numpy.memmap: открытие даже огромного сохранения почти мгновенно, а с диска
+читаются только те страницы, к которым действительно обращаются.
+
+Кроме полных снимков поддерживаются дельты: файл того же формата, в котором
+записаны только измененные/добавленные строки и удаленные сущности относительно
+базового снимка. Для автосохранения между ходами достаточно писать дельту
+к последнему полному снимку.
+"""
+
+import json
+import os
+import uuid
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+import pygame
+
+from .game_world import GameWorld, gc_paused
+from .province_graph import ProvinceGraph, NeighborsView
+from .ownership import ProvinceOwnership
+from .economy import ProvinceEconomy
+from .territory import TerritoryMap
+from ..components.transform import TransformComponent
+from ..components.renderable import RenderableComponent, ShapeType
+from ..components.province_info import ProvinceInfoComponent
+from ..components.player_info import PlayerInfoComponent
+from ..components.player_input import PlayerInputComponent
+from ..components.selected import SelectedComponent
+
+MAGIC = b"PGGSNAP1"
+# Версия 2: вместо счетчика next_entity_id сохраняются поколения слотов и свободные слоты.
+FORMAT_VERSION = 2
+# Версии, которые умеет читать load_world.
+SUPPORTED_FORMAT_VERSIONS = (1, 2)
+ALIGNMENT = 64
+# Значение в матрице ресурсов, означающее "ресурса в словаре нет".
+MISSING_RESOURCE = np.iinfo(np.int64).min
+
+
+# --- Схемы компонентов ---
+# Вид поля определяет, как оно превращается в колонку:
+#   'int16' / 'int32' / 'int64' — число;
+#   'color' — pygame.Color как uint8 RGBA (n, 4);
+#   ('enum', EnumType) — значение перечисления как int8;
+#   'str' — строка (таблица строк в файле);
+#   'opt_int64' — Optional[int], None хранится как -1;
+#   'resources' — Dict[str, int], матрица (n, число ключей).
+# Поле ProvinceInfoComponent.neighbors не сохраняется: граф соседства пишется целиком.
+COMPONENT_SCHEMAS: Dict[str, Tuple[type, List[Tuple[str, Any]]]] = {
+    'TransformComponent': (TransformComponent, [
+        ('x', 'int32'), ('y', 'int32'), ('width', 'int32'), ('height', 'int32'),
+    ]),
+    'RenderableComponent': (RenderableComponent, [
+        ('color', 'color'), ('shape', ('enum', ShapeType)), ('layer', 'int16'),
+    ]),
+    'ProvinceInfoComponent': (ProvinceInfoComponent, [
+        ('name', 'str'), ('owner_id', 'opt_int64'), ('resources', 'resources'),
+    ]),
+    'PlayerInfoComponent': (PlayerInfoComponent, [
+        ('name', 'str'), ('color', 'color'), ('turn_order', 'int32'), ('gold', 'int64'),
+    ]),
+    # Компоненты-маркеры: сохраняется только список сущностей.
+    'PlayerInputComponent': (PlayerInputComponent, []),
+    'SelectedComponent': (SelectedComponent, []),
+}
+
+
+@dataclass
+class EncodedStore:
+    """
+    Хранилище компонентов одного типа в колоночном виде.
+    Строки отсортированы по ID сущности. Строковые поля в памяти — массивы
+    объектов str, ресурсы — матрица со списком ключей в resource_keys.
+    """
+    entities: np.ndarray
+    columns: Dict[str, np.ndarray]
+    resource_keys: Dict[str, List[str]] = field(default_factory=dict)
+
+
+class SnapshotError(Exception):
+    """Файл не является снимком, поврежден или несовместим с базой."""
+
+
+# --- Кодирование мира в колонки ---
+
+def _encode_values(kind: Any, values: list) -> np.ndarray | Tuple[np.ndarray, List[str]]:
+    if kind in ('int16', 'int32', 'int64'):
+        return np.asarray(values, dtype=kind)
+    if kind == 'color':
+        return np.asarray([tuple(pygame.Color(color)) for color in values], dtype=np.uint8).reshape(-1, 4)
+    if isinstance(kind, tuple) and kind[0] == 'enum':
+        return np.asarray([value.value for value in values], dtype=np.int8)
+    if kind == 'str':
+        return np.asarray(values, dtype=object)
+    if kind == 'opt_int64':
+        return np.asarray([-1 if value is None else value for value in values], dtype=np.int64)
+    if kind == 'resources':
+        keys = sorted({key for resources in values for key in resources})
+        matrix = np.full((len(values), len(keys)), MISSING_RESOURCE, dtype=np.int64)
+        for row, resources in enumerate(values):
+            for column, key in enumerate(keys):
+                if key in resources:
+                    matrix[row, column] = resources[key]
+        return matrix, keys
+    raise ValueError(f"Неизвестный вид поля: {kind!r}")
+
+
+def encode_store(world: GameWorld, component_type: type, schema: List[Tuple[str, Any]]) -> EncodedStore:
+    """Переводит хранилище одного типа компонентов в колонки."""
+    storage = world.components.get(component_type, {})
+    entities = np.fromiter(sorted(storage.keys()), dtype=np.int64, count=len(storage))
+
+    columnar = world.get_columnar_store(component_type)
+    columns: Dict[str, np.ndarray] = {}
+    resource_keys: Dict[str, List[str]] = {}
+    if columnar is not None:
+        # Быстрый путь: данные уже лежат в колонках, нужно только упорядочить строки.
+        slots = np.fromiter((columnar.slot_of(entity) for entity in entities.tolist()),
+                            dtype=np.int64, count=len(entities))
+        for name, _ in schema:
+            columns[name] = columnar.column(name)[slots]
+        return EncodedStore(entities, columns)
+
+    instances = [storage[entity] for entity in entities.tolist()]
+    for name, kind in schema:
+        encoded = _encode_values(kind, [getattr(instance, name) for instance in instances])
+        if kind == 'resources':
+            columns[name], resource_keys[name] = encoded
+        else:
+            columns[name] = encoded
+    return EncodedStore(entities, columns, resource_keys)
+
+
+def _decode_instances(component_type: type, schema, store: EncodedStore) -> list:
+    """Обратное преобразование: колонки -> список экземпляров dataclass."""
+    count = len(store.entities)
+    field_values: Dict[str, list] = {}
+    for name, kind in schema:
+        column = store.columns[name]
+        if kind in ('int16', 'int32', 'int64'):
+            field_values[name] = column.tolist()
+        elif kind == 'color':
+            field_values[name] = [pygame.Color(*rgba) for rgba in column.tolist()]
+        elif isinstance(kind, tuple) and kind[0] == 'enum':
+            enum_type: type[Enum] = kind[1]
+            members = {member.value: member for member in enum_type}
+            field_values[name] = [members[value] for value in column.tolist()]
+        elif kind == 'str':
+            field_values[name] = list(column)
+        elif kind == 'opt_int64':
+            field_values[name] = [None if value < 0 else value for value in column.tolist()]
+        elif kind == 'resources':
+            keys = store.resource_keys.get(name, [])
+            field_values[name] = [
+                {key: value for key, value in zip(keys, row) if value != MISSING_RESOURCE}
+                for row in column.tolist()
+            ]
+    names = [name for name, _ in schema]
+    return [
+        component_type(**{name: field_values[name][row] for name in names})
+        for row in range(count)
+    ]
+
+
+# --- Запись файла ---
+
+class _BlockWriter:
+    """Пишет выровненные блоки массивов и собирает для них записи индекса."""
+    def __init__(self, file):
+        self.file = file
+        file.write(MAGIC)
+
+    def write(self, array: np.ndarray) -> dict:
+        array = np.ascontiguousarray(array)
+        padding = -self.file.tell() % ALIGNMENT
+        self.file.write(b"\0" * padding)
+        offset = self.file.tell()
+        self.file.write(array.tobytes())
+        return {'offset': offset, 'dtype': array.dtype.str, 'shape': list(array.shape)}
+
+    def write_strings(self, strings: np.ndarray) -> dict:
+        """Таблица строк: смещения (n + 1) и общий блок байтов UTF-8."""
+        encoded = [value.encode('utf-8') for value in strings.tolist()]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(data) for data in encoded], out=offsets[1:])
+        data = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        return {'strings': True, 'offsets': self.write(offsets), 'data': self.write(data)}
+
+    def finish(self, index: dict):
+        payload = json.dumps(index, ensure_ascii=False).encode('utf-8')
+        self.file.write(payload)
+        self.file.write(np.uint64(len(payload)).tobytes())
+        self.file.write(MAGIC)
+
+
+def _write_store(writer: _BlockWriter, schema, store: EncodedStore) -> dict:
+    entry = {'count': len(store.entities), 'entities': writer.write(store.entities), 'columns': {}}
+    for name, kind in schema:
+        column = store.columns[name]
+        entry['columns'][name] = writer.write_strings(column) if kind == 'str' else writer.write(column)
+    if store.resource_keys:
+        entry['resource_keys'] = store.resource_keys
+    return entry
+
+
+def _graph_entry(writer: _BlockWriter, graph: ProvinceGraph | None) -> dict | None:
+    if graph is None:
+        return None
+    entry = {
+        'row_entities': writer.write(graph.row_entities),
+        'indptr': writer.write(graph.indptr),
+        'indices': writer.write(graph.indices),
+    }
+    if graph.cell_rows is not None:
+        entry['cell_rows'] = writer.write(graph.cell_rows)
+    return entry
+
+
+def _entities_entry(writer: _BlockWriter, world: GameWorld) -> dict:
+    generations, free_indices = world.get_entity_state()
+    return {
+        'generations': writer.write(np.asarray(generations, dtype=np.int64)),
+        'free': writer.write(np.asarray(free_indices, dtype=np.int64)),
+    }
+
+
+def _encode_world(world: GameWorld) -> Dict[str, EncodedStore]:
+    stores = {}
+    for name, (component_type, schema) in COMPONENT_SCHEMAS.items():
+        stores[name] = encode_store(world, component_type, schema)
+    # Типы, для которых нет схемы, сохранить нельзя — лучше сообщить сразу.
+    unknown = [component_type.__name__ for component_type, storage in world.components.items()
+               if storage and component_type.__name__ not in COMPONENT_SCHEMAS]
+    if unknown:
+        raise SnapshotError(f"Нет схемы сохранения для компонентов: {', '.join(unknown)}")
+    return stores
+
+
+def save_snapshot(path: str, world: GameWorld, turn_state: dict | None = None,
+                  extra: dict | None = None) -> str:
+    """
+    Сохраняет полный снимок мира.
+
+    :param turn_state: Состояние TurnSystem (TurnSystem.get_state()).
+    :param extra: Любые дополнительные JSON-данные (например, seed карты).
+    :return: Уникальный ID снимка (на него ссылаются дельты).
+    """
+    snapshot_id = uuid.uuid4().hex
+    stores = _encode_world(world)
+    with open(path, 'wb') as file:
+        writer = _BlockWriter(file)
+        index = {
+            'format_version': FORMAT_VERSION,
+            'kind': 'full',
+            'snapshot_id': snapshot_id,
+            'entities': _entities_entry(writer, world),
+            'turn_state': turn_state,
+            'extra': extra or {},
+            'stores': {
+                name: _write_store(writer, COMPONENT_SCHEMAS[name][1], store)
+                for name, store in stores.items()
+            },
+            'province_graph': _graph_entry(writer, world.province_graph),
+        }
+        writer.finish(index)
+    return snapshot_id
+
+
+def save_delta(path: str, world: GameWorld, base_path: str, turn_state: dict | None = None,
+               extra: dict | None = None):
+    """
+    Сохраняет дельту: только строки, отличающиеся от базового полного снимка,
+    и список удаленных сущностей. Дельта всегда строится к полному снимку
+    (без цепочек), поэтому для загрузки нужны ровно два файла.
+    """
+    base = open_snapshot(base_path)
+    if base.kind != 'full':
+        raise SnapshotError("Дельта строится только к полному снимку")
+    current = _encode_world(world)
+
+    with open(path, 'wb') as file:
+        writer = _BlockWriter(file)
+        stores_index = {}
+        for name, store in current.items():
+            schema = COMPONENT_SCHEMAS[name][1]
+            changed, removed = _diff_store(schema, base.read_store(name), store)
+            entry = _write_store(writer, schema, changed)
+            entry['removed'] = writer.write(removed)
+            stores_index[name] = entry
+
+        # Граф соседства меняется только при перегенерации карты — тогда пишем его целиком.
+        graph = world.province_graph
+        graph_changed = graph is not None and not _graph_equal(base.read_graph(), graph)
+        index = {
+            'format_version': FORMAT_VERSION,
+            'kind': 'delta',
+            'snapshot_id': uuid.uuid4().hex,
+            'base_snapshot_id': base.snapshot_id,
+            # Путь к базе относительно дельты, чтобы пару файлов можно было переносить.
+            'base_path': os.path.relpath(os.path.abspath(base_path), os.path.dirname(os.path.abspath(path))),
+            'entities': _entities_entry(writer, world),
+            'turn_state': turn_state,
+            'extra': extra or {},
+            'stores': stores_index,
+            'province_graph': _graph_entry(writer, graph) if graph_changed else None,
+        }
+        writer.finish(index)
+
+
+def _graph_equal(a: ProvinceGraph | None, b: ProvinceGraph | None) -> bool:
+    if a is None or b is None:
+        return a is b
+    return (np.array_equal(a.row_entities, b.row_entities) and np.array_equal(a.indptr, b.indptr)
+            and np.array_equal(a.indices, b.indices))
+
+
+def _align_resources(matrix: np.ndarray, keys: List[str], target_keys: List[str]) -> np.ndarray:
+    """Приводит матрицу ресурсов к другому набору ключей (недостающие — MISSING_RESOURCE)."""
+    if keys == target_keys:
+        return matrix
+    aligned = np.full((matrix.shape[0], len(target_keys)), MISSING_RESOURCE, dtype=np.int64)
+    for column, key in enumerate(target_keys):
+        if key in keys:
+            aligned[:, column] = matrix[:, keys.index(key)]
+    return aligned
+
+
+def _diff_store(schema, base: EncodedStore, current: EncodedStore) -> Tuple[EncodedStore, np.ndarray]:
+    """
+    Векторно сравнивает два хранилища.
+    :return: (измененные и новые строки текущего хранилища, ID удаленных сущностей)
+    """
+    removed = np.setdiff1d(base.entities, current.entities, assume_unique=True)
+    # Позиции сущностей текущего хранилища в базе (обе стороны отсортированы).
+    positions = np.searchsorted(base.entities, current.entities)
+    positions = np.minimum(positions, max(len(base.entities) - 1, 0))
+    in_base = (base.entities[positions] == current.entities) if len(base.entities) else \
+        np.zeros(len(current.entities), dtype=bool)
+
+    changed = ~in_base
+    common = np.nonzero(in_base)[0]
+    base_rows = positions[common]
+    for name, kind in schema:
+        current_column = current.columns[name]
+        base_column = base.columns[name]
+        if kind == 'resources':
+            keys = current.resource_keys.get(name, [])
+            base_column = _align_resources(np.asarray(base_column), base.resource_keys.get(name, []), keys)
+        differs = current_column[common] != base_column[base_rows]
+        if differs.ndim > 1:
+            differs = differs.any(axis=tuple(range(1, differs.ndim)))
+        changed[common] |= differs
+
+    rows = np.nonzero(changed)[0]
+    changed_store = EncodedStore(
+        current.entities[rows],
+        {name: current.columns[name][rows] for name, _ in schema},
+        current.resource_keys,
+    )
+    return changed_store, removed
+
+
+# --- Чтение ---
+
+class Snapshot:
+    """
+    Открытый файл снимка. Открытие читает только индекс в конце файла;
+    колонки отдаются как numpy.memmap и читаются с диска по мере обращения.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as file:
+            if file.read(len(MAGIC)) != MAGIC:
+                raise SnapshotError(f"{path}: не файл снимка")
+            file.seek(-(len(MAGIC) + 8), os.SEEK_END)
+            index_length = int(np.frombuffer(file.read(8), dtype=np.uint64)[0])
+            if file.read(len(MAGIC)) != MAGIC:
+                raise SnapshotError(f"{path}: файл поврежден (нет завершающей сигнатуры)")
+            file.seek(-(len(MAGIC) + 8 + index_length), os.SEEK_END)
+            self.index = json.loads(file.read(index_length).decode('utf-8'))
+        if self.index.get('format_version') not in SUPPORTED_FORMAT_VERSIONS:
+            raise SnapshotError(f"{path}: неподдерживаемая версия формата {self.index.get('format_version')}")
+
+    @property
+    def kind(self) -> str:
+        return self.index['kind']
+
+    @property
+    def snapshot_id(self) -> str:
+        return self.index['snapshot_id']
+
+    @property
+    def turn_state(self) -> dict | None:
+        return self.index['turn_state']
+
+    @property
+    def extra(self) -> dict:
+        return self.index['extra']
+
+    def array(self, entry: dict) -> np.ndarray:
+        """Открывает блок как memmap в режиме copy-on-write (запись не меняет файл)."""
+        shape = tuple(entry['shape'])
+        if 0 in shape:
+            return np.empty(shape, dtype=np.dtype(entry['dtype']))
+        return np.memmap(self.path, dtype=np.dtype(entry['dtype']), mode='c', offset=entry['offset'], shape=shape)
+
+    def column(self, store_name: str, field_name: str) -> np.ndarray:
+        """Колонка хранилища (для строковых полей — массив объектов str)."""
+        entry = self.index['stores'][store_name]['columns'][field_name]
+        if entry.get('strings'):
+            return self._read_strings(entry)
+        return self.array(entry)
+
+    def entities(self, store_name: str) -> np.ndarray:
+        return self.array(self.index['stores'][store_name]['entities'])
+
+    def read_store(self, store_name: str) -> EncodedStore:
+        if store_name not in self.index['stores']:
+            schema = COMPONENT_SCHEMAS[store_name][1]
+            return EncodedStore(np.empty(0, dtype=np.int64), {name: np.empty(0) for name, _ in schema})
+        entry = self.index['stores'][store_name]
+        columns = {name: self.column(store_name, name) for name in entry['columns']}
+        return EncodedStore(self.entities(store_name), columns, entry.get('resource_keys', {}))
+
+    def read_entity_state(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Поколения слотов и свободные слоты (см. GameWorld.get_entity_state)."""
+        entry = self.index.get('entities')
+        if entry is None:
+            # Версия 1: сущности выдавались подряд и никогда не переиспользовались.
+            return np.zeros(self.index['next_entity_id'], dtype=np.int64), np.empty(0, dtype=np.int64)
+        return self.array(entry['generations']), self.array(entry['free'])
+
+    def read_removed(self, store_name: str) -> np.ndarray:
+        entry = self.index['stores'].get(store_name, {}).get('removed')
+        return self.array(entry) if entry else np.empty(0, dtype=np.int64)
+
+    def read_graph(self) -> ProvinceGraph | None:
+        entry = self.index.get('province_graph')
+        if entry is None:
+            return None
+        cell_rows = self.array(entry['cell_rows']) if 'cell_rows' in entry else None
+        return ProvinceGraph(self.array(entry['row_entities']), self.array(entry['indptr']),
+                             self.array(entry['indices']), cell_rows)
+
+    def _read_strings(self, entry: dict) -> np.ndarray:
+        offsets = self.array(entry['offsets'])
+        data = self.array(entry['data']).tobytes()
+        bounds = offsets.tolist()
+        strings = np.empty(len(bounds) - 1, dtype=object)
+        strings[:] = [data[start:end].decode('utf-8') for start, end in zip(bounds, bounds[1:])]
+        return strings
+
+
+def open_snapshot(path: str) -> Snapshot:
+    """Открывает снимок (полный или дельту) без чтения данных колонок."""
+    return Snapshot(path)
+
+
+def _apply_delta(schema, base: EncodedStore, delta: EncodedStore, removed: np.ndarray) -> EncodedStore:
+    """Накладывает строки дельты на базовое хранилище."""
+    keep = ~np.isin(base.entities, removed) & ~np.isin(base.entities, delta.entities)
+    entities = np.concatenate([base.entities[keep], delta.entities])
+    order = np.argsort(entities, kind='stable')
+    columns = {}
+    resource_keys = dict(delta.resource_keys)
+    for name, kind in schema:
+        base_column = base.columns[name][keep]
+        if kind == 'resources':
+            keys = sorted(set(base.resource_keys.get(name, [])) | set(delta.resource_keys.get(name, [])))
+            base_column = _align_resources(np.asarray(base_column), base.resource_keys.get(name, []), keys)
+            delta_column = _align_resources(np.asarray(delta.columns[name]), delta.resource_keys.get(name, []), keys)
+            resource_keys[name] = keys
+        else:
+            delta_column = delta.columns[name]
+        columns[name] = np.concatenate([base_column, delta_column])[order]
+    return EncodedStore(entities[order], columns, resource_keys)
+
+
+def load_world(path: str, columnar_storage: bool = False) -> Tuple[GameWorld, dict | None, dict]:
+    """
+    Загружает мир из полного снимка или дельты (база подгружается автоматически).
+
+    :param columnar_storage: Создать мир с колоночными хранилищами. Transform и
+        Renderable тогда работают прямо поверх memmap-колонок файла без копирования.
+    :return: (мир, состояние TurnSystem или None, extra)
+    """
+    snapshot = open_snapshot(path)
+    base = snapshot
+    if snapshot.kind == 'delta':
+        base_path = os.path.join(os.path.dirname(os.path.abspath(path)), snapshot.index['base_path'])
+        base = open_snapshot(base_path)
+        if base.snapshot_id != snapshot.index['base_snapshot_id']:
+            raise SnapshotError(f"{path}: базовый снимок {base_path} не совпадает с тем, к которому писалась дельта")
+
+    world = GameWorld(columnar_storage=columnar_storage)
+    # Слоты сущностей восстанавливаем до компонентов: add_component принимает только живые ID.
+    world.set_entity_state(*(array.tolist() for array in snapshot.read_entity_state()))
+    with gc_paused():
+        for name, (component_type, schema) in COMPONENT_SCHEMAS.items():
+            store = base.read_store(name)
+            if snapshot is not base:
+                store = _apply_delta(schema, store, snapshot.read_store(name), snapshot.read_removed(name))
+            _materialize_store(world, component_type, schema, store)
+
+    graph = snapshot.read_graph() if snapshot.index.get('province_graph') else base.read_graph()
+    if graph is not None:
+        _attach_graph(world, graph)
+
+    return world, snapshot.turn_state, snapshot.extra
+
+
+def _materialize_store(world: GameWorld, component_type: type, schema, store: EncodedStore):
+    if len(store.entities) == 0:
+        return
+    columnar = world.get_columnar_store(component_type)
+    if columnar is not None:
+        # Колонки снимка уже в нужном формате: подменяем хранилище целиком.
+        from .columnar_storage import ColumnarStore
+        adopted = ColumnarStore.from_arrays(component_type, columnar.column_specs, store.entities,
+                                            {name: store.columns[name] for name, _ in schema})
+        world.replace_storage(component_type, adopted)
+        return
+
+    world.add_components(component_type, store.entities.tolist(), _decode_instances(component_type, schema, store))
+
+
+def _attach_graph(world: GameWorld, graph: ProvinceGraph):
+    world.province_graph = graph
+    for row, entity in enumerate(graph.row_entities.tolist()):
+        province_info = world.get_component(entity, ProvinceInfoComponent)
+        if province_info is not None:
+            province_info.neighbors = NeighborsView(graph, row)
+    world.province_ownership = ProvinceOwnership.from_world(world, graph)
+    world.province_economy = ProvinceEconomy.from_world(world, world.province_ownership)
+    if graph.cell_rows is not None:
+        world.province_territories = TerritoryMap.from_world(world, world.province_ownership)
@@ -0,0 +1,489 @@
+# src/pgg_game/world/spatial_index.py
+
+from array import array
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Set, Tuple
+
+import numpy as np
+
+Entity = int
+# Прямоугольник сущности в пикселях: (x, y, width, height)
+Rect = Tuple[int, int, int, int]
+Cell = Tuple[int, int]
+
+
+def _contains_point(rect: Rect, x: float, y: float) -> bool:
+    rx, ry, rw, rh = rect
+    return rx <= x < rx + rw and ry <= y < ry + rh
+
+
+def _intersects_rect(rect: Rect, x: float, y: float, width: float, height: float) -> bool:
+    rx, ry, rw, rh = rect
+    return rx < x + width and x < rx + rw and ry < y + height and y < ry + rh
+
+
+def _intersects_circle(rect: Rect, cx: float, cy: float, radius: float) -> bool:
+    # Ближайшая к центру окружности точка прямоугольника.
+    rx, ry, rw, rh = rect
+    nearest_x = min(max(cx, rx), rx + rw)
+    nearest_y = min(max(cy, ry), ry + rh)
+    dx = cx - nearest_x
+    dy = cy - nearest_y
+    return dx * dx + dy * dy <= radius * radius
+
+
+class SpatialHash:
+    """
+    Пространственный хэш: плоскость разбита на квадратные ячейки размера cell_size,
+    и каждая сущность записана во все ячейки, которые пересекает ее прямоугольник.
+
+    Запросы проверяют только ячейки, попавшие в область поиска, поэтому их стоимость
+    зависит от размера области, а не от общего числа сущностей в мире.
+    """
+    def __init__(self, cell_size: int):
+        self.cell_size = cell_size
+        # { (cx, cy): {entity, ...} }
+        self._cells: Dict[Cell, Set[Entity]] = defaultdict(set)
+        # { entity: (x, y, width, height) } — нужен для точной проверки и удаления.
+        self._rects: Dict[Entity, Rect] = {}
+
+    def __len__(self) -> int:
+        return len(self._rects)
+
+    def __contains__(self, entity: Entity) -> bool:
+        return entity in self._rects
+
+    def insert(self, entity: Entity, rect: Rect):
+        """Добавляет сущность или обновляет ее положение."""
+        if entity in self._rects:
+            self.remove(entity)
+        self._rects[entity] = rect
+        for cell in self._cells_for_rect(*rect):
+            self._cells[cell].add(entity)
+
+    def remove(self, entity: Entity):
+        """Удаляет сущность из индекса (если она там есть)."""
+        rect = self._rects.pop(entity, None)
+        if rect is None:
+            return
+        for cell in self._cells_for_rect(*rect):
+            bucket = self._cells.get(cell)
+            if bucket is not None:
+                bucket.discard(entity)
+                if not bucket:
+                    del self._cells[cell]
+
+    def query_point(self, x: float, y: float) -> List[Entity]:
+        """Возвращает сущности, чей прямоугольник содержит точку."""
+        cell = (int(x // self.cell_size), int(y // self.cell_size))
+        bucket = self._cells.get(cell, ())
+        return [entity for entity in bucket if _contains_point(self._rects[entity], x, y)]
+
+    def query_rect(self, x: float, y: float, width: float, height: float) -> Set[Entity]:
+        """Возвращает сущности, пересекающие прямоугольник."""
+        result = set()
+        for entity in self._candidates(self._cells_for_rect(x, y, width, height)):
+            if _intersects_rect(self._rects[entity], x, y, width, height):
+                result.add(entity)
+        return result
+
+    def query_radius(self, cx: float, cy: float, radius: float) -> Set[Entity]:
+        """Возвращает сущности, пересекающие круг с центром (cx, cy)."""
+        cells = self._cells_for_rect(cx - radius, cy - radius, radius * 2, radius * 2)
+        result = set()
+        for entity in self._candidates(cells):
+            if _intersects_circle(self._rects[entity], cx, cy, radius):
+                result.add(entity)
+        return result
+
+    def _candidates(self, cells: Iterable[Cell]) -> Set[Entity]:
+        candidates = set()
+        for cell in cells:
+            bucket = self._cells.get(cell)
+            if bucket:
+                candidates.update(bucket)
+        return candidates
+
+    def _cells_for_rect(self, x: float, y: float, width: float, height: float) -> List[Cell]:
+        size = self.cell_size
+        first_cx = int(x // size)
+        first_cy = int(y // size)
+        # Пустой прямоугольник все равно занимает одну ячейку.
+        last_cx = max(first_cx, int((x + width - 1) // size))
+        last_cy = max(first_cy, int((y + height - 1) // size))
+        return [
+            (cx, cy)
+            for cy in range(first_cy, last_cy + 1)
+            for cx in range(first_cx, last_cx + 1)
+        ]
+
+
+class TileGrid:
+    """
+    Равномерная сетка для тайлов карты: в каждой ячейке размера tile_size
+    хранится ровно одна сущность. Подходит только для сущностей, выровненных
+    по сетке и имеющих размер ровно в один тайл (провинции карты).
+    Поиск по точке — один доступ к словарю.
+
+    Прямоугольник сетки под целую карту можно заранее отвести под плотную
+    область (reserve_region): ее ячейки — массив NumPy с ID сущностей, и
+    миллион клеток карты записывается в нее векторно, без записей словаря.
+    """
+    def __init__(self, tile_size: int):
+        self.tile_size = tile_size
+        # { (col, row): entity } — клетки вне плотной области.
+        self._cells: Dict[Cell, Entity] = {}
+        # { entity: (col, row) }
+        self._cell_of: Dict[Entity, Cell] = {}
+
+        # Плотная область: левая верхняя клетка и массив (height, width) с ID или -1.
+        self._region_origin: Cell = (0, 0)
+        self._region: np.ndarray | None = None
+        self._region_flat: np.ndarray | None = None  # Тот же массив одной строкой (view)
+        self._region_count = 0
+        # Обратный поиск для области: слот сущности -> номер ячейки в _region_flat
+        # или -1. Слоты переиспользуются, а удаление запись не стирает, поэтому
+        # найденная ячейка сверяется с содержимым области. Массив array, как
+        # в LazyComponentStore: поэлементно без скаляров NumPy, пакетно — np.frombuffer.
+        self._region_cell_of = array('q')
+        self._slot_mask = 0
+
+    def __len__(self) -> int:
+        return len(self._cell_of) + self._region_count
+
+    def __contains__(self, entity: Entity) -> bool:
+        return entity in self._cell_of or self._region_cell(entity) >= 0
+
+    def reserve_region(self, first_col: int, first_row: int, width: int, height: int) -> bool:
+        """
+        Отводит прямоугольник клеток под плотную область (например, под карту,
+        которую сейчас создаст генератор). Тайлы, уже лежащие в прямоугольнике,
+        переносятся в область.
+
+        :return: False, если прежняя область еще занята: тогда она остается,
+            а новые клетки вне ее записываются в словарь, как обычно.
+        """
+        if self._region_count:
+            return False
+        # Слот сущности — младшие биты ID (см. game_world). Модуль мира сам
+        # импортирует этот, поэтому импортируем здесь.
+        from .game_world import ENTITY_INDEX_MASK
+        self._slot_mask = ENTITY_INDEX_MASK
+        self._region_origin = (first_col, first_row)
+        self._region = np.full((height, width), -1, dtype=np.int64)
+        self._region_flat = self._region.ravel()
+        self._region_cell_of = array('q')
+        for (col, row), entity in list(self._cells.items()):
+            if self._in_region(col, row):
+                del self._cells[(col, row)]
+                del self._cell_of[entity]
+                self._put((col, row), entity)
+        return True
+
+    def fits(self, rect: Rect) -> bool:
+        """Проверяет, является ли прямоугольник ровно одним тайлом сетки."""
+        x, y, width, height = rect
+        size = self.tile_size
+        return width == size and height == size and x % size == 0 and y % size == 0
+
+    def try_insert(self, entity: Entity, rect: Rect) -> bool:
+        """
+        Пытается записать сущность в сетку.
+        :return: False, если прямоугольник не является тайлом или ячейка уже занята.
+        """
+        if not self.fits(rect):
+            return False
+        cell = (rect[0] // self.tile_size, rect[1] // self.tile_size)
+        occupant = self.at_cell(*cell)
+        if occupant is not None and occupant != entity:
+            return False
+        self.remove(entity)
+        self._put(cell, entity)
+        return True
+
+    def insert_many(self, entities: List[Entity], rects: List[Rect]) -> List[Tuple[Entity, Rect]]:
+        """
+        Записывает в сетку много новых сущностей (которых в сетке еще нет).
+        Если все ячейки свободны, запись идет двумя dict.update.
+
+        :return: Пары (сущность, прямоугольник), которые в сетку не попали.
+        """
+        size = self.tile_size
+        cells, accepted, accepted_rects, rejected = [], [], [], []
+        for entity, rect in zip(entities, rects):
+            x, y, width, height = rect
+            if width == size and height == size and x % size == 0 and y % size == 0:
+                cells.append((x // size, y // size))
+                accepted.append(entity)
+                accepted_rects.append(rect)
+            else:
+                rejected.append((entity, rect))
+
+        cell_set = set(cells)
+        if self._region is None and len(cell_set) == len(cells) and self._cells.keys().isdisjoint(cell_set):
+            self._cells.update(zip(cells, accepted))
+            self._cell_of.update(zip(accepted, cells))
+            return rejected
+
+        # Есть занятые ячейки или плотная область — раскладываем по одной.
+        for cell, entity, rect in zip(cells, accepted, accepted_rects):
+            if self.at_cell(*cell) is not None:
+                rejected.append((entity, rect))
+            else:
+                self._put(cell, entity)
+        return rejected
+
+    def insert_cells(self, entities: List[Entity], cols: np.ndarray, rows: np.ndarray) -> List[int]:
+        """
+        Записывает в сетку много новых сущностей по номерам их клеток.
+        Если все ячейки свободны и различны, запись идет одной операцией NumPy
+        (все ячейки в плотной области) или двумя dict.update (все вне ее).
+
+        :return: Номера (в entities) сущностей, которые в сетку не попали.
+        """
+        cols = cols.astype(np.int64)
+        rows = rows.astype(np.int64)
+        region = self._region
+        if region is not None and len(cols):
+            first_col, first_row = self._region_origin
+            local_cols, local_rows = cols - first_col, rows - first_row
+            height, width = region.shape
+            if (local_cols.min() >= 0 and local_rows.min() >= 0
+                    and local_cols.max() < width and local_rows.max() < height):
+                flat = local_rows * width + local_cols
+                flat_region = self._region_flat
+                if (flat_region[flat] < 0).all():
+                    ids = np.asarray(entities, dtype=np.int64)
+                    flat_region[flat] = ids
+                    # Если клетки повторяются, в такой клетке осталась только последняя сущность.
+                    if (flat_region[flat] == ids).all():
+                        self._region_count += len(flat)
+                        slots = ids & self._slot_mask
+                        if slots.max() >= len(self._region_cell_of):
+                            self._grow_cell_of(int(slots.max()) + 1)
+                        np.frombuffer(self._region_cell_of, dtype=np.int64)[slots] = flat
+                        return []
+                    flat_region[flat] = -1
+
+        keys = (cols << 32) ^ (rows & 0xFFFFFFFF)
+        cells = list(zip(cols.tolist(), rows.tolist()))
+        if (region is None and len(np.unique(keys)) == len(cells)
+                and self._cells.keys().isdisjoint(cells)):
+            self._cells.update(zip(cells, entities))
+            self._cell_of.update(zip(entities, cells))
+            return []
+
+        rejected = []
+        for index, (cell, entity) in enumerate(zip(cells, entities)):
+            if self.at_cell(*cell) is not None:
+                rejected.append(index)
+            else:
+                self._put(cell, entity)
+        return rejected
+
+    def remove(self, entity: Entity):
+        cell = self._cell_of.pop(entity, None)
+        if cell is not None:
+            del self._cells[cell]
+            return
+        flat = self._region_cell(entity)
+        if flat >= 0:
+            self._region_flat[flat] = -1
+            self._region_count -= 1
+
+    def remove_many(self, entities: List[Entity]):
+        """Удаляет из сетки много сущностей разом (тех, что в ней есть)."""
+        for entity in entities:
+            cell = self._cell_of.pop(entity, None)
+            if cell is not None:
+                del self._cells[cell]
+        if not self._region_count:
+            return
+        ids = np.array(entities, dtype=np.int64)
+        flat = self._region_cells(ids)
+        found = flat[flat >= 0]
+        self._region_flat[found] = -1
+        self._region_count -= len(found)
+
+    def at_cell(self, col: int, row: int) -> Entity | None:
+        """Возвращает сущность в ячейке сетки (col, row) или None."""
+        if self._region is not None and self._in_region(col, row):
+            entity = int(self._region[row - self._region_origin[1], col - self._region_origin[0]])
+            return entity if entity >= 0 else None
+        return self._cells.get((col, row))
+
+    def query_point(self, x: float, y: float) -> List[Entity]:
+        entity = self.at_cell(int(x // self.tile_size), int(y // self.tile_size))
+        return [] if entity is None else [entity]
+
+    def query_rect(self, x: float, y: float, width: float, height: float) -> Set[Entity]:
+        size = self.tile_size
+        first_col, first_row = int(x // size), int(y // size)
+        last_col = int((x + width - 1) // size)
+        last_row = int((y + height - 1) // size)
+        result = set()
+        if self._region is not None:
+            # Пересечение с плотной областью — срез массива.
+            region_col, region_row = self._region_origin
+            block = self._region[max(first_row - region_row, 0):max(last_row - region_row + 1, 0),
+                                 max(first_col - region_col, 0):max(last_col - region_col + 1, 0)]
+            result.update(block[block >= 0].tolist())
+        if self._cells:
+            for row in range(first_row, last_row + 1):
+                for col in range(first_col, last_col + 1):
+                    entity = self._cells.get((col, row))
+                    if entity is not None:
+                        result.add(entity)
+        return result
+
+    def query_radius(self, cx: float, cy: float, radius: float) -> Set[Entity]:
+        size = self.tile_size
+        first_col, first_row = int((cx - radius) // size), int((cy - radius) // size)
+        last_col = int((cx + radius - 1) // size)
+        last_row = int((cy + radius - 1) // size)
+        result = set()
+        for row in range(first_row, last_row + 1):
+            for col in range(first_col, last_col + 1):
+                if _intersects_circle((col * size, row * size, size, size), cx, cy, radius):
+                    entity = self.at_cell(col, row)
+                    if entity is not None:
+                        result.add(entity)
+        return result
+
+    # --- Служебные методы ---
+
+    def _in_region(self, col: int, row: int) -> bool:
+        height, width = self._region.shape
+        return 0 <= col - self._region_origin[0] < width and 0 <= row - self._region_origin[1] < height
+
+    def _put(self, cell: Cell, entity: Entity):
+        """Записывает сущность в свободную ячейку (в плотную область, если ячейка в ней)."""
+        col, row = cell
+        if self._region is not None and self._in_region(col, row):
+            flat = (row - self._region_origin[1]) * self._region.shape[1] + col - self._region_origin[0]
+            self._region_flat[flat] = entity
+            self._region_count += 1
+            slot = entity & self._slot_mask
+            if slot >= len(self._region_cell_of):
+                self._grow_cell_of(slot + 1)
+            self._region_cell_of[slot] = flat
+        else:
+            self._cells[cell] = entity
+            self._cell_of[entity] = cell
+
+    def _region_cell(self, entity: Entity) -> int:
+        """Ячейка сущности в плотной области (номер в _region_flat) или -1."""
+        if not self._region_count:
+            return -1
+        slot = entity & self._slot_mask
+        if slot >= len(self._region_cell_of):
+            return -1
+        flat = self._region_cell_of[slot]
+        return flat if flat >= 0 and self._region_flat[flat] == entity else -1
+
+    def _region_cells(self, ids: np.ndarray) -> np.ndarray:
+        """То же для массива ID."""
+        slots = ids & self._slot_mask
+        inside = slots < len(self._region_cell_of)
+        flat = np.full(len(ids), -1, dtype=np.int64)
+        flat[inside] = np.frombuffer(self._region_cell_of, dtype=np.int64)[slots[inside]]
+        found = flat >= 0
+        found[found] = self._region_flat[flat[found]] == ids[found]
+        return np.where(found, flat, -1)
+
+    def _grow_cell_of(self, size: int):
+        extra = max(size, 2 * len(self._region_cell_of)) - len(self._region_cell_of)
+        self._region_cell_of.extend(array('q', [-1]) * extra)
+
+
+class SpatialIndex:
+    """
+    Пространственный индекс мира. Объединяет две структуры:
+    - TileGrid для тайлов карты (поиск по точке за O(1));
+    - SpatialHash для всех остальных сущностей (юниты, эффекты и т.д.).
+
+    GameWorld держит индекс синхронизированным с TransformComponent
+    при add_component, remove_component и delete_entity.
+    """
+    def __init__(self, tile_size: int, hash_cell_size: int | None = None):
+        self.tile_grid = TileGrid(tile_size)
+        # Нетайловые сущности обычно крупнее или мельче тайла и встречаются реже,
+        # поэтому для них берем более крупные ячейки.
+        self.spatial_hash = SpatialHash(hash_cell_size or tile_size * 4)
+
+    def __len__(self) -> int:
+        return len(self.tile_grid) + len(self.spatial_hash)
+
+    def __contains__(self, entity: Entity) -> bool:
+        return entity in self.tile_grid or entity in self.spatial_hash
+
+    def insert(self, entity: Entity, rect: Rect):
+        """Добавляет сущность или обновляет ее положение."""
+        if self.tile_grid.try_insert(entity, rect):
+            self.spatial_hash.remove(entity)
+        else:
+            self.tile_grid.remove(entity)
+            self.spatial_hash.insert(entity, rect)
+
+    def insert_many(self, entities: List[Entity], rects: List[Rect]):
+        """Добавляет много новых сущностей (тех, которых в индексе еще нет)."""
+        for entity, rect in self.tile_grid.insert_many(entities, rects):
+            self.spatial_hash.insert(entity, rect)
+
+    def insert_columns(self, entities: List[Entity], xs: Any, ys: Any, widths: Any, heights: Any):
+        """
+        То же, что insert_many, но прямоугольники заданы колонками: NumPy-массивами
+        или одним значением на всех (например, width=TILE_SIZE). Какие сущности
+        ровно в один тайл и в какой они клетке, считается векторно, без цикла
+        Python по клеткам карты.
+        """
+        count = len(entities)
+        xs, ys, widths, heights = (np.broadcast_to(np.asarray(values), (count,)) for values in (xs, ys, widths, heights))
+        size = self.tile_grid.tile_size
+        fits = (widths == size) & (heights == size) & (xs % size == 0) & (ys % size == 0)
+        tiled = np.flatnonzero(fits)
+        if len(tiled) == count:
+            rejected = self.tile_grid.insert_cells(entities, xs // size, ys // size)
+        else:
+            tiled_entities = [entities[index] for index in tiled.tolist()]
+            rejected = tiled[self.tile_grid.insert_cells(tiled_entities, xs[tiled] // size, ys[tiled] // size)].tolist()
+            rejected.extend(np.flatnonzero(~fits).tolist())
+        for index in rejected:
+            self.spatial_hash.insert(entities[index], (int(xs[index]), int(ys[index]),
+                                                       int(widths[index]), int(heights[index])))
+
+    def remove(self, entity: Entity):
+        self.tile_grid.remove(entity)
+        self.spatial_hash.remove(entity)
+
+    def remove_many(self, entities: List[Entity]):
+        """Удаляет из индекса много сущностей разом."""
+        self.tile_grid.remove_many(entities)
+        if self.spatial_hash:
+            for entity in entities:
+                self.spatial_hash.remove(entity)
+
+    def query_point(self, x: float, y: float) -> List[Entity]:
+        """Возвращает все сущности, содержащие точку (сначала тайл, затем остальные)."""
+        result = self.tile_grid.query_point(x, y)
+        if self.spatial_hash:
+            result.extend(self.spatial_hash.query_point(x, y))
+        return result
+
+    def query_rect(self, x: float, y: float, width: float, height: float, tiles: bool = True) -> Set[Entity]:
+        """
+        Возвращает все сущности, пересекающие прямоугольник (например, область экрана).
+
+        :param tiles: False — искать только среди нетайловых сущностей (юниты, эффекты).
+        """
+        result = self.tile_grid.query_rect(x, y, width, height) if tiles else set()
+        if self.spatial_hash:
+            result.update(self.spatial_hash.query_rect(x, y, width, height))
+        return result
+
+    def query_radius(self, cx: float, cy: float, radius: float) -> Set[Entity]:
+        """Возвращает все сущности, пересекающие круг."""
+        result = self.tile_grid.query_radius(cx, cy, radius)
+        if self.spatial_hash:
+            result.update(self.spatial_hash.query_radius(cx, cy, radius))
+        return result
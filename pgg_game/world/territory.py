@@ -0,0 +1,360 @@
+# src/pgg_game/world/territory.py
+
+"""
+Территории — связные области провинций одного владельца — и их границы.
+
+Области ведутся системой непересекающихся множеств (union-find) по мере
+захвата провинций: новая провинция объединяется с областями соседей того же
+владельца, поэтому захват стоит почти O(1), а не обход всей карты.
+Отнять провинцию у union-find нельзя, поэтому при потере провинции область
+проверяется на разрыв: параллельный обход в ширину от соседей потерянной
+провинции останавливается, как только все обходы, кроме одного, встретились
+или закончились. Пересчитываются только отколовшиеся (меньшие) части.
+
+Граница области — множество направленных ребер клеток (обход по часовой
+стрелке в экранных координатах). Ребро общее для двух клеток области входит в
+них с противоположными направлениями, поэтому граница — это "исключающее или"
+ребер всех клеток: добавление и удаление клетки меняет только ее 4 ребра.
+Для отрисовки ребра склеиваются в замкнутые ломаные (кэш на область).
+"""
+
+from collections import deque
+from typing import TYPE_CHECKING, Dict, Iterator, List, Set, Tuple
+
+import pygame
+
+from .ownership import ProvinceOwnership, NEUTRAL
+from ..config import TILE_SIZE
+
+if TYPE_CHECKING:
+    from .game_world import GameWorld
+
+Entity = int
+# Ребро клетки: (начальная точка, конечная точка); точка — y * (ширина + 1) + x в узлах сетки.
+Edge = Tuple[int, int]
+
+
+class Region:
+    """Связная территория одного владельца."""
+    __slots__ = ('owner', 'members', 'border', '_polylines', '_bounds')
+
+    def __init__(self, owner: Entity, members: Set[int], border: Set[Edge]):
+        self.owner = owner
+        # Строки графа провинций области.
+        self.members = members
+        # Направленные ребра границы.
+        self.border = border
+        # Кэш ломаных и охватывающего прямоугольника (сбрасывается при изменении границы).
+        self._polylines: List[List[Tuple[int, int]]] | None = None
+        self._bounds: pygame.Rect | None = None
+
+    @property
+    def size(self) -> int:
+        return len(self.members)
+
+
+class TerritoryMap:
+    """
+    Территории всех игроков на карте одного ProvinceGraph.
+
+    Подписывается на ProvinceOwnership, поэтому владельцев по-прежнему
+    меняют через ownership.set_owner (CaptureProvinceCommand), а территории
+    обновляются сами.
+    """
+    def __init__(self, ownership: ProvinceOwnership, tile_size: int = TILE_SIZE):
+        """
+        :param tile_size: Размер клетки в пикселях мира (для ломаных границ).
+        """
+        graph = ownership.graph
+        if graph.cell_rows is None:
+            raise ValueError("Для территорий нужен граф с сеткой клеток (cell_rows)")
+        self.ownership = ownership
+        self.graph = graph
+        self.tile_size = tile_size
+        self._indptr, self._indices = graph.adjacency_lists()
+        height, width = graph.cell_rows.shape
+        self._stride = width + 1
+        ys, xs = (axis.tolist() for axis in (graph.cell_rows >= 0).nonzero())
+        self._xs, self._ys = xs, ys
+
+        # Узлы union-find. Узел области — корень; у клетки узел свой или общий
+        # с отколовшейся частью (см. _split). -1 — клетка ничья.
+        self._parent: List[int] = []
+        self._node_of: List[int] = [-1] * graph.num_provinces
+        self._owners: List[int] = [NEUTRAL] * graph.num_provinces
+        # { корневой узел: область }
+        self._regions: Dict[int, Region] = {}
+        # { владелец: корни его областей }
+        self._roots_by_owner: Dict[Entity, Set[int]] = {}
+        # Клетки, вокруг которых поменялись границы с прошлого drain_changed.
+        self._changed: List[int] = []
+
+        owned = (ownership.owners != NEUTRAL).nonzero()[0]
+        for row, owner in zip(owned.tolist(), ownership.owners[owned].tolist()):
+            self._add(row, owner)
+        self._changed.clear()
+        ownership.add_listener(self._on_owner_changed)
+
+    @classmethod
+    def from_world(cls, world: 'GameWorld', ownership: ProvinceOwnership) -> 'TerritoryMap':
+        """Территории для загруженного мира; размер клетки берется из TransformComponent провинции."""
+        from ..components.transform import TransformComponent
+        tile_size = TILE_SIZE
+        for entity in ownership.graph.row_entities[:1].tolist():
+            transform = world.get_component(entity, TransformComponent)
+            if transform is not None:
+                tile_size = transform.width
+        return cls(ownership, tile_size)
+
+    # --- Запросы ---
+
+    def regions(self) -> Iterator[Region]:
+        return iter(self._regions.values())
+
+    def regions_of(self, owner_id: Entity) -> List[Region]:
+        return [self._regions[root] for root in self._roots_by_owner.get(owner_id, ())]
+
+    def region_of(self, entity: Entity) -> Region | None:
+        """Территория, в которую входит провинция, или None для ничьей."""
+        row = self.graph.row_of(entity)
+        if row < 0 or self._node_of[row] < 0:
+            return None
+        return self._regions[self._find(self._node_of[row])]
+
+    def largest_region_size(self, owner_id: Entity) -> int:
+        """Размер самой большой связной территории игрока (для подсчета очков)."""
+        return max((region.size for region in self.regions_of(owner_id)), default=0)
+
+    def border_polylines(self, region: Region) -> List[List[Tuple[int, int]]]:
+        """Замкнутые ломаные границы области в пикселях мира (без повторения первой точки)."""
+        if region._polylines is None:
+            region._polylines, region._bounds = self._trace(region.border)
+        return region._polylines
+
+    def bounds(self, region: Region) -> pygame.Rect:
+        """Прямоугольник в пикселях мира, охватывающий границу области."""
+        if region._bounds is None:
+            region._polylines, region._bounds = self._trace(region.border)
+        return region._bounds
+
+    def drain_changed(self) -> List[pygame.Rect]:
+        """
+        Прямоугольники мира (клетка с соседями), где границы изменились
+        с прошлого вызова. По ним RenderSystem обновляет экран.
+        """
+        tile = self.tile_size
+        rects = [pygame.Rect((self._xs[row] - 1) * tile, (self._ys[row] - 1) * tile, 3 * tile, 3 * tile)
+                 for row in self._changed]
+        self._changed.clear()
+        return rects
+
+    # --- Обновление ---
+
+    def _on_owner_changed(self, row: int, old_owner: Entity, new_owner: Entity):
+        if old_owner != NEUTRAL:
+            self._remove(row)
+        if new_owner != NEUTRAL:
+            self._add(row, new_owner)
+
+    def _add(self, row: int, owner: Entity):
+        node = len(self._parent)
+        self._parent.append(node)
+        self._node_of[row] = node
+        self._owners[row] = owner
+        self._regions[node] = Region(owner, {row}, set())
+        self._roots_by_owner.setdefault(owner, set()).add(node)
+
+        root = node
+        indices, owners, node_of = self._indices, self._owners, self._node_of
+        for neighbor in indices[self._indptr[row]:self._indptr[row + 1]]:
+            if owners[neighbor] == owner:
+                root = self._union(root, self._find(node_of[neighbor]))
+
+        region = self._regions[root]
+        self._toggle_edges(region.border, row, adding=True)
+        self._touch(region, row)
+
+    def _remove(self, row: int):
+        root = self._find(self._node_of[row])
+        region = self._regions[root]
+        self._node_of[row] = -1
+        self._owners[row] = NEUTRAL
+        region.members.discard(row)
+        self._toggle_edges(region.border, row, adding=False)
+        self._touch(region, row)
+        if not region.members:
+            self._drop_root(region.owner, root)
+            return
+
+        members = region.members
+        starts = [neighbor for neighbor in self._indices[self._indptr[row]:self._indptr[row + 1]]
+                  if neighbor in members]
+        # Через клетку с одним соседом из области путь между двумя другими клетками не проходит.
+        if len(starts) > 1:
+            for component in self._separated_components(starts, members):
+                self._split(root, region, component)
+
+    def _separated_components(self, starts: List[int], members: Set[int]) -> List[List[int]]:
+        """
+        Параллельный обход в ширину от starts внутри members. Обходы, которые
+        встретились, сливаются; закончившийся обход — отколовшаяся часть.
+        Останавливается, когда активным остался один обход (остаток области),
+        поэтому стоимость пропорциональна меньшим частям.
+        """
+        indptr, indices = self._indptr, self._indices
+        search_parent = list(range(len(starts)))
+
+        def find_search(search: int) -> int:
+            while search_parent[search] != search:
+                search_parent[search] = search_parent[search_parent[search]]
+                search = search_parent[search]
+            return search
+
+        # Клетка -> обход, который ее нашел (после слияний — через find_search).
+        label = {start: search for search, start in enumerate(starts)}
+        frontiers = [deque([start]) for start in starts]
+        cells = [[start] for start in starts]
+        active = list(range(len(starts)))
+
+        separated = []
+        while len(active) > 1:
+            for search in list(active):
+                if find_search(search) != search:
+                    continue
+                frontier = frontiers[search]
+                if not frontier:
+                    active.remove(search)
+                    separated.append(cells[search])
+                    if len(active) <= 1:
+                        break
+                    continue
+                cell = frontier.popleft()
+                for neighbor in indices[indptr[cell]:indptr[cell + 1]]:
+                    if neighbor not in members:
+                        continue
+                    other = label.get(neighbor)
+                    if other is None:
+                        label[neighbor] = search
+                        cells[search].append(neighbor)
+                        frontier.append(neighbor)
+                        continue
+                    other = find_search(other)
+                    if other != search:
+                        # Обходы встретились: это одна часть.
+                        search_parent[other] = search
+                        frontier.extend(frontiers[other])
+                        cells[search].extend(cells[other])
+                        frontiers[other] = deque()
+                        cells[other] = []
+                        active.remove(other)
+                if len(active) <= 1:
+                    break
+        return separated
+
+    def _split(self, root: int, region: Region, component: List[int]):
+        """Выделяет отколовшуюся часть в отдельную область (стоимость — O(размер части))."""
+        node = len(self._parent)
+        self._parent.append(node)
+        node_of = self._node_of
+        border: Set[Edge] = set()
+        for row in component:
+            node_of[row] = node
+            self._toggle_edges(border, row, adding=True)
+        region.members.difference_update(component)
+        region.border.difference_update(border)
+        region._polylines = region._bounds = None
+        self._regions[node] = Region(region.owner, set(component), border)
+        self._roots_by_owner[region.owner].add(node)
+
+    def _find(self, node: int) -> int:
+        parent = self._parent
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    def _union(self, root_a: int, root_b: int) -> int:
+        if root_a == root_b:
+            return root_a
+        region_a, region_b = self._regions[root_a], self._regions[root_b]
+        if region_a.size < region_b.size:
+            root_a, root_b, region_a, region_b = root_b, root_a, region_b, region_a
+        self._parent[root_b] = root_a
+        region_a.members |= region_b.members
+        # Разные области одного владельца общих ребер не имеют (иначе были бы связны).
+        region_a.border |= region_b.border
+        region_a._polylines = region_a._bounds = None
+        del self._regions[root_b]
+        self._roots_by_owner[region_b.owner].discard(root_b)
+        return root_a
+
+    def _drop_root(self, owner: Entity, root: int):
+        del self._regions[root]
+        roots = self._roots_by_owner[owner]
+        roots.discard(root)
+        if not roots:
+            del self._roots_by_owner[owner]
+
+    def _touch(self, region: Region, row: int):
+        region._polylines = region._bounds = None
+        self._changed.append(row)
+
+    def _toggle_edges(self, border: Set[Edge], row: int, adding: bool):
+        """
+        Меняет границу при добавлении клетки (adding=True) или ее удалении.
+        Добавление: встречное ребро соседа из области исчезает, остальные ребра
+        клетки становятся границей. Удаление — наоборот.
+        """
+        stride = self._stride
+        top_left = self._ys[row] * stride + self._xs[row]
+        top_right = top_left + 1
+        bottom_left = top_left + stride
+        bottom_right = bottom_left + 1
+        for edge in ((top_left, top_right), (top_right, bottom_right),
+                     (bottom_right, bottom_left), (bottom_left, top_left)):
+            reverse = (edge[1], edge[0])
+            if adding:
+                if reverse in border:
+                    border.remove(reverse)
+                else:
+                    border.add(edge)
+            elif edge in border:
+                border.remove(edge)
+            else:
+                border.add(reverse)
+
+    def _trace(self, border: Set[Edge]) -> Tuple[List[List[Tuple[int, int]]], pygame.Rect]:
+        """Склеивает ребра в замкнутые ломаные, убирая точки посреди прямых отрезков."""
+        stride, tile = self._stride, self.tile_size
+        following: Dict[int, List[int]] = {}
+        for start, end in border:
+            following.setdefault(start, []).append(end)
+
+        polylines = []
+        while following:
+            first = next(iter(following))
+            points = [first]
+            point = first
+            while True:
+                ends = following[point]
+                nxt = ends.pop()
+                if not ends:
+                    del following[point]
+                if nxt == first:
+                    break
+                points.append(nxt)
+                point = nxt
+
+            # Прямые участки: средние точки не нужны.
+            corners = []
+            length = len(points)
+            for index, point in enumerate(points):
+                before, after = points[index - 1], points[(index + 1) % length]
+                if point - before != after - point:
+                    corners.append(point)
+            polylines.append([((point % stride) * tile, (point // stride) * tile) for point in corners])
+
+        xs = [x for line in polylines for x, _ in line]
+        ys = [y for line in polylines for _, y in line]
+        bounds = pygame.Rect(min(xs), min(ys), max(xs) - min(xs), max(ys) - min(ys)) if xs else pygame.Rect(0, 0, 0, 0)
+        return polylines, bounds